@@ -1,17 +1,41 @@
+# Naive Bayes and tuned kNN classifiers for the addiction dataset
+#
+# Run from the project root (where the scaled CSV lives):
+#     python data_science_project/Class_model.py              # train once, then reuse
+#     python data_science_project/Class_model.py --retrain    # always train a new version
+#     python data_science_project/Class_model.py --search halving --budget 60
+#
+# The fitted pipelines are saved in a versioned store (model_store.py). When the
+# latest version was trained on the same data with the same settings it is
+# reused, so the report and plots come back without refitting the scaler,
+# Naive Bayes or the kNN grid search. Scoring jobs load the pipelines with
+# load_models(); each version also holds the wrangling notebook's imputation
+# and scaling, fitted on the raw export, so raw exports can be scored
+# (score.py).
+
+import argparse
+
+import os
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.impute import SimpleImputer
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.naive_bayes import GaussianNB
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
-# Load Data
-url = r"addiction after scaling and imputation.csv"
-data = pd.read_csv(url)
+from halving_search import HalvingSearch, format_report
+from knn_tuning import KNNGridSearch
+import model_store
+
+DATA_PATH = r"addiction after scaling and imputation.csv"
+# The raw export DATA_PATH was made from (Data_Wrangling_and_Preprocessing_for_addiction.ipynb)
+RAW_DATA_PATH = "mobile_addiction.csv"
+MODEL_NAME = "addiction"
 
 # Select features and target
 features = [
@@ -24,24 +48,9 @@ features = [
 ]
 target = 'addicted'
 
-# Drop missing values
-data_clean = data[features + [target]].dropna()
-
-# Define X and y
-X = data_clean[features]
-y = data_clean[target]
-
-# Normalize Data
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
 # Train/Test split
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
-
-# Naive Bayes
-nb_model = GaussianNB() 
-nb_model.fit(X_train, y_train)
-y_pred_nb = nb_model.predict(X_test)
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
 
 # kNN with Hyperparameter Tuning
 param_grid = {
@@ -49,46 +58,220 @@ param_grid = {
     'weights': ['uniform', 'distance'],
     'metric': ['euclidean', 'manhattan']
 }
-grid_knn = GridSearchCV(KNeighborsClassifier(), param_grid, cv=5, scoring='accuracy')
-grid_knn.fit(X_train, y_train)
-
-# Best kNN model
-print("Best kNN Parameters:", grid_knn.best_params_)
-print("Best kNN CV Score:", grid_knn.best_score_)
-y_pred_knn = grid_knn.best_estimator_.predict(X_test)
-
-# Evaluation
-print("\nNaive Bayes Report")
-print("Accuracy:", accuracy_score(y_test, y_pred_nb))
-print(classification_report(y_test, y_pred_nb))
-
-print("\nk-Nearest Neighbors Report (Tuned)")
-print("Accuracy:", accuracy_score(y_test, y_pred_knn))
-print(classification_report(y_test, y_pred_knn))
-
-# Visualization
-plt.figure(figsize=(12, 5))
-
-# Naive Bayes Confusion Matrix
-plt.subplot(1, 2, 1)
-sns.heatmap(confusion_matrix(y_test, y_pred_nb), annot=True, fmt='d', cmap='Blues')
-plt.title("Naive Bayes Confusion Matrix")
-plt.xlabel("Predicted")
-plt.ylabel("Actual")
-
-# kNN Confusion Matrix
-plt.subplot(1, 2, 2)
-sns.heatmap(confusion_matrix(y_test, y_pred_knn), annot=True, fmt='d', cmap='Greens')
-plt.title("kNN Confusion Matrix (Tuned)")
-plt.xlabel("Predicted")
-plt.ylabel("Actual")
-
-# Extra info
-print("Original rows:", data.shape[0])
-print("After cleaning:", data_clean.shape[0])
-print("Test set size:", X_test.shape[0])
-print("Test set class distribution:\n", pd.Series(y_test).value_counts())
-
-plt.tight_layout()
-plt.show()
+CV_FOLDS = 5
+# Cores for the kNN search (-1: all of them)
+SEARCH_JOBS = -1
+
+# "grid": every candidate on every row; "halving": successive halving (halving_search.py),
+# for exports too large for the full grid
+SEARCH_MODES = ("grid", "halving")
+
+
+def training_settings(search="grid", budget=None):
+    """Everything besides the data that decides what training produces (stored in the manifest)."""
+    return {
+        "test_size": TEST_SIZE,
+        "random_state": RANDOM_STATE,
+        "param_grid": param_grid,
+        "cv": CV_FOLDS,
+        "scoring": "accuracy",
+        "search": search,
+        "budget": budget,
+    }
+
+
+def knn_search(search="grid", budget=None):
+    """The kNN hyperparameter search for a search mode, with the interface of GridSearchCV."""
+    if search == "halving":
+        return HalvingSearch(KNeighborsClassifier(), param_grid, cv=CV_FOLDS, scoring='accuracy',
+                             time_budget=budget, n_jobs=SEARCH_JOBS, random_state=RANDOM_STATE)
+    # Same results as GridSearchCV(KNeighborsClassifier(), param_grid, cv=CV_FOLDS, scoring='accuracy'),
+    # from one neighbor query per fold and metric (knn_tuning.py)
+    return KNNGridSearch(param_grid, cv=CV_FOLDS, n_jobs=SEARCH_JOBS, estimator=KNeighborsClassifier())
+
+
+def load_data(path=DATA_PATH):
+    """Return (data, data_clean): the CSV and its rows without missing features/target."""
+    data = pd.read_csv(path)
+    # Drop missing values
+    data_clean = data[features + [target]].dropna()
+    return data, data_clean
+
+
+def fit_wrangling(raw_path=RAW_DATA_PATH):
+    """Median imputation + standard scaling of the features, fitted on the raw export like the wrangling notebook.
+
+    Both steps work column by column, so fitting them on the model features alone gives
+    the same values as the notebook's fit on every numeric column.
+    """
+    raw = pd.read_csv(raw_path, usecols=features)
+    wrangling = Pipeline([("imputer", SimpleImputer(strategy="median")), ("scaler", StandardScaler())])
+    return wrangling.set_output(transform="pandas").fit(raw[features])
+
+
+def split(data_clean):
+    """Train/test split of the raw features (the pipelines scale them)."""
+    X = data_clean[features]
+    y = data_clean[target]
+    return train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+
+def train(data_clean, search="grid", budget=None):
+    """Fit both classifiers; return (pipelines, metrics)."""
+    X = data_clean[features]
+    X_train, X_test, y_train, y_test = split(data_clean)
+
+    # Normalize Data (fitted on every row, as the models were always trained)
+    scaler = StandardScaler()
+    scaler.fit(X)
+    X_train_scaled = scaler.transform(X_train)
+
+    # Naive Bayes
+    nb_model = GaussianNB()
+    nb_model.fit(X_train_scaled, y_train)
+
+    # Tuned kNN
+    grid_knn = knn_search(search, budget)
+    grid_knn.fit(X_train_scaled, y_train)
+
+    pipelines = {
+        "naive_bayes": Pipeline([("scaler", scaler), ("model", nb_model)]),
+        "knn": Pipeline([("scaler", scaler), ("model", grid_knn.best_estimator_)]),
+    }
+    metrics = evaluate(pipelines, X_test, y_test)
+    metrics["knn"]["best_params"] = grid_knn.best_params_
+    metrics["knn"]["cv_score"] = float(grid_knn.best_score_)
+    if hasattr(grid_knn, "report_"):
+        metrics["knn"]["search"] = grid_knn.report_
+    return pipelines, metrics
+
+
+def evaluate(pipelines, X_test, y_test):
+    """Accuracy, classification report and confusion matrix of every pipeline on the test set."""
+    metrics = {}
+    for key, pipeline in pipelines.items():
+        y_pred = pipeline.predict(X_test)
+        metrics[key] = {
+            "accuracy": float(accuracy_score(y_test, y_pred)),
+            "report": classification_report(y_test, y_pred),
+            "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
+        }
+    return metrics
+
+
+def train_or_load(path=DATA_PATH, store=model_store.DEFAULT_STORE, retrain=False, search="grid", budget=None,
+                  raw_path=RAW_DATA_PATH):
+    """Return the manifest of a version trained on the data at path, training one only when needed."""
+    # Without the raw export the version is saved without its wrangling step
+    raw_paths = [raw_path] if raw_path is not None and os.path.exists(raw_path) else []
+    fingerprint = model_store.data_fingerprint(path, features, target, raw_paths)
+    settings = training_settings(search, budget)
+    version = None if retrain else model_store.find_version(store, MODEL_NAME, fingerprint, settings)
+    if version is not None:
+        return model_store.read_manifest(store, MODEL_NAME, version)
+
+    data, data_clean = load_data(path)
+    pipelines, metrics = train(data_clean, search, budget)
+    y_test = split(data_clean)[3]
+    for raw in raw_paths:
+        pipelines["wrangling"] = fit_wrangling(raw)
+    version = model_store.save_version(store, MODEL_NAME, pipelines, {
+        "features": features,
+        "target": target,
+        "fingerprint": fingerprint,
+        "settings": settings,
+        "metrics": metrics,
+        "data": {
+            "path": path,
+            "raw_path": raw_paths[0] if raw_paths else None,
+            "rows": int(data.shape[0]),
+            "clean_rows": int(data_clean.shape[0]),
+            "test_rows": int(y_test.shape[0]),
+            "test_distribution": {str(label): int(count) for label, count in y_test.value_counts().items()},
+        },
+    })
+    return model_store.read_manifest(store, MODEL_NAME, version)
+
+
+def load_models(store=model_store.DEFAULT_STORE, version=None, mmap=True):
+    """Return (pipelines, manifest) of a saved version, for scoring without retraining."""
+    return model_store.load_version(store, MODEL_NAME, version, mmap=mmap)
+
+
+def print_report(manifest):
+    metrics = manifest["metrics"]
+
+    # Best kNN model
+    print("Best kNN Parameters:", metrics["knn"]["best_params"])
+    print("Best kNN CV Score:", metrics["knn"]["cv_score"])
+    if "search" in metrics["knn"]:
+        print("Successive halving search:")
+        print(format_report(metrics["knn"]["search"]))
+
+    # Evaluation
+    print("\nNaive Bayes Report")
+    print("Accuracy:", metrics["naive_bayes"]["accuracy"])
+    print(metrics["naive_bayes"]["report"])
+
+    print("\nk-Nearest Neighbors Report (Tuned)")
+    print("Accuracy:", metrics["knn"]["accuracy"])
+    print(metrics["knn"]["report"])
+
+    # Extra info
+    data = manifest["data"]
+    print("Original rows:", data["rows"])
+    print("After cleaning:", data["clean_rows"])
+    print("Test set size:", data["test_rows"])
+    print("Test set class distribution:\n", pd.Series(data["test_distribution"], name="count").rename_axis(target))
+
+
+def plot_confusion_matrices(manifest):
+    # Imported here so scoring jobs that import this module do not load matplotlib
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    metrics = manifest["metrics"]
+
+    # Visualization
+    plt.figure(figsize=(12, 5))
+
+    # Naive Bayes Confusion Matrix
+    plt.subplot(1, 2, 1)
+    sns.heatmap(np.array(metrics["naive_bayes"]["confusion_matrix"]), annot=True, fmt='d', cmap='Blues')
+    plt.title("Naive Bayes Confusion Matrix")
+    plt.xlabel("Predicted")
+    plt.ylabel("Actual")
+
+    # kNN Confusion Matrix
+    plt.subplot(1, 2, 2)
+    sns.heatmap(np.array(metrics["knn"]["confusion_matrix"]), annot=True, fmt='d', cmap='Greens')
+    plt.title("kNN Confusion Matrix (Tuned)")
+    plt.xlabel("Predicted")
+    plt.ylabel("Actual")
+
+    plt.tight_layout()
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train (or reuse) the addiction classifiers and report on them.")
+    parser.add_argument("--data", default=DATA_PATH, help="scaled and imputed CSV to train on")
+    parser.add_argument("--raw-data", default=RAW_DATA_PATH,
+                        help="raw export the CSV was made from (its imputation and scaling are saved for scoring)")
+    parser.add_argument("--store", default=model_store.DEFAULT_STORE, help="directory of the versioned model store")
+    parser.add_argument("--retrain", action="store_true", help="train a new version even if a matching one exists")
+    parser.add_argument("--search", choices=SEARCH_MODES, default="grid",
+                        help="kNN tuning: full grid, or successive halving on growing subsets of the rows")
+    parser.add_argument("--budget", type=float, help="seconds allowed for the halving search")
+    parser.add_argument("--no-plots", action="store_true", help="skip the confusion matrix plots")
+    args = parser.parse_args()
+
+    manifest = train_or_load(args.data, args.store, args.retrain, args.search, args.budget, args.raw_data)
+    print(f"Model version: v{manifest['version']} ({manifest['created']})")
+    print_report(manifest)
+    if not args.no_plots:
+        plot_confusion_matrices(manifest)
+
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# Precomputed aggregates for the "Static Visualizations" mode
+#
+# None of the static figures depend on user input, so their histogram bins,
+# group means and value counts only change when the dataset itself changes.
+# This module computes all of them once per dataset version and stores them in
+# a small JSON file next to the CSV ("master-5 2.aggregates.json"), so the
+# static pages render from tiny tables no matter how many rows the source has.
+# The tables are computed out of core (streaming.py): the dataset is read in
+# chunks of CHUNK_ROWS rows, only the columns the aggregates use, and every
+# chunk is folded into small mergeable partial states, so building a store
+# never needs the whole export in memory.
+#
+# Build the stores ahead of time (run from the project root):
+#     python data_science_project/aggregate_store.py
+# If a store is missing or out of date, the dashboard rebuilds it on first use.
+
+import json
+import os
+import threading
+
+import pandas as pd
+
+from data_loader import DATASET1_PATH, DATASET2_PATH, dataset_version
+from streaming import CHUNK_ROWS, Binned, BoxStats, GroupMean, ValueCounts, aggregate_stream
+
+
+def group_mean(key, value):
+    """Aggregate: mean of value for each key, as a two-column frame."""
+    return GroupMean(key, value)
+
+
+def value_counts(column):
+    """Aggregate: number of rows per value of column (columns: column, "count")."""
+    return ValueCounts(column)
+
+
+def binned(x, y=None, histfunc="count", nbins=None):
+    """Aggregate: histogram bins of x (see charts.histogram_bins), drawn with charts.histogram_figure."""
+    return Binned(x, y, histfunc, nbins)
+
+
+def box_stats(key, value):
+    """Aggregate: box-plot quartiles and whiskers of value for each key (see streaming.BoxStats)."""
+    return BoxStats(key, value)
+
+
+# Every aggregate the static pages use, per dataset
+STATIC_AGGREGATES = {
+    DATASET1_PATH: {
+        "hist_addiction_score": binned("Self Reported Addiction Score", nbins=10),
+        "hist_avg_addiction_by_age": binned("Age", "Self Reported Addiction Score", histfunc="avg", nbins=10),
+        "hist_avg_usage_by_platforms": binned("Number of Social Media Platforms", "Daily Social Media Usage(hours)", histfunc="avg"),
+        "avg_sleep_by_addiction": group_mean("Self Reported Addiction Score", "Sleep Quality"),
+        "avg_anxiety_by_addiction": group_mean("Self Reported Addiction Score", "Anxiety Score"),
+        "avg_self_esteem_by_addiction": group_mean("Self Reported Addiction Score", "Self Esteem Score"),
+        "avg_addiction_by_mental_health": group_mean("Mental Health Status", "Self Reported Addiction Score"),
+        "avg_addiction_by_usage": group_mean("Daily Social Media Usage(hours)", "Self Reported Addiction Score"),
+        "avg_usage_by_posts": group_mean("Frequency of Posts", "Daily Social Media Usage(hours)"),
+        "avg_usage_by_notifications": group_mean("Frequency of Checking Notifications", "Daily Social Media Usage(hours)"),
+    },
+    DATASET2_PATH: {
+        "addicted_counts": value_counts("addicted"),
+        "hist_avg_screen_time_by_age": binned("age", "daily_screen_time", histfunc="avg", nbins=10),
+        "box_screen_time_by_addicted": box_stats("addicted", "daily_screen_time"),
+        "box_night_usage_by_addicted": box_stats("addicted", "night_usage"),
+        "box_app_sessions_by_addicted": box_stats("addicted", "app_sessions"),
+        "box_work_study_by_addicted": box_stats("addicted", "work_study_hours"),
+    },
+}
+
+
+# Layout of the tables in a store file; bump it whenever an aggregate's table
+# changes (columns, or how they are computed) so older stores get rebuilt
+STORE_FORMAT = 2
+
+_stores = {}  # store path -> (dataset version, {name: frame})
+_stores_lock = threading.Lock()
+
+
+def store_path(path):
+    """Return where the aggregate store for the dataset at path lives."""
+    return os.path.splitext(path)[0] + ".aggregates.json"
+
+
+def compute_aggregates(path, chunk_rows=CHUNK_ROWS):
+    """Compute every static aggregate for the dataset at path in one chunked pass over it."""
+    return aggregate_stream(path, STATIC_AGGREGATES[os.path.basename(path)], chunk_rows)
+
+
+def write_store(path, version, tables):
+    """Persist tables to the dataset's store file, tagged with the store format and dataset version."""
+    payload = {
+        "format": STORE_FORMAT,
+        "dataset_version": version,
+        "tables": {name: table.to_dict(orient="split", index=False) for name, table in tables.items()},
+    }
+    target = store_path(path)
+    tmp_path = target + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, target)
+
+
+def read_store(path):
+    """Return (dataset version, tables) from the dataset's store file.
+
+    (None, None) if there is none or it was written in another STORE_FORMAT.
+    """
+    target = store_path(path)
+    if not os.path.exists(target):
+        return None, None
+    with open(target) as f:
+        payload = json.load(f)
+    if payload.get("format") != STORE_FORMAT:
+        return None, None
+    tables = {name: pd.DataFrame(table["data"], columns=table["columns"]) for name, table in payload["tables"].items()}
+    return payload["dataset_version"], tables
+
+
+def build_store(path):
+    """Compute the aggregates for the current version of the dataset and persist them."""
+    version = dataset_version(path)
+    tables = compute_aggregates(path)
+    try:
+        write_store(path, version, tables)
+    except OSError:
+        # A read-only deployment can still serve the freshly computed tables from memory
+        pass
+    return version, tables
+
+
+def get_static_aggregates(path):
+    """Return {name: frame} of the static aggregates for the current version of the dataset."""
+    version = dataset_version(path)
+    target = store_path(path)
+
+    with _stores_lock:
+        cached = _stores.get(target)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        stored_version, tables = read_store(path)
+        if stored_version != version or set(tables) != set(STATIC_AGGREGATES[os.path.basename(path)]):
+            version, tables = build_store(path)
+
+        _stores[target] = (version, tables)
+        return tables
+
+
+def main():
+    for path in STATIC_AGGREGATES:
+        version, tables = build_store(path)
+        print(f"{path} -> {store_path(path)} ({len(tables)} tables, version {version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
 # Libraries needed
 import streamlit as st  #for web app
 import pandas as pd     #for data manipulation
-import plotly.express as px  #for data visualization
+import time     #for instrumentation timings
+
+from data_loader import DATASET1_PATH, DATASET2_PATH, dataset_version, load_dataset, memory_report  # cached, compact loading
+from aggregate_store import get_static_aggregates  # precomputed tables for the static pages
+from filter_engine import get_filter_index, get_incremental_filter  # index-backed, incremental sidebar filters
+from pushdown import filter_backend, get_pushdown_filter, get_pushdown_source  # optional pyarrow-dataset filtering
+from caching import aggregate_cache, cached_aggregate, figure_cache, filter_signature  # figures/aggregates shared by all sessions
+from figure_registry import (  # every figure declared as data, built concurrently
+    DATASET1_SECTIONS, DATASET1_STATIC, DATASET2_SECTIONS, DATASET2_STATIC, Tables, build_figures, row_columns
+)
+from instrumentation import instrumentation_enabled, render_debug_panel, start_rerun  # opt-in timings
 
 
 
@@ -11,15 +21,30 @@ st.set_page_config(layout="wide") # tells Streamlit to use the full browser widt
 st.sidebar.title("📂 Dataset Selection") # title to allow the users understand whichh dataset they are choosing
 dataset_option = st.sidebar.selectbox("Choose a dataset:", ["Dataset 1: master-5.csv", "Dataset 2: addiction.csv"]) # dropdown menu to choose between two datasets
 
-#2. load the data set
+# Columns each view actually uses, so only those are read from the dataset snapshot
+# (an empty list means the view is drawn entirely from the aggregate store)
+VIEW_COLUMNS = {
+    ("Dataset 1", "Static Visualizations"): [],
+    ("Dataset 1", "Interactive Dashboard"): [
+        "Age", "Gender", "Daily Social Media Usage(hours)", "Frequency of Posts",
+        "Frequency of Checking Notifications", "Self Reported Addiction Score", "Cyberbullying Experience",
+        "Self Esteem Score", "Sleep Quality", "Anxiety Score", "Social Media Fatigue Score", "Mental Health Status"
+    ],
+    ("Dataset 2", "Static Visualizations"): [],
+    ("Dataset 2", "Interactive Dashboard"): [
+        "daily_screen_time", "app_sessions", "gaming_time", "notifications", "night_usage", "age",
+        "work_study_hours", "stress_level", "addicted"
+    ],
+}
+
+#2. pick the data set
 if dataset_option == "Dataset 1: master-5.csv":
-    # Load data
-    data = pd.read_csv("master-5 2.csv")
+    dataset_path = DATASET1_PATH
     dataset_name = "master-5.csv"
     dataset_type = "structured survey with mental health + behavioral indicators"
     show_dataset = "Dataset 1"
 else:
-    data = pd.read_csv("mobile_addiction.csv")
+    dataset_path = DATASET2_PATH
     dataset_name = "addiction.csv"
     dataset_type = "addiction-focused behavioral data"
     show_dataset = "Dataset 2"
@@ -35,6 +60,71 @@ st.markdown(f"**Description**: {dataset_type}")
 st.sidebar.title("📊 Visualization Mode")
 viz_mode = st.sidebar.radio("Select visualization type:", ["Static Visualizations", "Interactive Dashboard"])
 
+# Per-stage and per-figure timings for this rerun (does nothing unless instrumentation is on, see instrumentation.py)
+recorder = start_rerun(f"{show_dataset} / {viz_mode}", instrumentation_enabled(st.query_params))
+
+# Load data (memory-mapped from the snapshot if there is one, parsed once and cached until the file changes).
+# With DASHBOARD_FILTER_BACKEND=pushdown the interactive dashboards load nothing here: every selection is
+# pushed down into a scan of a partitioned Parquet dataset instead (see pushdown.py).
+view_columns = VIEW_COLUMNS[(show_dataset, viz_mode)]
+pushdown_source = None
+with recorder.stage("load") as stage:
+    if viz_mode == "Interactive Dashboard" and filter_backend() == "pushdown":
+        pushdown_source = get_pushdown_source(dataset_path)
+        data = None
+    else:
+        data = load_dataset(dataset_path, columns=view_columns) if view_columns else None
+    stage["rows_out"] = len(data) if data is not None else None
+    if recorder.enabled and data is not None:
+        stage["memory_mb"] = round(data.memory_usage(deep=True).sum() / 1e6, 3)
+
+
+def column_range(column):
+    """(min, max) of a column as ints, for the sidebar sliders."""
+    if pushdown_source is not None:
+        low, high = pushdown_source.bounds(column)
+    else:
+        low, high = data[column].min(), data[column].max()
+    return int(low), int(high)
+
+
+def column_options(column):
+    """Distinct non-missing values of a column, for the sidebar multiselects."""
+    if pushdown_source is not None:
+        return pushdown_source.options(column)
+    return data[column].dropna().unique().tolist()
+
+# Every figure is built through cached_figure(dataset_key, figure key, view_signature, build), so a figure
+# already built for this dataset version and these filters is reused instead of rebuilt
+dataset_key = dataset_version(dataset_path)
+view_signature = filter_signature()  # the interactive dashboards replace this with their sidebar selection
+
+
+def group_table(filters, keys, values=(), how="means", **options):
+    """Group means/sizes/value counts of the filtered rows, shared by every session with the same filters."""
+    name = (how, str(keys), tuple(values), tuple(sorted(options.items())))
+    return cached_aggregate(
+        dataset_key,
+        name,
+        view_signature,
+        lambda: getattr(filters.group_stats(keys, values), how)(**options)
+    )
+
+
+def show_figures(specs, tables):
+    """Build the figures for specs (cache misses in parallel) and draw them in order with their titles and captions."""
+    with recorder.stage("figures", rows_in=tables.n_rows):
+        figures = build_figures(specs, dataset_key, view_signature, tables, recorder)
+
+    with recorder.stage("render"):
+        for spec, fig in zip(specs, figures):
+            start = time.perf_counter()
+            st.markdown(spec.title)
+            st.plotly_chart(fig, use_container_width=True, key=spec.key)
+            if spec.caption:
+                st.info(spec.caption)
+            recorder.figure(spec.key, render_ms=round((time.perf_counter() - start) * 1000, 3))
+
 #5. Show the dataset
 st.title("📱 Social Media & Smartphone Addiction Dashboard")
 if show_dataset == "Dataset 1": #if user has chosen dataset 1
@@ -42,231 +132,12 @@ if show_dataset == "Dataset 1": #if user has chosen dataset 1
     if viz_mode == "Static Visualizations": #AND user has chosen static visualizations
         st.markdown("#### Static Plots for Dataset 1")
 
+        # Histogram bins and group means used below, computed once per dataset version (see aggregate_store.py)
+        with recorder.stage("static aggregates"):
+            aggregates = get_static_aggregates(DATASET1_PATH)
 
-        # Static plots for Dataset 1
-
-        # Figure 0: Addiction Score Distribution
-        st.markdown("### 📈 Addiction Score Distribution")
-        fig0 = px.histogram(
-            data,
-            x="Self Reported Addiction Score",
-            nbins=10
-        )
-
-        fig0.update_layout(
-            height=600
-        )
-
-
-        st.plotly_chart(fig0, use_container_width=True, key="staticd1f0")
-
-        st.info(
-            "💡 Most participants think they are addicted to their smartphones.")
-        
-
-        # Figure 1: Average Addiction Score vs Age
-        st.markdown("### 📈 Avg Addiction Score vs Age ")
-
-
-        fig1 = px.histogram(
-            data,
-            x="Age",
-            y="Self Reported Addiction Score",
-            histfunc="avg",
-            nbins=10
-        )
-
-        fig1.update_layout(
-            height=600
-        )
-
-
-        st.plotly_chart(fig1, use_container_width=True, key="staticd1f1")
-        st.info(
-            "💡 Most ages have high average addiction scores circling around 8.3 to 8.6.")
-
-
-        # Figure 2: Addiction Score vs Average Sleep Quality
-        st.markdown("### 📈 Addiction Score vs Avg Sleep Quality ")
-
-        # Calculate the average sleep quality for each addiction score
-        avg_sleep_quality = data.groupby("Self Reported Addiction Score")["Sleep Quality"].mean().reset_index() # We use reset_index() to turn the grouped result into a DataFrame with proper columns instead of using the group values as an index
-
-        fig2 = px.scatter(
-            avg_sleep_quality,
-            x="Self Reported Addiction Score",
-            y="Sleep Quality"
-        )
-
-        fig2.update_layout(
-            height=600
-        )
-
-
-        st.plotly_chart(fig2, use_container_width=True, key="staticd1f2")
-        st.info(
-            "💡 Average Sleep quality decreased as addiction score increase, then stabilizes")
-
-
-
-        # Figure 3: Addiction Score vs Average Anxiety Score
-        st.markdown("### 📈 Addiction Score vs Avg Anxiety Score ")
-        # Calculate the average anxiety score for each addiction score
-        avg_anx_quality = data.groupby("Self Reported Addiction Score")["Anxiety Score"].mean().reset_index()
-        # We use reset_index() to turn the grouped result into a DataFrame with proper columns instead of using the group values as an index
-        fig3 = px.line(
-            avg_anx_quality,
-            x="Self Reported Addiction Score",
-            y="Anxiety Score"
-        )
-
-        fig3.update_layout(
-            height=600
-        )
-
-
-        st.plotly_chart(fig3, use_container_width=True, key="staticd1f3")
-        st.info(
-            "💡 As the addiction score rises, the anxiety score rises. Positive correlation")
-
-        # Figure 4: Addiction Score vs Average Self-Esteem Score
-        st.markdown("### 📈 Addiction Score vs Avg Self-Esteem Score ")
-        # Calculate the average self-esteem score for each addiction score
-        avg_selfesteem_quality = data.groupby("Self Reported Addiction Score")["Self Esteem Score"].mean().reset_index()
-
-        fig4 = px.line(
-            avg_selfesteem_quality,
-            x="Self Reported Addiction Score",
-            y="Self Esteem Score"
-        )
-
-        fig4.update_layout(
-            height=600
-        )
-
-        st.plotly_chart(fig4, use_container_width=True, key="staticd1f4")
-        st.info(
-            "💡 As the addiction score increases, the anxiety score decreases. Negative correlation")
-
-
-        # Figure 5: Average Addiction Score vs Mental Health Status
-        st.markdown("### 📈Avg Addiction Score vs  Mental Health Status ")
-
-        avg_add_mental_health = data.groupby("Mental Health Status")["Self Reported Addiction Score"].mean().reset_index()
-
-        fig5 = px.bar(  
-            avg_add_mental_health,
-            x="Mental Health Status",
-            y="Self Reported Addiction Score",
-            category_orders=["Poor", "Fair", "Good", "Excellent"] 
-        )
-
-        fig5.update_layout(
-            height=600
-        )
-
-        st.plotly_chart(fig5, use_container_width=True, key="staticd1f5")
-        st.info(
-            "💡 People will high addiction scores tend to have poor mental health status. ")
-
-
-        # Figure 6: Daily Usage vs Average Addiction Score
-        st.markdown("### 📈 Daily Usage vs Avg Addiction Score ")
-        # Calculate the average addiction score for each daily usage
-        avg_addiction_by_usage = data.groupby("Daily Social Media Usage(hours)")["Self Reported Addiction Score"].mean().reset_index()
-
-        fig6 = px.line(
-            avg_addiction_by_usage,
-            x="Daily Social Media Usage(hours)",
-            y="Self Reported Addiction Score"
-        )   
-
-        fig6.update_layout(
-            height=600
-        )
-
-        st.plotly_chart(fig6, use_container_width=True, key="staticd1f6")
-        st.info(
-            "💡 The higher the daily usage, the more prone a participant becomes to smartphone addiction. ")
-
-
-
-
-        # Figure 7: Platforms vs Daily Usage
-        st.markdown("### 📈 Platforms vs Daily Usage")
-
-
-
-        fig7 = px.histogram(
-            data,
-            x="Number of Social Media Platforms",
-            y="Daily Social Media Usage(hours)",
-            histfunc="avg"
-        )
-
-        fig7.update_traces(marker_line_color="black", marker_line_width=1) # adds a black border to the bars
-
-        fig7.update_layout(
-            height=600
-        )
-        
-
-
-        st.plotly_chart(fig7, use_container_width=True, key="staticd1f7")
-        st.info(
-            "💡 Regardless of the number of social media platforms, the average daily usage remains around 5 hours.")
-
-
-
-
-        # Figure 8: Frequency of Posts vs Daily Usage
-        st.markdown("### 📈 Frequency of Posts vs Daily Usage")
-        avg_usage_by_posts = data.groupby("Frequency of Posts")["Daily Social Media Usage(hours)"].mean().reset_index()
-
-        fig8 = px.bar(
-            avg_usage_by_posts,
-            x="Frequency of Posts",
-            y="Daily Social Media Usage(hours)",
-            category_orders={
-                "Frequency of Posts": ["Never", "Rarely", "Sometimes", "Often", "Always"] # orders the x-axis categories
-            }
-        )
-
-        fig8.update_layout(
-            height=600
-        )
-
-
-        st.plotly_chart(fig8, use_container_width=True, key="staticd1f8")
-
-        st.info(
-            "💡 Frequency of posts doesn't have a significant affect on daily usage. ")
-
-
-        # Figure 9: Frequency of Checking Notifications vs Daily Usage
-        st.markdown("### 📈 Notification Frequency vs Daily Usage")
-        # Calculate the average daily usage for each frequency of checking notifications
-        avg_usage_by_notif = data.groupby("Frequency of Checking Notifications")["Daily Social Media Usage(hours)"].mean().reset_index()
-
-        fig9 = px.bar(
-            avg_usage_by_notif,
-            x="Frequency of Checking Notifications",
-            y="Daily Social Media Usage(hours)",
-
-            category_orders={
-                "Frequency of Checking Notifications": ["Rarely", "Occasionally", "Frequently"] # orders the x-axis categories
-            }
-        )
-
-        fig9.update_layout(
-            height=600
-        )
-
-
-        st.plotly_chart(fig9, use_container_width=True, key="staticd1f9")
-        st.info(
-            "💡 Frequency of checking notifications also doesn't have a huge affect on daily usage. ")
-
+        # Every figure is declared in figure_registry.py; show_figures builds and draws them in order
+        show_figures(DATASET1_STATIC, Tables(store=aggregates))
 
 
         #END OF STATIC PLOTS FOR DATASET 1
@@ -284,7 +155,7 @@ if show_dataset == "Dataset 1": #if user has chosen dataset 1
         st.sidebar.header("🔎 Filter Data")
 
         # Retrieves all unique, non-null gender values from the dataset and stores them as a list.
-        gender_options = data["Gender"].dropna().unique().tolist()
+        gender_options = column_options("Gender")
 
         # Creates a multi-select dropdown in the sidebar to let the user pick genders.
         # Adds "All" to the list and sets it as the default.
@@ -305,32 +176,33 @@ if show_dataset == "Dataset 1": #if user has chosen dataset 1
             gender_selection = gender_filter
 
         # Creates a slider in the sidebar to let the user select an age range.
+        usage_min, usage_max = column_range("Daily Social Media Usage(hours)")
         Daily_range = st.sidebar.slider(
             "Select Daily Social Media Usage Range (hours)",
-            int(data["Daily Social Media Usage(hours)"].min()),
-            int(data["Daily Social Media Usage(hours)"].max()),
-            (int(data["Daily Social Media Usage(hours)"].min()),
-             int(data["Daily Social Media Usage(hours)"].max()))
+            usage_min,
+            usage_max,
+            (usage_min, usage_max)
         )
 
+        addiction_min, addiction_max = column_range("Self Reported Addiction Score")
         Addiction_Range = st.sidebar.slider(
             "Select Addiction Score Range",
-            int(data["Self Reported Addiction Score"].min()),
-            int(data["Self Reported Addiction Score"].max()),
-            (int(data["Self Reported Addiction Score"].min()),
-             int(data["Self Reported Addiction Score"].max()))
+            addiction_min,
+            addiction_max,
+            (addiction_min, addiction_max)
         )
 
         # Creates a slider in the sidebar to let the user select an age range.
+        age_min, age_max = column_range("Age")
         age_range = st.sidebar.slider(
             "Select Age Range",
-            int(data["Age"].min()),
-            int(data["Age"].max()),
-            (int(data["Age"].min()), int(data["Age"].max()))
+            age_min,
+            age_max,
+            (age_min, age_max)
         )
 
 
-        mh_options = data["Mental Health Status"].dropna().unique().tolist()
+        mh_options = column_options("Mental Health Status")
 
         mh_filter = st.sidebar.multiselect(
             "Mental Health Status",
@@ -346,9 +218,8 @@ if show_dataset == "Dataset 1": #if user has chosen dataset 1
         else:
             mh_selection = mh_filter
 
-        # Get the unique values in the "Cyberbullying Experience" column
-        data["Cyberbullying Experience"] = data["Cyberbullying Experience"].replace({0:"No", 1:"Yes"})
-        cyber_options = data["Cyberbullying Experience"].dropna().unique().tolist()
+        # Get the unique values in the "Cyberbullying Experience" column (the loader already maps 0/1 to No/Yes)
+        cyber_options = column_options("Cyberbullying Experience")
 
         cyber_filter = st.sidebar.multiselect(
             "Cyberbullying Experience",
@@ -365,352 +236,60 @@ if show_dataset == "Dataset 1": #if user has chosen dataset 1
             cyber_selection = cyber_filter
 
         # Apply filters
-        filtered_data = data[
-            (data["Gender"].isin(gender_selection)) &
-            (data["Age"] >= age_range[0]) &
-            (data["Age"] <= age_range[1]) &
-            (data["Daily Social Media Usage(hours)"] >= Daily_range[0]) &
-            (data["Daily Social Media Usage(hours)"] <= Daily_range[1]) &
-            (data["Mental Health Status"].isin(mh_selection)) &
-            (data["Cyberbullying Experience"].isin(cyber_selection)) &
-            (data["Self Reported Addiction Score"] >= Addiction_Range[0]) &
-            (data["Self Reported Addiction Score"] <= Addiction_Range[1])
-            ]
-
-        # Figure 0: Gender Distribution
-        st.markdown("### 👥 Gender Distribution")
-
-        gender_dist = filtered_data["Gender"].value_counts().reset_index()
-        gender_dist.columns = ["Gender", "Count"]
-
-        fig0 = px.pie(
-            gender_dist,
-            names="Gender",
-            values="Count"
-        )
-
-        fig0.update_layout(
-            height=600
-        )
-
-        st.plotly_chart(fig0, use_container_width=True, key="gender_dist_pie")
-        st.info(
-            "💡 The dataset includes a fairly balanced number of male and female participants, with a small number identifying as 'Others'.")
-
-        # Figure 1: Frequency of Posts by Gender
-        st.markdown("### 🗨️ Frequency of Posts by Gender")
-
-        fig1 = px.histogram(
-            filtered_data,
-            x="Frequency of Posts",
-            color="Gender",
-            barmode="group",
-            category_orders={"Frequency of Posts": ["Never", "Rarely", "Sometimes", "Often", "Always"]}
-        )
-
-        fig1.update_layout(
-            yaxis_title="Frequency of Posts",
-            xaxis_title="Gender",
-            height=600
-        )
-
-        st.plotly_chart(fig1, use_container_width=True, key="post_freq_box")
-        st.info("💡 Most people only post occasionally, with a few posting frequently. ")
-
-        # Figure 2: Frequency of Checking Notifications by Gender
-        st.markdown("### 🔔 Frequency of Checking Notifications by Gender")
-
-        notif_dist = filtered_data.groupby(["Gender", "Frequency of Checking Notifications"]).size().reset_index(
-            name="Count")
-
-        fig2 = px.bar(
-            notif_dist,
-            x="Frequency of Checking Notifications",
-            y="Count",
-            color="Gender",
-            barmode="group"
-        )
-
-        fig2.update_layout(
-            yaxis_title="Number of Participants",
-            xaxis_title="Notification Checking Frequency",
-            height=600
-        )
-
-        st.plotly_chart(fig2, use_container_width=True, key="notif_freq_by_gender")
-
-        # Figure 3: Self Esteem Score Distribution
-        st.markdown("### 📈 Self Esteem Score Distribution")
-        fig3 = px.histogram(
-            filtered_data,
-            x="Self Esteem Score",
-            color="Gender",
-            nbins=10,
-            barmode="group",
-            hover_data=["Age", "Daily Social Media Usage(hours)"]
-        )
-        fig3.update_layout(
-            xaxis_title="Self Esteem Score",
-            yaxis_title="Number of Participants",
-            height=600
-        )
-
-        st.plotly_chart(fig3, use_container_width=True, key="self_esteem_hist")
-        st.info("💡 Lots of men and woman suffer from low self-esteem.")
-
-        # Figure 4: Average daily usage
-        avg_usage_gender = filtered_data.groupby("Gender")["Daily Social Media Usage(hours)"].mean().reset_index()
-
-        st.markdown("### 📈 Average daily usage")
-
-        fig4 = px.bar(
-            avg_usage_gender,
-            x="Gender",
-            y="Daily Social Media Usage(hours)",
-            color="Gender",
-        )
-
-        fig4.update_traces(width=0.4)
-
-        fig4.update_layout(
-            yaxis_title="Average Daily Usage (hours)",
-            xaxis_title="Gender",
-            height=600
-        )
-
-        st.plotly_chart(fig4, use_container_width=True, key="avg_daily_usage_bar")
-        st.info("💡 Daily social media usage is fairly consistent across genders, with no significant differences observed.")
-
-
-        # Figure 5: Anxiety Score by Gender
-        st.markdown("### 📦 Anxiety Score by Gender")
-        fig5 = px.box(
-            filtered_data,
-            x="Gender",
-            y="Anxiety Score",
-            color="Gender"
-        )
-
-        fig5.update_layout(
-            xaxis_title="Gender",
-            yaxis_title="Anxiety Score",
-            height=600
-        )
-
-        st.plotly_chart(fig5, use_container_width=True, key="anxiety_box_gender")
-
-        st.info("💡 The median anxiety score across genders is around 5, with some variation in spread and outliers.")
-
-        # Figure 6: Daily Usage vs. Addiction Score
-        st.markdown("### 🔁 Daily Usage vs. Addiction Score")
-
-        scatter_data = filtered_data.dropna(subset=["Anxiety Score"])
-
-        fig6 = px.scatter(
-            scatter_data,
-            x="Daily Social Media Usage(hours)",
-            y="Self Reported Addiction Score",
-            color="Gender",
-            size="Anxiety Score",
-            hover_data=["Gender","Self Esteem Score", "Sleep Quality"]
-        )
-
-        fig6.update_layout(
-            xaxis_title="Daily Social Media Usage(hours)",
-            yaxis_title="Self Reported Addiction Score",
-            height=600
-        )
-
-        st.plotly_chart(fig6, use_container_width=True, key="usage_vs_addiction")
-        st.info(
-            "💡 There’s a clear positive correlation between daily social media usage and self-reported addiction score.")
-
-        # Figure 7: Mental Health Status Count
-        st.markdown("### Mental Health Status Count")
-
-        mh_counts = filtered_data["Mental Health Status"].value_counts().reset_index()
-        mh_counts.columns = ["Mental Health Status", "Count"]
-
-        fig7 = px.bar(
-            mh_counts,
-            x="Mental Health Status",
-            y="Count",
-            category_orders={"Mental Health Status": ["Poor", "Fair", "Good", "Excellent"]},
-            text_auto=True
-        )
-
-        fig7.update_layout(
-            yaxis_title="Number of Participants",
-            xaxis_title="Mental Health Status",
-            height=600
-        )
-
-        st.plotly_chart(fig7, use_container_width=True, key="mental_health_bar")
-
-        st.info(
-            "💡 Most participants report poor mental health status, with fewer reporting excellent mental health.")
-
-        # Figure 8: Daily Usage vs. Average Anxiety Score
-        st.markdown("### 🔁 Daily Usage vs. Average Anxiety Score")
-
-        avg_anxscore = filtered_data.groupby("Daily Social Media Usage(hours)")["Anxiety Score"].mean().reset_index()
-
-        fig8 = px.line(
-            avg_anxscore,
-            x="Daily Social Media Usage(hours)",
-            y="Anxiety Score",
-            markers=True
-        )
-
-        fig8.update_layout(
-            xaxis_title="Daily Social Media Usage (hours)",
-            yaxis_title="Average Anxiety Score",
-            height=600
-        )
-
-        st.plotly_chart(fig8, use_container_width=True, key="usage_vs_anxiety_line")
-
-        st.info(
-            "💡 Anxiety scores tend to increase with higher daily social media usage, suggesting a positive correlation.")
-
-        # Figure 9: Impact of Cyberbullying on Self Esteem and Anxiety
-        st.markdown("### 🔁 Impact of Cyberbullying on Self Esteem and Anxiety")
-
-        grouped = filtered_data.groupby("Cyberbullying Experience")[
-            ["Self Esteem Score", "Anxiety Score"]].mean().reset_index()
-        melted = grouped.melt(id_vars="Cyberbullying Experience", var_name="Metric", value_name="Average")
-
-        fig9 = px.bar(
-            melted,
-            x="Cyberbullying Experience",
-            y="Average",
-            color="Metric",
-            barmode="group",
-            text_auto=".2f"
-        )
-
-        fig9.update_layout(
-            xaxis_title="Cyberbullying Experience",
-            yaxis_title="Average Self-Esteem and Anxiety Score",
-            height=600
-        )
-
-        st.plotly_chart(fig9, use_container_width=True, key="cyberbullying_impact_bar")
-
-        st.info("💡 Cyberbullying appears to have little impact on self-esteem and anxiety scores. "
-                "This may be due to a small number of 'Yes' responses, limiting the ability to detect clear differences.")
-
-        # Figure 10: Age vs Self Esteem and Anxiety
-        st.markdown("### 🔁 Age vs Average Self Esteem and Anxiety")
-
-        age_group = filtered_data.groupby("Age")[["Self Esteem Score", "Anxiety Score"]].mean().reset_index()
-
-        fig10 = px.line(
-            age_group,
-            x="Age",
-            y=["Self Esteem Score", "Anxiety Score"]
-        )
-
-        fig10.update_layout(
-            xaxis_title="Age",
-            yaxis_title="Average Self-Esteem and Anxiety Score",
-            height=600
-        )
-
-        st.plotly_chart(fig10, use_container_width=True, key="age_selfesteem_anxiety_line")
-
-        st.info("💡 Anxiety peaks around age 30, while self-esteem is at its lowest point. This suggests that early adulthood may be a more mentally stressful period.")
-
-        # Figure 11: Avg Social Media Fatigue by Usage Hours
-        st.markdown("### 📈 Average Social Media Fatigue by Usage Hours")
-        avg_fatigue = filtered_data.groupby("Daily Social Media Usage(hours)")[
-            "Social Media Fatigue Score"].mean().reset_index()
-
-        fig11 = px.line(
-            avg_fatigue,
-            x="Daily Social Media Usage(hours)",
-            y="Social Media Fatigue Score",
-            markers=True
-        )
-
-        fig11.update_layout(
-            xaxis_title="Daily Social Media Usage(hours)",
-            yaxis_title="Average Social Media Fatigue Score",
-            height=600
-        )
-
-        st.plotly_chart(fig11, use_container_width=True, key="fatigue_by_usage_line")
-
-        st.info("💡 There’s a rising trend in social media fatigue scores as daily usage increases.")
-
-        # Figure 12: Sleep Quality vs. Addiction Score
-        st.markdown("### 😴 Average Sleep Quality by Addiction Score")
-        avg_sleep = filtered_data.groupby("Self Reported Addiction Score")["Sleep Quality"].mean().reset_index()
-
-        fig12 = px.line(
-            avg_sleep,
-            x="Self Reported Addiction Score",
-            y="Sleep Quality",
-            markers=True
-        )
-
-        fig12.update_layout(
-            xaxis_title="Self Reported Addiction Score",
-            yaxis_title="Average Sleep Quality",
-            height=600
-        )
-
-        st.plotly_chart(fig12, use_container_width=True, key="sleep_by_addiction_line")
-
-        st.info(
-            "💡 This suggests that higher self-reported addiction is associated with poorer sleep, especially after crossing a certain threshold")
-
-        # Figure 13: Mental Health vs. Addiction Score
-        st.markdown("### 🧠 Average Sleep Quality by Mental Health Status")
-
-        avg_sleep_mentalhealth = filtered_data.groupby("Mental Health Status")["Sleep Quality"].mean().reset_index()
-
-        fig13 = px.bar(
-            avg_sleep_mentalhealth,
-            x="Mental Health Status",
-            y="Sleep Quality",
-            text_auto=".2f",
-            category_orders={"Mental Health Status": ["Poor", "Fair", "Good", "Excellent"]},
-            color="Mental Health Status"
-        )
-
-        fig13.update_layout(
-            xaxis_title="Mental Health Status",
-            yaxis_title="Average Sleep Quality",
-            height=600
+        # The index is built once per loaded dataset; each filter is then a few lookups and binary searches.
+        # The session remembers its last selection, so moving one control only re-evaluates that control.
+        if pushdown_source is not None:
+            filters = get_pushdown_filter(st.session_state, "dataset1_pushdown", pushdown_source, view_columns)
+        else:
+            with recorder.stage("filter index"):
+                filter_index = get_filter_index(
+                    "dataset1",
+                    data,
+                    categorical=["Gender", "Mental Health Status", "Cyberbullying Experience"],
+                    ranges=["Age", "Daily Social Media Usage(hours)", "Self Reported Addiction Score"]
+                )
+            filters = get_incremental_filter(st.session_state, "dataset1_filter", filter_index)
+        selection = dict(
+            categories={
+                "Gender": gender_selection,
+                "Mental Health Status": mh_selection,
+                "Cyberbullying Experience": cyber_selection
+            },
+            ranges={
+                "Age": age_range,
+                "Daily Social Media Usage(hours)": Daily_range,
+                "Self Reported Addiction Score": Addiction_Range
+            }
         )
+        with recorder.stage("filter", rows_in=pushdown_source.n_rows if pushdown_source else len(data)) as stage:
+            filters.update(**selection)
+            stage["rows_out"] = filters.n_rows
+        view_signature = filter_signature(**selection)
 
-        st.plotly_chart(fig13, use_container_width=True, key="sleep_by_Mental_Health Status")
-
-        st.info("💡 Improved mental health is associated with better sleep quality. ")
-
-        # Figure 14: Addiction Score vs. Social Media Fatigue
-        st.markdown("### 💥 Average Social Media Fatigue by Addiction Score")
-
-        avg_social_media_fatigue = filtered_data.groupby("Self Reported Addiction Score")[
-            "Social Media Fatigue Score"].mean().reset_index()
+        # The group means/counts of the figures come from group_table(...): sessions with the same filters share
+        # one result, and otherwise filters.group_stats(...) keeps per-group sums and counts up to date from
+        # the rows that entered or left the filter since the last rerun
 
-        fig14 = px.line(
-            avg_social_media_fatigue,
-            x="Self Reported Addiction Score",
-            y="Social Media Fatigue Score",
-            markers=True
+        # Only the selected section is computed: its aggregations and Plotly figures are built on this rerun,
+        # the other sections cost nothing until the user switches to them.
+        section = st.radio(
+            "Section",
+            list(DATASET1_SECTIONS),
+            horizontal=True,
+            key="dataset1_section"
         )
 
-        fig14.update_layout(
-            xaxis_title="Addiction Score",
-            yaxis_title="Average Social Media Fatigue Score",
-            height=600
+        # The rows are only turned into a frame (of the columns the section draws) when one of its figures reads them
+        specs = DATASET1_SECTIONS[section]
+        show_figures(
+            specs,
+            Tables(
+                rows=lambda: filters.filtered(row_columns(specs, view_columns)),
+                n_rows=filters.n_rows,
+                group=lambda keys, values, how, **options: group_table(filters, keys, values, how, **options)
+            )
         )
 
-        st.plotly_chart(fig14, use_container_width=True, key="addict_vs_fatigue")
-        st.info("💡 Positive correlation: Higher addiction scores are associated with increased social media fatigue.")
-
 
         #END OF Dataset1 Interactive Dashboard
 
@@ -720,126 +299,12 @@ elif show_dataset == "Dataset 2": # if user has chosen dataset 2
         st.markdown("#### Static Plots for Dataset 2")
         # Static plots for Dataset 2
 
+        # Counts, histogram bins and box statistics used below, computed once per dataset version (see aggregate_store.py)
+        with recorder.stage("static aggregates"):
+            aggregates = get_static_aggregates(DATASET2_PATH)
 
-
-        # Figure 0: Addiction Status Distribution
-        st.markdown("### 📈 Addiction Distribution")
-
-        addicted_dist = data["addicted"].value_counts().reset_index()
-        fig0 = px.pie(
-            addicted_dist,
-            names="addicted",
-            values="count"
-        )
-
-        fig0.update_layout(
-            height=600
-        )
-
-
-        st.plotly_chart(fig0, use_container_width=True, key="staticd2f0")
-        st.info(
-            "💡 Around 50.4% of people are addicted to social media")
-
-
-        # Figure 1: Avg Daily Usage by Addiction Status
-        st.markdown("### 📈 Addiction Status by Daily Usage")
-
-        fig1 = px.box(
-            data,
-            x="addicted",
-            y="daily_screen_time",
-            color="addicted",
-            color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-            labels={"daily_screen_time": "Daily Screen Time (hours)", "addicted": "Addiction Status"}
-        )
-
-        fig1.update_layout(
-            height=600
-        )
-
-        st.plotly_chart(fig1, use_container_width=True, key="staticd2f1")
-        st.info(
-            "💡 Addicted people tend to use the phone more often")
-
-
-        # Figure 2: Avg Daily Usage by Age
-        st.markdown("### 📈 Avg Daily Usage by Age")
-
-        fig2 = px.histogram(data, x = "age", y = "daily_screen_time", nbins= 10, histfunc= "avg")
-
-        fig2.update_layout(
-            height=600
-        )
-        st.plotly_chart(fig2, use_container_width=True, key="staticd2f2")
-
-        st.info(
-            "💡 Teenagers have the most screen time averaging at around 4.5 hours per day")
-
-
-        # Figure 3: Addiction Status by Night Usage
-        st.markdown("### 📈 Addiction Status by Night Usage")
-
-        fig3 = px.box(
-            data,
-            x="addicted",
-            y="night_usage",
-            color="addicted",
-            color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-            labels={"night_usage": "Night Usage (hours)", "addicted": "Addiction Status"}
-        )
-
-        fig3.update_layout(
-            height=600
-        )
-        st.plotly_chart(fig3, use_container_width=True, key="staticd2f3")
-        st.info(
-            "💡 Users classified as addicted tend to spend more time on their phones after bedtime."
-        )
-
-
-        # Figure 4: Addiction Status by App Sessions
-        st.markdown("### 📈 Addiction Status by App Sessions")
-
-        fig4 = px.box(
-            data,
-            x="addicted",
-            y="app_sessions",
-            color="addicted",
-            color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-            labels={"app_sessions": "App Sessions", "addicted": "Addiction Status"}
-        )
-
-        fig4.update_layout(
-            height=600
-        )
-        st.plotly_chart(fig4, use_container_width=True, key="staticd2f4")
-        st.info(
-            "💡 Addicted users typically open apps more frequently throughout the day."
-        )
-
-
-
-        # Figure 5: Work/Study Hours by Addiction Status
-        st.markdown("### 📈 Work/Study Hours by Addiction Status")
-
-        fig5 = px.box(
-            data,
-            x="addicted",
-            y="work_study_hours",
-            color="addicted",
-            color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-            labels={"work_study_hours": "Work/Study Hours", "addicted": "Addiction Status"}
-        )
-
-        fig5.update_layout(
-            height=600
-        )
-        st.plotly_chart(fig5, use_container_width=True, key="staticd2f5")
-        st.info(
-            "💡 Addicted individuals tend to spend slightly fewer hours on work or study tasks compared to non-addicted individuals."
-        )
-
+        # The box plots are drawn from box statistics in the store too, so no rows are loaded
+        show_figures(DATASET2_STATIC, Tables(store=aggregates))
 
 
         #END OF STATIC PLOTS FOR DATASET 2
@@ -855,27 +320,28 @@ elif show_dataset == "Dataset 2": # if user has chosen dataset 2
 
 
         # Creates a slider in the sidebar to let the user select a screen time range.
+        screen_min, screen_max = column_range("daily_screen_time")
         daily_range2 = st.sidebar.slider(
             "Select Daily Social Media Usage Range (hours)",
-            int(data["daily_screen_time"].min()),
-            int(data["daily_screen_time"].max()),
-            (int(data["daily_screen_time"].min()),
-             int(data["daily_screen_time"].max()))
+            screen_min,
+            screen_max,
+            (screen_min, screen_max)
         )
 
         # Creates a slider in the sidebar to let the user select an age range.
+        age_min2, age_max2 = column_range("age")
         age_range2 = st.sidebar.slider(
             "Select Age Range",
-            int(data["age"].min()),
-            int(data["age"].max()),
-            (int(data["age"].min()), int(data["age"].max()))
+            age_min2,
+            age_max2,
+            (age_min2, age_max2)
         )
 
 
 
 
         # Get the unique values in the "addicted" column
-        addiction_options2 = data["addicted"].dropna().unique().tolist()
+        addiction_options2 = column_options("addicted")
 
         # Create a multiselect filter for addiction status
         addiction_filter2 = st.sidebar.multiselect(
@@ -892,175 +358,63 @@ elif show_dataset == "Dataset 2": # if user has chosen dataset 2
         else:
             addiction_selection2 = addiction_filter2
 
-        # Apply filters
-        filtered_data = data[
-            (data["age"] >= age_range2[0]) &
-            (data["age"] <= age_range2[1]) &
-            (data["daily_screen_time"] >= daily_range2[0]) &
-            (data["daily_screen_time"] <= daily_range2[1]) &
-            (data["addicted"].isin(addiction_selection2))
-            ]
-
-        # Figure 0: Addiction Status Distribution
-        st.markdown("### 👥 Addiction Status Distribution")
-
-        addicted_dist = filtered_data["addicted"].value_counts().reset_index()
-
-        fig0 = px.pie(
-            addicted_dist,
-            names="addicted",
-            values="count",
-            color="addicted",
-            color_discrete_map={
-                "Yes": "#AED6F1",
-                "No": "#1f77b4"
-            }
-        )
-
-        fig0.update_layout(
-            height=600
-        )
-
-        st.plotly_chart(fig0, use_container_width=True, key="addicted_dist_pie")
-        st.info(
-            "💡 Just over half of the participants (50.4%) are classified as addicted, highlighting how widespread smartphone dependency has become.")
-
-
-
-        # Figure 1: Avg Screen Time by Addiction
-        st.markdown("### 📊 Avg Screen Time by Addiction")
-
-        avg_screen = data.groupby("addicted")["daily_screen_time"].mean().reset_index()
-        fig1 = px.bar(avg_screen, x="addicted", y="daily_screen_time",
-                      color="addicted",
-                      color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-                      labels={"daily_screen_time": "Average Screen Time (hrs)", "addicted": "Addiction Status"},
-                      text_auto=".2f"
-                      )
-        
-        fig1.update_layout(
-            height=600
-        )
-        st.plotly_chart(fig1, use_container_width=True)
-
-        st.info(
-            "💡 Average screen time is drastically more for addicted individuals (4.5 hours) compared to non-addicted individuals (3 hours).")
-
-
-
-        # Figure 2: Average Stress Level vs Night Usage
-        st.markdown("### 🌙 Avg Stress Level vs Night Usage")
-
-        avg_sleep = data.groupby("night_usage")["stress_level"].mean().reset_index()
-        fig2 = px.scatter(avg_sleep, x="night_usage", y="stress_level",
-                          color="stress_level", opacity=0.7,
-                          color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-                          labels={"night_usage": "Night Usage (hrs)", "stress_level": "Stress Level"}
-                          )
-        
-        fig2.update_layout(
-            height=600
-        )
-        st.plotly_chart(fig2, use_container_width=True)
-
-        st.info(
-            "💡 Clear positive correlation: when night usage increases, stress level increases.")
-
-
-
-        # Figure 3: Gaming Time by Addiction Status
-        st.markdown("### 🎮 Gaming Time by Addiction Status")
-
-        fig3 = px.bar(data.groupby("addicted")["gaming_time"].mean().reset_index(),
-                      x="addicted", y="gaming_time",
-                      color="addicted",
-                      color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-                      labels={"gaming_time": "Avg Gaming Time (hrs)", "addicted": "Addiction Status"},
-                      text_auto=".2f"
-                      )
-        
-        fig3.update_layout(
-            height=600
-        )
-        st.plotly_chart(fig3, use_container_width=True)
-
-        st.info(
-            "💡 Addicted individuals tend to game more than non-addicted individuals.")
-
-
-
-        # Figure 4: Notifications vs Average Stress Level
-        st.markdown("### 🔔 Notifications vs Avg Stress Level")
-
-        avg_noti = data.groupby("notifications")["stress_level"].mean().reset_index()
-        fig4 = px.scatter(avg_noti, x="notifications", y="stress_level",
-                          color="stress_level", opacity=0.7,
-                          color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-                          labels={"notifications": "Notifications (per day)", "stress_level": "Stress Level"})
-        
-        fig4.update_layout(
-            height=600
-        )
-        st.plotly_chart(fig4, use_container_width=True)
-
-        st.info(
-            "💡 Stress level elevates with the increase of notifications (per day)")
-
-
-        #Figure 5: Age vs Daily Screen time
-        st.markdown("### 👤 Age vs Daily Screen Time")
-
-        avg_screen_age = data.groupby("age")["daily_screen_time"].mean().reset_index()
-        fig5 = px.line(avg_screen_age, x="age", y="daily_screen_time",
-                       labels={"daily_screen_time": "Avg Screen Time (hrs)", "age": "Age"})
-        
-        fig5.update_layout(
-            height=600
-        )
-        st.plotly_chart(fig5, use_container_width=True)
-
-        st.info(
-            "💡 As people get older, they tend to use their phones less. ")
-
-
-
-        # Figure 6: Work and study hours by addiction status
-        st.markdown("### 📚 Work/Study Hours by Addiction Status")
-
-        fig6 = px.box(data, x="addicted", y="work_study_hours", color="addicted",
-                      color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-                      labels={"work_study_hours": "Work/Study Hours", "addicted": "Addiction Status"})
-        
-        fig6.update_layout(
-            height=600
+        # Apply filters (same index-backed, incremental filtering as Dataset 1)
+        if pushdown_source is not None:
+            filters2 = get_pushdown_filter(st.session_state, "dataset2_pushdown", pushdown_source, view_columns)
+        else:
+            with recorder.stage("filter index"):
+                filter_index2 = get_filter_index(
+                    "dataset2",
+                    data,
+                    categorical=["addicted"],
+                    ranges=["age", "daily_screen_time"]
+                )
+            filters2 = get_incremental_filter(st.session_state, "dataset2_filter", filter_index2)
+        selection2 = dict(
+            categories={"addicted": addiction_selection2},
+            ranges={"age": age_range2, "daily_screen_time": daily_range2}
+        )
+        with recorder.stage("filter", rows_in=pushdown_source.n_rows if pushdown_source else len(data)) as stage:
+            filters2.update(**selection2)
+            stage["rows_out"] = filters2.n_rows
+        view_signature = filter_signature(**selection2)
+
+        # Every Dataset 2 figure reads the filtered view: filters2 keeps the matching rows and the per-group
+        # sums/counts of each figure's aggregate up to date as the sidebar changes, and group_table shares the
+        # resulting tables between sessions with the same selection (no full-table groupbys on a rerun).
+        # Only the selected section is computed: its aggregations and Plotly figures are built on this rerun,
+        # the other sections cost nothing until the user switches to them.
+        section = st.radio(
+            "Section",
+            list(DATASET2_SECTIONS),
+            horizontal=True,
+            key="dataset2_section"
+        )
+
+        specs2 = DATASET2_SECTIONS[section]
+        show_figures(
+            specs2,
+            Tables(
+                rows=lambda: filters2.filtered(row_columns(specs2, view_columns)),
+                n_rows=filters2.n_rows,
+                group=lambda keys, values, how, **options: group_table(filters2, keys, values, how, **options)
+            )
         )
 
-        st.plotly_chart(fig6, use_container_width=True)
-
-        st.info(
-            "💡 Non-addicted individuals tend to spend more time on work/study tasks compared to addicted individuals.")
-
-
-        # Figure 7: Average Stress levels vs App sessions
-        st.markdown("### 📱 Avg Stress Level vs App Sessions")
-        avg_app_sess = data.groupby("app_sessions")["stress_level"].mean().reset_index()
-        fig7 = px.scatter(data, x="app_sessions", y="stress_level",
-                          color="stress_level", opacity=0.7,
-                          color_discrete_map={"Yes": "#1f77b4", "No": "#AED6F1"},
-                          labels={"app_sessions": "App Sessions", "stress_level": "Stress Level"})
-        
-        fig7.update_layout(
-            height=600
-        )
 
+        #END OF DATASET 2 INTERACTIVE DASHBOARD
 
-        st.plotly_chart(fig7, use_container_width=True)
 
-        st.info(
-            "💡 More app sessions lead to higher stress levels. ")
-        
-        #END OF DATASET 2 INTERACTIVE DASHBOARD
 
+# Instrumentation: log this rerun and, when it is on, show the numbers at the bottom of the sidebar
+rerun_summary = recorder.finish(dataset_version=dataset_key, filters=view_signature)
+if rerun_summary is not None:
+    render_debug_panel(
+        st.sidebar,
+        rerun_summary,
+        {"figures": figure_cache.stats(), "aggregates": aggregate_cache.stats()},
+        memory_report()
+    )
 
 
 #END OF THE CODE.
\ No newline at end of file
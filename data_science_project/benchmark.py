@@ -0,0 +1,318 @@
+# Rendering benchmark for the dashboard
+#
+# Drives app.py headlessly with Streamlit's AppTest for every dataset/mode
+# combination (Dataset 1/2 x Static/Interactive) at several dataset sizes and
+# writes the results as JSON, e.g. (from the project root):
+#     python data_science_project/benchmark.py --sizes 10k,1M,10M --output benchmark.json
+#     python data_science_project/benchmark.py --sizes 10k --compare benchmark.json
+#
+# For each scenario it records
+#   - the cold run: first render of the view with empty in-process caches and
+#     without the artifacts the app derives on first use (aggregate store,
+#     pushdown dataset), so it includes building them. The snapshot stays, as
+#     it is built ahead of time like a deployment would ship it, and the OS
+#     page cache is not dropped
+#   - rerun latency percentiles over a scripted sequence of interactions
+#     (slider moves, category picks and section switches in the interactive
+#     dashboards, plain reruns in the static ones)
+#   - peak resident memory of the process running the scenario
+#   - figure payload: serialized size of every st.plotly_chart on a run
+#
+# Synthetic datasets come from synthetic_data.py (same schema, levels, ranges
+# and rough correlations as the real files) and are kept in --work-dir, so
+# later runs at the same size skip generation. Each scenario runs in a fresh
+# process, so caches and peak memory never leak from one scenario into the
+# next. With --compare the run fails when a latency or payload figure grows
+# beyond --tolerance compared to an earlier result file.
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATASET1_PATH, DATASET2_PATH, file_signature, read_dataset
+from synthetic_data import generate, parse_size
+import snapshots
+
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, "app.py")
+
+DATASETS = {
+    DATASET1_PATH: "Dataset 1: master-5.csv",
+    DATASET2_PATH: "Dataset 2: addiction.csv",
+}
+MODES = ["Static Visualizations", "Interactive Dashboard"]
+
+# Sidebar controls of each interactive dashboard, by label
+SLIDERS = {
+    DATASET1_PATH: ["Select Age Range", "Select Daily Social Media Usage Range (hours)", "Select Addiction Score Range"],
+    DATASET2_PATH: ["Select Age Range", "Select Daily Social Media Usage Range (hours)"],
+}
+MULTISELECTS = {
+    DATASET1_PATH: ["Select Gender", "Mental Health Status", "Cyberbullying Experience"],
+    DATASET2_PATH: ["Addiction Status"],
+}
+SECTION_KEYS = {DATASET1_PATH: "dataset1_section", DATASET2_PATH: "dataset2_section"}
+
+# Metrics checked by --compare (lower is better)
+COMPARED_METRICS = [("latency_ms", "p50"), ("latency_ms", "p95"), ("cold_ms",), ("payload_bytes", "max")]
+
+
+def prepare_data(rows, work_dir, snapshot_format="arrow"):
+    """Return a directory holding both datasets at rows rows (generated on first use)."""
+    directory = os.path.join(work_dir, str(rows))
+    os.makedirs(directory, exist_ok=True)
+    for source in DATASETS:
+        target = os.path.join(directory, os.path.basename(source))
+        if not os.path.exists(target):
+            generate(source, rows, target)
+        if snapshot_format != "none":
+            path = snapshots.snapshot_path(target, snapshot_format)
+            signature = file_signature(target)
+            if not os.path.exists(path) or snapshots.snapshot_source_signature(path) != snapshots.format_signature(signature):
+                snapshots.write_snapshot(read_dataset(target), path, signature)
+    return directory
+
+
+def percentiles(values):
+    """Summary of a list of latencies (ms)."""
+    if not values:
+        return {}
+    values = np.asarray(values)
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+        "mean": float(values.mean()),
+    }
+
+
+def _by_label(widgets, label):
+    return next(widget for widget in widgets if widget.label == label)
+
+
+def interaction_steps(dataset, mode, rounds):
+    """Scripted interactions for one view: a list of (name, action(at)) applied before each rerun."""
+    if mode == "Static Visualizations":
+        return [("rerun", lambda at: at)] * (rounds * 4)
+
+    steps = []
+    for round_number in range(1, rounds + 1):
+        for label in SLIDERS[dataset]:
+            def narrow(at, label=label, step=round_number):
+                # Pull both ends in a little further every round, so each move misses the caches
+                slider = _by_label(at.sidebar.slider, label)
+                low, high = slider.min, slider.max
+                span = max(high - low, 2)
+                cut = min(step * max(span // 20, 1), (span - 1) // 2)
+                return slider.set_value((low + cut, high - cut))
+            steps.append((f"narrow {label}", narrow))
+
+        for label in MULTISELECTS[dataset]:
+            def pick(at, label=label, step=round_number):
+                widget = _by_label(at.sidebar.multiselect, label)
+                options = [option for option in widget.options if option != "All"]
+                return widget.set_value([options[step % len(options)]])
+
+            def reset(at, label=label):
+                return _by_label(at.sidebar.multiselect, label).set_value(["All"])
+            steps.append((f"pick {label}", pick))
+            steps.append((f"reset {label}", reset))
+
+        def switch(at, step=round_number):
+            radio = at.radio(key=SECTION_KEYS[dataset])
+            return radio.set_value(radio.options[step % len(radio.options)])
+        steps.append(("switch section", switch))
+    return steps
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _clear_caches(data_dir):
+    # The app's modules were imported by the first run; empty every process-wide cache they keep
+    import aggregate_store
+    import caching
+    import data_loader
+    import filter_engine
+    import pushdown
+
+    data_loader.clear_cache()
+    caching.figure_cache.clear()
+    caching.aggregate_cache.clear()
+    with aggregate_store._stores_lock:
+        aggregate_store._stores.clear()
+    with filter_engine._indexes_lock:
+        filter_engine._indexes.clear()
+    with pushdown._sources_lock:
+        pushdown._sources.clear()
+
+    # ...and delete what they wrote next to the datasets, so the cold run rebuilds it as a first visit would
+    for source in DATASETS:
+        target = os.path.join(data_dir, os.path.basename(source))
+        if os.path.exists(aggregate_store.store_path(target)):
+            os.remove(aggregate_store.store_path(target))
+        shutil.rmtree(pushdown.dataset_dir(target), ignore_errors=True)
+
+
+def _payload_bytes(at):
+    return sum(chart.proto.ByteSize() for chart in at.get("plotly_chart"))
+
+
+def run_scenario(data_dir, dataset, mode, rows, rounds, timeout):
+    """Run one dataset/mode scenario in this process and return its measurements."""
+    os.chdir(data_dir)  # app.py opens the datasets relative to the working directory
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)  # what `streamlit run` does for the app's own modules
+    from streamlit.testing.v1 import AppTest
+
+    baseline_rss = _peak_rss_mb()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    # The first run renders the default view; select the scenario's view and measure it from empty caches
+    at.run()
+    at.sidebar.selectbox[0].select(DATASETS[dataset])
+    at.sidebar.radio[0].set_value(mode)
+    _clear_caches(data_dir)
+    start = time.perf_counter()
+    at.run()
+    cold_ms = (time.perf_counter() - start) * 1000
+    payloads = [_payload_bytes(at)]
+    charts = len(at.get("plotly_chart"))
+
+    latencies = []
+    for _, action in interaction_steps(dataset, mode, rounds):
+        start = time.perf_counter()
+        action(at).run()
+        latencies.append((time.perf_counter() - start) * 1000)
+        payloads.append(_payload_bytes(at))
+
+    return {
+        "dataset": dataset,
+        "mode": mode,
+        "rows": rows,
+        "cold_ms": cold_ms,
+        "latency_ms": percentiles(latencies),
+        "reruns": len(latencies),
+        "charts": charts,
+        "payload_bytes": {"first": payloads[0], "max": max(payloads), "mean": float(np.mean(payloads))},
+        "peak_rss_mb": _peak_rss_mb(),
+        "baseline_rss_mb": baseline_rss,
+        "exceptions": [exception.value for exception in at.exception],
+    }
+
+
+def _run_isolated(args):
+    # Worker entry point: one scenario per fresh process
+    return run_scenario(*args)
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions of results against an earlier result document."""
+    earlier = {(r["dataset"], r["mode"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = earlier.get((result["dataset"], result["mode"], result["rows"]))
+        if before is None:
+            continue
+        for path in COMPARED_METRICS:
+            new, old = result, before
+            for part in path:
+                new, old = new.get(part), old.get(part)
+            if new is None or old is None or old <= 0:
+                continue
+            if new > old * (1 + tolerance):
+                regressions.append({
+                    "dataset": result["dataset"],
+                    "mode": result["mode"],
+                    "rows": result["rows"],
+                    "metric": ".".join(path),
+                    "baseline": old,
+                    "current": new,
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app.py rendering for every dataset/mode combination.")
+    parser.add_argument("--sizes", default="10k,1M,10M", help="comma-separated synthetic row counts")
+    parser.add_argument("--datasets", default=",".join(DATASETS), help="comma-separated dataset files")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated visualization modes")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds of scripted interactions per scenario")
+    parser.add_argument("--work-dir", default=".benchmark-data", help="where synthetic datasets are kept")
+    parser.add_argument("--snapshot-format", choices=sorted(snapshots.SNAPSHOT_SUFFIXES) + ["none"], default="arrow",
+                        help="columnar snapshot to build next to each synthetic CSV (none: CSV only)")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per rerun")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative growth for --compare")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    datasets = args.datasets.split(",")
+    modes = args.modes.split(",")
+    work_dir = os.path.abspath(args.work_dir)
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for rows in sizes:
+        start = time.perf_counter()
+        data_dir = prepare_data(rows, work_dir, args.snapshot_format)
+        print(f"{rows:,} rows ready in {data_dir} ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+        for dataset in datasets:
+            for mode in modes:
+                with context.Pool(1) as pool:
+                    result = pool.apply(_run_isolated, ((data_dir, dataset, mode, rows, args.rounds, args.timeout),))
+                results.append(result)
+                print(f"  {dataset} / {mode}: cold {result['cold_ms']:.0f} ms, "
+                      f"p50 {result['latency_ms'].get('p50', 0):.0f} ms, "
+                      f"peak {result['peak_rss_mb']:.0f} MB, payload {result['payload_bytes']['max']:,} B",
+                      file=sys.stderr)
+
+    document = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "pandas": pd.__version__,
+            "snapshot_format": args.snapshot_format,
+            # What cold_ms starts from (see the header)
+            "cold_run": "empty in-process caches, no aggregate store or pushdown dataset, snapshot kept, OS page cache warm",
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+
+    failed = any(result["exceptions"] for result in results)
+    if args.compare:
+        with open(args.compare) as f:
+            document["regressions"] = compare(results, json.load(f), args.tolerance)
+        failed = failed or bool(document["regressions"])
+
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
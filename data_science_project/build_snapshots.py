@@ -0,0 +1,45 @@
+# Convert the dashboard CSVs into columnar snapshots
+#
+# Run from the project root (where the CSVs live), e.g.
+#     python data_science_project/build_snapshots.py
+#     python data_science_project/build_snapshots.py --format parquet "master-5 2.csv"
+#
+# app.py picks the snapshots up automatically through data_loader.load_dataset()
+# and falls back to the CSV whenever a snapshot is missing or out of date.
+
+import argparse
+import os
+import time
+
+from data_loader import DATASET1_PATH, DATASET2_PATH, file_signature, memory_report, read_dataset
+import snapshots
+
+DEFAULT_SOURCES = [DATASET1_PATH, DATASET2_PATH, "master-6.csv"]
+
+
+def build_snapshot(csv_path, fmt="arrow"):
+    """Parse csv_path with its dataset schema and write the snapshot next to it."""
+    signature = file_signature(csv_path)
+    data = read_dataset(csv_path)
+    path = snapshots.snapshot_path(csv_path, fmt)
+    snapshots.write_snapshot(data, path, signature)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert dashboard CSVs into Arrow IPC / Parquet snapshots.")
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES, help="CSV files to convert")
+    parser.add_argument("--format", choices=sorted(snapshots.SNAPSHOT_SUFFIXES), default="arrow",
+                        help="arrow (memory-mapped by the dashboard) or parquet (smaller on disk)")
+    args = parser.parse_args()
+
+    for csv_path in args.sources:
+        start = time.perf_counter()
+        path = build_snapshot(csv_path, args.format)
+        memory = memory_report()[os.path.basename(csv_path)]
+        print(f"{csv_path} -> {path} ({os.path.getsize(path) / 1e6:.1f} MB, {time.perf_counter() - start:.2f}s; "
+              f"in memory {memory['before_mb']:.1f} MB parsed, {memory['after_mb']:.1f} MB compact)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Memoized figures for the dashboard
+#
+# Most visitors land on the same default filters, and users often toggle a
+# control back and forth, yet every rerun rebuilt the same Plotly figures.
+# cached_figure() keys each finished figure on
+#     (dataset version, figure key, normalized filter signature)
+# and keeps its JSON in a process-wide LRU cache that is bounded by the total
+# size of the stored JSON, so repeated views skip the aggregation and Plotly
+# work entirely. Hit/miss/eviction counters are kept for monitoring.
+#
+# cached_aggregate() does the same for the aggregated tables the figures are
+# drawn from. Both caches live at module level, so they are shared by every
+# browser session served by the process: concurrent analysts looking at the
+# same dataset and filters reuse one copy of each result instead of each
+# session computing and holding its own. Cached values are shared, so callers
+# must never modify a returned frame.
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+
+
+# Total size of the figure JSON kept in memory (bytes)
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Total size of the aggregated frames kept in memory (bytes)
+AGGREGATE_CACHE_BYTES = 128 * 1024 * 1024
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by the total size of its values."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, size in bytes)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key (marking it recently used), or None."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        """Store value under key, evicting the least recently used entries to stay within max_bytes."""
+        if size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        with self._lock:
+            if key in self.entries:
+                self.current_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Return the counters as a dict (entries, bytes, hits, misses, evictions, hit_rate)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+figure_cache = LRUCache(FIGURE_CACHE_BYTES)
+aggregate_cache = LRUCache(AGGREGATE_CACHE_BYTES)
+
+
+def filter_signature(categories=None, ranges=None):
+    """Normalize a sidebar selection into a stable string.
+
+    Category selections are sorted (so picking "Male, Female" or "Female, Male"
+    gives the same signature) and range bounds become plain numbers.
+    """
+    signature = {
+        "categories": {column: sorted(map(str, selection)) for column, selection in (categories or {}).items()},
+        "ranges": {column: [float(bound) for bound in bounds] for column, bounds in (ranges or {}).items()},
+    }
+    return json.dumps(signature, sort_keys=True)
+
+
+def cached_figure(dataset_version, figure_key, signature, build, info=None):
+    """Return the figure for (dataset_version, figure_key, signature), calling build() only on a miss.
+
+    If info is a dict it receives cache_hit, bytes (size of the figure JSON)
+    and, on a miss, serialize_ms.
+    """
+    key = (dataset_version, figure_key, signature)
+    spec = figure_cache.get(key)
+    hit = spec is not None
+    if not hit:
+        fig = build()
+        start = time.perf_counter()
+        spec = fig.to_json(validate=False)
+        if info is not None:
+            info["serialize_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        figure_cache.put(key, spec, len(spec))
+    if info is not None:
+        info["cache_hit"] = hit
+        info["bytes"] = len(spec)
+
+    # The JSON was produced by a valid figure, so skip re-validating it
+    return go.Figure(json.loads(spec), _validate=False)
+
+
+def cached_aggregate(dataset_version, name, signature, compute):
+    """Return the aggregate name for (dataset_version, signature), calling compute() only on a miss.
+
+    name identifies the aggregation itself (e.g. ("means", "Gender", "Sleep Quality")),
+    so figures and sessions asking for the same table share one entry.
+    """
+    key = (dataset_version, name, signature)
+    frame = aggregate_cache.get(key)
+    if frame is None:
+        frame = compute()
+        aggregate_cache.put(key, frame, int(frame.memory_usage(deep=True).sum()))
+    return frame
@@ -0,0 +1,415 @@
+# Server-side chart helpers for the dashboard
+#
+# px.histogram serializes every raw row into the figure JSON and lets the
+# browser do the binning, so payload size and browser render time grow with
+# the dataset. histogram_bins() does the binning here with NumPy, picking the
+# same "nice" bins plotly.js would pick, and histogram_figure() draws the
+# result as bars, so the figure looks the same but only carries one number per
+# bin.
+#
+# Scatter plots have the same problem with one marker per row. scatter() keeps
+# px.scatter for small inputs and, above a point budget, either draws a
+# stratified sample (when markers carry colour/size/hover information) or a
+# server-side 2D histogram of counts. Both keep sparse regions, and so the
+# outliers, fully visible.
+#
+# px.box ships every row too, so the browser can compute the quartiles.
+# box_stats() computes them here (quartiles, Tukey whiskers and at most
+# BOX_OUTLIER_BUDGET distinct outlier points per group) and box_figure() draws them as
+# precomputed boxes, so a box plot carries a few numbers per group whatever
+# the size of the data.
+
+import math
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+
+# Most points a scatter plot sends to the browser before it is sampled or aggregated
+SCATTER_POINT_BUDGET = 5000
+
+# Most outlier points a box plot draws per group
+BOX_OUTLIER_BUDGET = 100
+
+
+def _round_up(value, choices, reverse=False):
+    # Port of plotly.js Lib.roundUp (a binary search over a sorted list of "nice" values)
+    low, high = 0, len(choices) - 1
+    step_low, step_high = (0, 1) if reverse else (1, 0)
+    rounded = math.ceil if reverse else math.floor
+    while low < high:
+        mid = rounded((low + high) / 2)
+        if choices[mid] <= value:
+            low = mid + step_low
+        else:
+            high = mid - step_high
+    return choices[low]
+
+
+def _nice_size(rough_size):
+    # Same rounding plotly.js uses for axis ticks: 2, 5 or 10 times a power of ten
+    base = 10 ** math.floor(math.log10(rough_size))
+    return base * _round_up(rough_size / base, [2, 5, 10])
+
+
+def autobin(values, nbins=None, weights=None):
+    """Return (start, size, count) of the bins plotly.js would choose for values.
+
+    Follows plotly.js' autoBin: a rough bin size from nbins (or from the spread
+    of the data when nbins is not given), rounded to a nice size, with the
+    first edge shifted so integer data lands in the middle of its bin.
+    weights gives how many times each value occurs (for pre-aggregated data,
+    see streaming.py); the result is the same as for the repeated values.
+    """
+    values = np.asarray(values, dtype="float64")
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype="float64")
+    finite = np.isfinite(values) & (weights > 0)
+    values, weights = values[finite], weights[finite]
+    if len(values) == 0:
+        return 0.0, 1.0, 0
+    total = weights.sum()
+
+    data_min, data_max = float(values.min()), float(values.max())
+    if data_min == data_max:
+        return data_min - 0.5, 1.0, 1
+
+    if nbins:
+        rough_size = (data_max - data_min) / nbins
+    else:
+        # Fully automatic: scale off the standard deviation, but never below the gap between distinct values
+        distinct = np.unique(values)
+        min_diff = float(np.diff(distinct).min())
+        exponent = 10 ** math.floor(math.log10(min_diff))
+        min_size = exponent * _round_up(min_diff / exponent, [0.9, 1.9, 4.9, 9.9], reverse=True)
+        mean = np.average(values, weights=weights)
+        std = np.sqrt(np.average((values - mean) ** 2, weights=weights))
+        rough_size = max(min_size, 2 * float(std) / total ** 0.4)
+
+    size = _nice_size(rough_size)
+    first_tick = math.ceil((data_min * 1.0001 - data_max * 0.0001) / size) * size
+    start = first_tick - size
+
+    # Integer data: centre each integer in its bin
+    if np.all(values % 1 == 0):
+        if size < 1:
+            start = data_min - 0.5 * size
+        else:
+            start -= 0.5
+            if start + size < data_min:
+                start += size
+    else:
+        # Lots of values right on the edges: shift the bins by half a bin
+        def near_edge(v):
+            return (1 + (v - start) * 100 / size) % 100 < 2
+        edge_count = weights[near_edge(values)].sum()
+        mid_count = weights[near_edge(values + size / 2)].sum()
+        if mid_count < total * 0.1:
+            if edge_count > total * 0.3 or near_edge(data_min) or near_edge(data_max):
+                shift = size / 2
+                start += shift if start + shift < data_min else -shift
+
+    count = 1 + math.floor((data_max - start) / size)
+    return start, size, count
+
+
+def _histfunc_label(histfunc, y):
+    # Axis/column title px.histogram would use, e.g. "count" or "avg of Sleep Quality"
+    return "count" if y is None or histfunc == "count" else f"{histfunc} of {y}"
+
+
+def histogram_bins(data, x, y=None, histfunc="count", nbins=None, color=None):
+    """Bin data like px.histogram and return one row per (color,) bin.
+
+    Numeric x gets plotly's automatic bins (bin_start/bin_end plus the bin
+    centre in column x); any other x is counted per category. The value column
+    is named like px.histogram's y axis ("count", "avg of <y>", "sum of <y>").
+    """
+    value_name = _histfunc_label(histfunc, y)
+    columns = [column for column in (x, y, color) if column is not None]
+    rows = data[columns].dropna(subset=[x] + ([color] if color else []))
+    if y is not None:
+        rows = rows.dropna(subset=[y])
+
+    numeric = pd.api.types.is_numeric_dtype(rows[x]) and not isinstance(rows[x].dtype, pd.CategoricalDtype)
+    if numeric:
+        start, size, count = autobin(rows[x], nbins)
+        positions = np.clip(np.floor((rows[x].to_numpy(dtype="float64") - start) / size), 0, max(count - 1, 0))
+        key = pd.Series(positions.astype(np.int64), index=rows.index, name="bin")
+    else:
+        key = rows[x].rename("bin")
+
+    keys = ([rows[color]] if color else []) + [key]
+    if y is None or histfunc == "count":
+        binned = rows.groupby(keys, observed=True).size()
+    else:
+        binned = rows.groupby(keys, observed=True)[y].agg({"avg": "mean", "sum": "sum", "min": "min", "max": "max"}[histfunc])
+    binned = binned.rename(value_name).reset_index()
+
+    if numeric:
+        binned["bin_start"] = start + binned["bin"] * size
+        binned["bin_end"] = binned["bin_start"] + size
+        binned[x] = binned["bin_start"] + size / 2
+    else:
+        binned[x] = binned["bin"]
+    return binned.drop(columns="bin")
+
+
+def histogram_figure(bins, x, y=None, histfunc="count", color=None, barmode="relative", **kwargs):
+    """Draw the output of histogram_bins() so it looks like the equivalent px.histogram."""
+    value_name = _histfunc_label(histfunc, y)
+    numeric = "bin_start" in bins.columns
+    fig = px.bar(
+        bins,
+        x=x,
+        y=value_name,
+        color=color,
+        barmode=barmode,
+        custom_data=["bin_start", "bin_end"] if numeric else None,
+        **kwargs
+    )
+
+    if numeric and len(bins):
+        size = float((bins["bin_end"] - bins["bin_start"]).iloc[0])
+        if barmode != "group":
+            fig.update_traces(width=size)  # bars span the whole bin, like histogram bars
+        # Show the bin range on hover instead of the bin centre
+        hover = f"{x}=%{{customdata[0]}} - %{{customdata[1]}}<br>{value_name}=%{{y}}<extra></extra>"
+        if color:
+            hover = f"{color}=%{{fullData.name}}<br>" + hover
+        fig.update_traces(hovertemplate=hover)
+
+    fig.update_layout(bargap=0, yaxis_title=value_name)
+    return fig
+
+
+def histogram(data, x, y=None, histfunc="count", nbins=None, color=None, barmode="relative", **kwargs):
+    """Drop-in replacement for px.histogram that bins on the server."""
+    bins = histogram_bins(data, x, y=y, histfunc=histfunc, nbins=nbins, color=color)
+    return histogram_figure(bins, x, y=y, histfunc=histfunc, color=color, barmode=barmode, **kwargs)
+
+
+def _grid_cells(data, x, y, bins):
+    # Cell id of every row on a bins x bins grid over the x/y range
+    cells = np.zeros(len(data), dtype=np.int64)
+    for column in (x, y):
+        values = data[column].to_numpy(dtype="float64")
+        low, high = np.nanmin(values), np.nanmax(values)
+        scaled = (values - low) / (high - low) * bins if high > low else np.zeros(len(values))
+        scaled = np.nan_to_num(scaled, nan=0.0)  # rows missing x or y share the first cell
+        cells = cells * bins + np.clip(scaled.astype(np.int64), 0, bins - 1)
+    return cells
+
+
+def stratified_sample(data, x, y, budget, strata=None, bins=50, seed=0):
+    """Return at most about budget rows of data, sampled per grid cell (and per strata value).
+
+    Every cell keeps up to the same number of rows, chosen so the total fits
+    the budget: sparse cells (outliers) are kept whole and only dense cells are
+    thinned. Sampling is seeded so reruns draw the same points.
+    """
+    if len(data) <= budget:
+        return data
+
+    cells = _grid_cells(data, x, y, bins)
+    if strata is not None:
+        codes, _ = pd.factorize(data[strata])
+        cells = cells * (codes.max() + 2) + codes + 1
+
+    # Shuffle, then rank each row within its cell
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(data))
+    order = order[np.argsort(cells[order], kind="stable")]
+    _, cell_ids, counts = np.unique(cells[order], return_inverse=True, return_counts=True)
+    starts = np.cumsum(counts) - counts
+    ranks = np.arange(len(order)) - starts[cell_ids]
+
+    # Largest per-cell cap that still fits the budget
+    low, high = 1, int(counts.max())
+    while low < high:
+        cap = (low + high + 1) // 2
+        if np.minimum(counts, cap).sum() <= budget:
+            low = cap
+        else:
+            high = cap - 1
+
+    keep = np.sort(order[ranks < low])
+    return data.iloc[keep]
+
+
+def density_figure(data, x, y, bins=60, outliers=500, **kwargs):
+    """2D histogram of x/y counts computed here, with the points of the sparsest cells drawn on top."""
+    rows = data.dropna(subset=[x, y])
+    x_values = rows[x].to_numpy(dtype="float64")
+    y_values = rows[y].to_numpy(dtype="float64")
+    counts, x_edges, y_edges = np.histogram2d(x_values, y_values, bins=bins)
+
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=np.where(counts > 0, counts, np.nan).T,  # empty cells stay transparent
+        colorscale="Blues",
+        colorbar={"title": "count"},
+        hovertemplate=f"{x}=%{{x}}<br>{y}=%{{y}}<br>count=%{{z}}<extra></extra>"
+    ))
+
+    # Points in the least populated cells are the outliers: draw them individually
+    if outliers and len(rows):
+        x_cell = np.clip(np.searchsorted(x_edges, x_values, side="right") - 1, 0, bins - 1)
+        y_cell = np.clip(np.searchsorted(y_edges, y_values, side="right") - 1, 0, bins - 1)
+        cell_counts = counts[x_cell, y_cell]
+        sparse = np.argsort(cell_counts, kind="stable")[:outliers]
+        sparse = sparse[cell_counts[sparse] <= np.percentile(counts[counts > 0], 10)]
+        fig.add_trace(go.Scatter(
+            x=x_values[sparse],
+            y=y_values[sparse],
+            mode="markers",
+            marker={"size": 4, "color": "#d62728"},
+            name="sparse points"
+        ))
+
+    fig.update_layout(xaxis_title=kwargs.get("labels", {}).get(x, x), yaxis_title=kwargs.get("labels", {}).get(y, y))
+    return fig
+
+
+def scatter(data, x, y, point_budget=SCATTER_POINT_BUDGET, mode="auto", **kwargs):
+    """px.scatter that keeps the payload within point_budget markers.
+
+    mode "sample" draws a stratified sample (keeping colour groups and sparse
+    regions), "density" draws a 2D histogram of counts, and "auto" samples when
+    the markers encode colour, size or hover data and aggregates otherwise.
+    """
+    if len(data) <= point_budget:
+        return px.scatter(data, x=x, y=y, **kwargs)
+
+    if mode == "auto":
+        mode = "sample" if any(kwargs.get(name) is not None for name in ("color", "size", "hover_data")) else "density"
+
+    if mode == "density":
+        return density_figure(data, x, y, **kwargs)
+
+    color = kwargs.get("color")
+    strata = color if color is not None and not pd.api.types.is_float_dtype(data[color]) else None
+    sample = stratified_sample(data, x, y, point_budget, strata=strata)
+    fig = px.scatter(sample, x=x, y=y, **kwargs)
+    fig.update_layout(title_text=f"Showing {len(sample):,} of {len(data):,} points (sampled)", title_font_size=12)
+    return fig
+
+
+def cap_outliers(lows, highs, budget=BOX_OUTLIER_BUDGET):
+    """At most budget of the distinct outliers below (lows) and above (highs) the whiskers, the most extreme first.
+
+    Each side gets half the budget and the other side's unused share. Only the
+    budget most extreme values of a side can be drawn, so that is all a
+    streaming summary has to keep (streaming.BoxStats). Repeated values would
+    be drawn on top of each other, so each is kept once.
+    """
+    lows, highs = np.unique(lows), np.unique(highs)
+    n_high = min(len(highs), max(budget // 2, budget - len(lows)))
+    n_low = min(len(lows), budget - n_high)
+    return np.concatenate([lows[:n_low], highs[len(highs) - n_high:]])
+
+
+def box_stats(data, x, y, max_outliers=BOX_OUTLIER_BUDGET):
+    """Box-plot statistics of y per x group, one row per group in groupby order.
+
+    Columns: x, count, min, q1, median, q3, max (quartiles interpolated
+    linearly, like pandas), lower_whisker/upper_whisker (the most extreme
+    values within 1.5 IQR of the box) and outliers (the values beyond the
+    whiskers, at most max_outliers distinct ones, see cap_outliers).
+    """
+    rows = data[[x, y]].dropna()
+    if rows.empty:
+        return pd.DataFrame(columns=[x, "count", "min", "q1", "median", "q3", "max",
+                                     "lower_whisker", "upper_whisker", "outliers"])
+    codes, groups = pd.factorize(rows[x], sort=True)
+    values = rows[y].to_numpy(dtype="float64")
+
+    # Sort by group, then value: every group is a sorted segment of values
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+    counts = np.bincount(codes, minlength=len(groups))
+    starts = np.cumsum(counts) - counts
+
+    def quantile(q):
+        position = (counts - 1) * q
+        below = np.floor(position).astype(np.int64)
+        low = values[starts + below]
+        high = values[starts + np.minimum(below + 1, counts - 1)]
+        return low + (position - below) * (high - low)
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    # Values below/above the fences are a prefix/suffix of their group's segment
+    n_low = np.bincount(codes[values < (q1 - 1.5 * iqr)[codes]], minlength=len(groups))
+    n_high = np.bincount(codes[values > (q3 + 1.5 * iqr)[codes]], minlength=len(groups))
+    ends = starts + counts
+
+    outliers = [
+        cap_outliers(values[start:start + low], values[end - high:end], max_outliers).tolist()
+        for start, end, low, high in zip(starts, ends, n_low, n_high)
+    ]
+    return pd.DataFrame({
+        x: list(groups),
+        "count": counts,
+        "min": values[starts],
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "max": values[ends - 1],
+        "lower_whisker": values[starts + n_low],
+        "upper_whisker": values[ends - 1 - n_high],
+        "outliers": outliers,
+    })
+
+
+def box_figure(stats, x, y, color=None, color_discrete_map=None, labels=None):
+    """Draw the output of box_stats() (or streaming.BoxStats) like px.box(data, x=x, y=y, color=color).
+
+    color may only be x itself (one coloured box per group), as in the dashboard's box plots.
+    """
+    labels = labels or {}
+    palette = px.colors.qualitative.Plotly
+    fig = go.Figure()
+    for i, group in enumerate(stats.to_dict(orient="records")):
+        name = str(group[x])
+        marker_color = (color_discrete_map or {}).get(group[x], palette[i % len(palette)]) if color else palette[0]
+        fig.add_trace(go.Box(
+            x=[name],
+            q1=[group["q1"]],
+            median=[group["median"]],
+            q3=[group["q3"]],
+            lowerfence=[group["lower_whisker"]],
+            upperfence=[group["upper_whisker"]],
+            name=name,
+            legendgroup=name,
+            showlegend=color is not None,
+            marker_color=marker_color,
+            boxpoints=False
+        ))
+        if group.get("outliers"):
+            fig.add_trace(go.Scatter(
+                x=[name] * len(group["outliers"]),
+                y=group["outliers"],
+                mode="markers",
+                marker_color=marker_color,
+                name=name,
+                legendgroup=name,
+                showlegend=False,
+                hovertemplate=f"{labels.get(y, y)}=%{{y}}<extra>{name}</extra>"
+            ))
+
+    fig.update_layout(
+        boxmode="overlay",
+        xaxis_title=labels.get(x, x),
+        yaxis_title=labels.get(y, y),
+        legend_title_text=labels.get(color, color) if color else None
+    )
+    return fig
+
+
+def box(data, x, y, color=None, color_discrete_map=None, labels=None, max_outliers=BOX_OUTLIER_BUDGET):
+    """Drop-in replacement for px.box that computes the box statistics on the server."""
+    stats = box_stats(data, x, y, max_outliers)
+    return box_figure(stats, x, y, color=color, color_discrete_map=color_discrete_map, labels=labels)
@@ -0,0 +1,292 @@
+# Dataset loading layer for the dashboard
+#
+# Streamlit reruns app.py from top to bottom on every widget interaction, so
+# reading the CSV inline meant parsing the whole file again for every slider
+# move. load_dataset() parses each file once with explicit dtypes and keeps
+# the parsed frame in a process-wide cache keyed on the file path. The cache
+# entry remembers the file's mtime and size, so editing or replacing the CSV
+# invalidates it automatically on the next rerun.
+#
+# When an up-to-date columnar snapshot of the CSV exists (see snapshots.py and
+# build_snapshots.py) it is memory-mapped instead of parsing the CSV, and only
+# the columns the caller asks for are materialized.
+#
+# Parsed frames are stored compactly (compact_dtypes): integer columns are
+# downcast to the smallest integer type that holds them (int8 for every score),
+# float columns to float32 when that loses nothing, label columns become
+# Categoricals (ordered where the labels have a natural order, see
+# CATEGORY_ORDERS). That cuts the frames' memory several times over, and
+# groupby/isin on the codes is faster than on Python strings. The size before
+# and after is kept per file (memory_report()).
+#
+# The cached frame is shared between reruns (and browser sessions), so callers
+# must treat it as read-only: filter it or copy it, never assign into it.
+
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import snapshots
+
+
+DATASET1_PATH = "master-5 2.csv"
+DATASET2_PATH = "mobile_addiction.csv"
+
+# Explicit dtypes for every column, so pandas does not have to infer them
+# (and so a stray value cannot silently turn a numeric column into object)
+DATASET1_DTYPES = {
+    "Age": "int64",
+    "Gender": "object",
+    "Daily Social Media Usage(hours)": "float64",
+    "Number of Social Media Platforms": "int64",
+    "Frequency of Posts": "object",
+    "Frequency of Checking Notifications": "object",
+    "Self Reported Addiction Score": "float64",
+    "Cyberbullying Experience": "int64",
+    "Self Esteem Score": "float64",
+    "Sleep Quality": "float64",
+    "Anxiety Score": "float64",
+    "Social Media Fatigue Score": "int64",
+    "Mental Health Status": "object",
+}
+
+DATASET2_DTYPES = {
+    "daily_screen_time": "int64",
+    "app_sessions": "int64",
+    "social_media_usage": "int64",
+    "gaming_time": "int64",
+    "notifications": "int64",
+    "night_usage": "int64",
+    "age": "int64",
+    "work_study_hours": "int64",
+    "stress_level": "int64",
+    "apps_installed": "int64",
+    "addicted": "object",
+}
+
+# Natural order of the label columns, used for their ordered Categoricals and by the figures' category_orders
+MENTAL_HEALTH_ORDER = ["Poor", "Fair", "Good", "Excellent"]
+POST_FREQUENCY_ORDER = ["Never", "Rarely", "Sometimes", "Often", "Always"]
+NOTIFICATION_FREQUENCY_ORDER = ["Rarely", "Occasionally", "Frequently"]
+
+CATEGORY_ORDERS = {
+    DATASET1_PATH: {
+        "Frequency of Posts": POST_FREQUENCY_ORDER,
+        "Frequency of Checking Notifications": NOTIFICATION_FREQUENCY_ORDER,
+        "Cyberbullying Experience": ["No", "Yes"],
+        "Mental Health Status": MENTAL_HEALTH_ORDER,
+    },
+    DATASET2_PATH: {
+        "addicted": ["not addicted", "addicted"],
+    },
+}
+
+# Per-file read options. Dataset 1 starts with a UTF-8 byte order mark and
+# Dataset 2 has an unnamed row index as its first column.
+# "labels" maps coded values to the labels shown in the dashboard, so the app
+# never has to modify the shared frame itself.
+DATASET_SCHEMAS = {
+    DATASET1_PATH: {
+        "dtype": DATASET1_DTYPES,
+        "read_csv": {"encoding": "utf-8-sig"},
+        "labels": {"Cyberbullying Experience": {0: "No", 1: "Yes"}},
+    },
+    DATASET2_PATH: {
+        "dtype": DATASET2_DTYPES,
+        "read_csv": {"index_col": 0},
+        "labels": {},
+    },
+}
+
+
+logger = logging.getLogger(__name__)
+
+_cache = {}  # (absolute path, columns) -> (source signature, frame)
+_cache_lock = threading.Lock()
+_path_locks = {}  # cache key -> lock, so two sessions don't parse the same file twice
+_memory_reports = {}  # file name -> {"before_mb": ..., "after_mb": ...} of its last parse
+
+
+def file_signature(path):
+    """Return (mtime in ns, size in bytes) for path; changes whenever the file does."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def source_signature(path):
+    """file_signature of the CSV at path, or of the CSV its snapshot was built from when only the snapshot is deployed."""
+    if os.path.exists(path):
+        return file_signature(path)
+    snapshot = find_snapshot(path)
+    if snapshot is None:
+        raise FileNotFoundError(f"{path} has neither a CSV nor a snapshot")
+    stored = snapshots.snapshot_source_signature(snapshot)
+    # A snapshot written without the metadata still changes whenever it is rebuilt
+    return snapshots.parse_signature(stored) if stored is not None else file_signature(snapshot)
+
+
+def dataset_version(path):
+    """Short string identifying the current contents of path (used as a cache key).
+
+    Works from the snapshot alone when the CSV is not deployed (see source_signature).
+    """
+    mtime_ns, size = source_signature(path)
+    return f"{os.path.basename(path)}:{mtime_ns}:{size}"
+
+
+def get_schema(path):
+    """Return the schema entry for a dataset file, or an empty schema for unknown files."""
+    return DATASET_SCHEMAS.get(os.path.basename(path), {"dtype": None, "read_csv": {}, "labels": {}})
+
+
+def _smallest_int(values):
+    # Smallest signed integer type holding every value
+    if len(values) == 0:
+        return np.int8
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+def compact_dtypes(data, orders=None):
+    """Return data with the smallest lossless dtype for every column.
+
+    Integers are downcast to int8/int16/int32, floats to float32 when every
+    value survives the round trip, and string columns become Categoricals:
+    ordered by orders[column] when given, otherwise with sorted categories
+    (so groupby keeps its alphabetical order).
+    """
+    orders = orders or {}
+    columns = {}
+    for column in data.columns:
+        series = data[column]
+        if column in orders and not isinstance(series.dtype, pd.CategoricalDtype):
+            extra = sorted(set(series.dropna().unique()) - set(orders[column]))
+            series = series.astype(pd.CategoricalDtype(list(orders[column]) + extra, ordered=True))
+        elif series.dtype == object:
+            series = series.astype(pd.CategoricalDtype(sorted(series.dropna().unique())))
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            series = series.astype(_smallest_int(series.to_numpy()))
+        elif series.dtype == np.float64:
+            values = series.to_numpy()
+            compact = values.astype(np.float32)
+            if np.array_equal(compact.astype(np.float64), values, equal_nan=True):
+                series = pd.Series(compact, index=series.index, name=column)
+        columns[column] = series
+    return pd.DataFrame(columns, index=data.index)
+
+
+def memory_report():
+    """{file name: {"before_mb", "after_mb"}} for every dataset parsed by read_dataset in this process."""
+    return dict(_memory_reports)
+
+
+def read_dataset(path):
+    """Parse a dataset CSV with its explicit dtypes and store it compactly (no caching)."""
+    schema = get_schema(path)
+    data = pd.read_csv(path, dtype=schema["dtype"], **schema["read_csv"])
+
+    # Replace coded values with the labels the dashboard displays
+    for column, labels in schema["labels"].items():
+        data[column] = data[column].map(labels)
+
+    before = data.memory_usage(deep=True).sum()
+    data = compact_dtypes(data, CATEGORY_ORDERS.get(os.path.basename(path)))
+    after = data.memory_usage(deep=True).sum()
+    _memory_reports[os.path.basename(path)] = {"before_mb": round(before / 1e6, 3), "after_mb": round(after / 1e6, 3)}
+    logger.info("%s: %.1f MB parsed, %.1f MB compact (%.1fx)", path, before / 1e6, after / 1e6, before / max(after, 1))
+    return data
+
+
+def find_snapshot(path):
+    """Return the path of an up-to-date Arrow/Parquet snapshot of the CSV at path, or None."""
+    for fmt in snapshots.SNAPSHOT_SUFFIXES:
+        candidate = snapshots.snapshot_path(path, fmt)
+        if not os.path.exists(candidate):
+            continue
+        # Without the CSV (e.g. a deployment that only ships snapshots) any snapshot will do
+        if not os.path.exists(path):
+            return candidate
+        if snapshots.snapshot_source_signature(candidate) == snapshots.format_signature(file_signature(path)):
+            return candidate
+    return None
+
+
+def _lock_for(key):
+    with _cache_lock:
+        if key not in _path_locks:
+            _path_locks[key] = threading.Lock()
+        return _path_locks[key]
+
+
+def _source_signature(path, snapshot):
+    # Either file changing (CSV edited, snapshot rebuilt) invalidates the cached frame
+    csv_signature = file_signature(path) if os.path.exists(path) else None
+    snapshot_signature = file_signature(snapshot) if snapshot is not None else None
+    return csv_signature, snapshot, snapshot_signature
+
+
+def load_dataset(path, columns=None):
+    """Return the frame for path, re-reading it only when the file has changed.
+
+    columns limits the frame to the columns a view needs; with a snapshot the
+    other columns are never read at all.
+    """
+    path = os.path.abspath(path)
+    columns = tuple(columns) if columns is not None else None
+    key = (path, columns)
+
+    with _lock_for(key):
+        snapshot = find_snapshot(path)
+        signature = _source_signature(path, snapshot)
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        if snapshot is not None:
+            data = snapshots.read_snapshot(snapshot, list(columns) if columns is not None else None)
+        elif columns is not None:
+            # No snapshot: parse (or reuse) the full CSV once and keep the pruned frame too
+            data = load_dataset(path)[list(columns)]
+        else:
+            data = read_dataset(path)
+
+        _cache[key] = (signature, data)
+        return data
+
+
+def iter_dataset_chunks(path, columns=None, chunk_rows=1_000_000):
+    """Yield the dataset at path as frames of at most chunk_rows rows, without ever holding all of it.
+
+    Reads record batches from an up-to-date snapshot when there is one and
+    otherwise parses the CSV in chunks (with its dtypes and labels). Used by
+    the out-of-core aggregation in streaming.py.
+    """
+    snapshot = find_snapshot(path)
+    if snapshot is not None:
+        yield from snapshots.iter_snapshot_batches(snapshot, list(columns) if columns is not None else None, chunk_rows)
+        return
+
+    schema = get_schema(path)
+    orders = CATEGORY_ORDERS.get(os.path.basename(path))
+    reader = pd.read_csv(path, dtype=schema["dtype"], chunksize=chunk_rows, **schema["read_csv"])
+    with reader:
+        for chunk in reader:
+            for column, labels in schema["labels"].items():
+                chunk[column] = chunk[column].map(labels)
+            chunk = chunk[list(columns)] if columns is not None else chunk
+            # The same dtypes as read_dataset. Unknown labels of an ordered column are kept after the
+            # known ones, so chunks may list different extra categories (streaming.py merges them).
+            yield compact_dtypes(chunk, orders)
+
+
+def clear_cache():
+    """Drop every cached frame (mostly useful in notebooks and benchmarks)."""
+    with _cache_lock:
+        _cache.clear()
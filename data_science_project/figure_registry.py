@@ -0,0 +1,725 @@
+# Declarative figure registry for the dashboard
+#
+# Every figure used to be written out inline in app.py: aggregate, call px.*,
+# update_layout(height=600), st.plotly_chart, one after the other. Here each
+# figure is declared as data instead (a FigureSpec): where its table comes
+# from, how that table is reshaped, which chart draws it with which options,
+# and the title/caption shown around it. app.py only picks the list of specs
+# for the current view and renders the finished figures in order.
+#
+# Because a spec says what it needs up front, build_figures() can
+#   - compute each input table at most once per rerun, even when several
+#     figures use it (Tables), and plan the grouped tables: every means/sizes/
+#     counts source over the same keys is answered from one fused table with
+#     the group sizes and all the requested means, built in a single grouping
+#     pass (e.g. avg sleep and avg fatigue per addiction score, or the gender
+#     pie's counts and avg usage per gender)
+#   - build the figures that are not already cached concurrently on a shared
+#     thread pool; the heavy parts of pandas/NumPy release the GIL, so a rerun
+#     costs closer to its slowest figure than to the sum of all of them
+#
+# Table sources:
+#   ROWS                        the rows of the current view (filtered in the interactive dashboards),
+#                               limited to the columns the specs name (row_columns)
+#   stored(name)                a precomputed table from the aggregate store
+#   means(keys, *values)        group means of the view's rows
+#   sizes(keys, name)           group sizes of the view's rows
+#   counts(column, name)        value counts of the view's rows
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.express as px
+
+from caching import cached_figure
+from charts import box, box_figure, histogram, histogram_figure, scatter
+from data_loader import MENTAL_HEALTH_ORDER, NOTIFICATION_FREQUENCY_ORDER, POST_FREQUENCY_ORDER
+
+
+# Threads building figures, shared by every session served by the process
+FIGURE_WORKERS = min(8, os.cpu_count() or 1)
+
+# Applied to every figure before its own layout options
+DEFAULT_LAYOUT = {"height": 600}
+
+# Chart kinds a spec can use; each is called as chart(table, **options)
+CHARTS = {
+    "bar": px.bar,
+    "box": box,  # raw rows, box statistics computed on the server
+    "box_stats": box_figure,  # statistics from charts.box_stats / the aggregate store
+    "line": px.line,
+    "pie": px.pie,
+    "scatter": px.scatter,
+    "histogram": histogram,  # raw rows, binned on the server
+    "binned": histogram_figure,  # bins from charts.histogram_bins / the aggregate store
+    "sampled_scatter": scatter,  # scatter kept within the point budget
+}
+
+ROWS = ("rows",)
+
+
+def stored(name):
+    """Source: the precomputed table name from the aggregate store."""
+    return ("stored", name)
+
+
+def means(keys, *values):
+    """Source: mean of values per keys."""
+    return ("means", keys, values)
+
+
+def sizes(keys, name="Count"):
+    """Source: number of rows per keys, in a column called name."""
+    return ("sizes", keys, name)
+
+
+def counts(column, name="count"):
+    """Source: value counts of column, largest first."""
+    return ("value_counts", column, name)
+
+
+class FigureSpec:
+    """One dashboard figure: its input table, chart and the text shown around it."""
+
+    def __init__(self, key, title, source, chart, options=None, caption=None,
+                 layout=None, traces=None, transform=None):
+        self.key = key  # figure cache key and Streamlit element key
+        self.title = title  # markdown heading shown above the chart
+        self.source = source  # one of the table sources above
+        self.chart = chart  # name in CHARTS
+        self.options = options or {}  # keyword arguments for the chart function
+        self.caption = caption  # st.info text shown below the chart (optional)
+        self.layout = layout or {}  # fig.update_layout(...) on top of DEFAULT_LAYOUT
+        self.traces = traces  # fig.update_traces(...) (optional)
+        self.transform = transform  # reshapes the input table before drawing (optional)
+
+    def build(self, tables, info=None):
+        """Build the Plotly figure from the tables of the current rerun.
+
+        If info is a dict it receives table_ms/chart_ms (time spent on the
+        input table and on the Plotly figure) and rows_in/rows_out.
+        """
+        start = time.perf_counter()
+        table = tables.get(self.source)
+        if self.transform is not None:
+            table = self.transform(table)
+        built = time.perf_counter()
+
+        fig = CHARTS[self.chart](table, **self.options)
+        if self.traces:
+            fig.update_traces(**self.traces)
+        fig.update_layout(**{**DEFAULT_LAYOUT, **self.layout})
+
+        if info is not None:
+            info["table_ms"] = round((built - start) * 1000, 3)
+            info["chart_ms"] = round((time.perf_counter() - built) * 1000, 3)
+            info["rows_in"] = tables.n_rows
+            info["rows_out"] = len(table)
+        return fig
+
+
+def _key_list(keys):
+    return [keys] if isinstance(keys, str) else list(keys)
+
+
+def _option_names(value):
+    # Every string in a chart option, including list items and dict keys and values (labels, category_orders)
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return _option_names(list(value)) + _option_names(list(value.values()))
+    if isinstance(value, (list, tuple)):
+        return [name for item in value for name in _option_names(item)]
+    return []
+
+
+def row_columns(specs, columns):
+    """The columns (out of columns) that the ROWS specs among specs draw.
+
+    A column counts when a chart option names it, so a spec's transform may only
+    read columns its options use too (e.g. the scatter's size column).
+    """
+    named = {name for spec in specs if spec.source == ROWS for name in _option_names(list(spec.options.values()))}
+    return [column for column in columns if column in named]
+
+
+# Column holding the group sizes in a fused group table
+GROUP_ROWS = "__rows__"
+
+
+def _group_request(source):
+    # (keys, values) of a grouped source, or None for the other sources
+    kind = source[0]
+    if kind == "means":
+        _, keys, values = source
+        return tuple(_key_list(keys)), values
+    if kind == "sizes":
+        return tuple(_key_list(source[1])), ()
+    if kind == "value_counts":
+        return (source[1],), ()
+    return None
+
+
+class Tables:
+    """The input tables of one rerun, each computed at most once even when figures are built concurrently.
+
+    rows are the view's rows, or a function returning them that is only called
+    when a figure reads ROWS (n_rows then gives their count up front), store
+    the precomputed aggregates, and group(keys, values, how, **options)
+    computes grouped tables over the view's rows (app.group_table).
+    """
+
+    def __init__(self, rows=None, store=None, group=None, n_rows=None):
+        self._rows = rows
+        self.n_rows = len(rows) if n_rows is None and rows is not None and not callable(rows) else n_rows
+        self.store = store or {}
+        self.group = group
+        self.group_columns = {}  # keys -> every value column averaged over those keys
+        self._results = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def plan(self, specs):
+        """Collect the grouped tables the specs ask for, so each set of keys is grouped in one pass."""
+        for spec in specs:
+            request = _group_request(spec.source)
+            if request is not None:
+                keys, values = request
+                merged = self.group_columns.setdefault(keys, [])
+                merged.extend(value for value in values if value not in merged)
+
+    def _shared(self, name, compute):
+        # Compute name once; other threads asking for it wait for the first one
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._results:
+                self._results[name] = compute()
+            return self._results[name]
+
+    def _summary(self, keys, values):
+        # The fused table for keys: group sizes (GROUP_ROWS) and the means of every planned value
+        merged = self.group_columns.get(keys) or list(values)
+        return self._shared(
+            ("summary", keys, tuple(merged)),
+            lambda: self.group(list(keys), merged, "summary", name=GROUP_ROWS)
+        )
+
+    @property
+    def rows(self):
+        if callable(self._rows):
+            return self._shared("rows", self._rows)
+        return self._rows
+
+    def _means(self, keys, values):
+        keys = tuple(_key_list(keys))
+        return self._summary(keys, values)[list(keys) + list(values)]
+
+    def _sizes(self, keys, name):
+        keys = tuple(_key_list(keys))
+        table = self._summary(keys, ())[list(keys) + [GROUP_ROWS]]
+        return table.rename(columns={GROUP_ROWS: name})
+
+    def get(self, source):
+        """Return the table for a source (see the module comment)."""
+        kind = source[0]
+        if kind == "rows":
+            return self.rows
+        if kind == "stored":
+            return self.store[source[1]]
+        if kind == "means":
+            return self._means(*source[1:])
+        if kind == "sizes":
+            _, keys, name = source
+            return self._sizes(keys, name)
+        if kind == "value_counts":
+            _, column, name = source
+            return self._sizes(column, name).sort_values(name, ascending=False, kind="stable").reset_index(drop=True)
+        raise ValueError(f"Unknown table source: {source!r}")
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FIGURE_WORKERS, thread_name_prefix="figures")
+        return _executor
+
+
+def build_figures(specs, dataset_version, signature, tables, recorder=None):
+    """Return the figures for specs (in order), building cache misses concurrently.
+
+    recorder (see instrumentation.py) receives the measurements of every figure.
+    """
+    tables.plan(specs)
+
+    def build(spec):
+        if recorder is None or not recorder.enabled:
+            return cached_figure(dataset_version, spec.key, signature, lambda: spec.build(tables))
+
+        info = {}
+        start = time.perf_counter()
+        fig = cached_figure(dataset_version, spec.key, signature, lambda: spec.build(tables, info), info)
+        recorder.figure(spec.key, total_ms=round((time.perf_counter() - start) * 1000, 3), **info)
+        return fig
+
+    if FIGURE_WORKERS <= 1 or len(specs) <= 1:
+        return [build(spec) for spec in specs]
+    futures = [_get_executor().submit(build, spec) for spec in specs]
+    return [future.result() for future in futures]
+
+
+# Colours shared by the Dataset 2 figures
+ADDICTED_COLORS = {"Yes": "#1f77b4", "No": "#AED6F1"}
+
+
+DATASET1_STATIC = [
+    FigureSpec(
+        "staticd1f0",
+        "### 📈 Addiction Score Distribution",
+        stored("hist_addiction_score"),
+        "binned",
+        options=dict(x="Self Reported Addiction Score"),
+        caption="💡 Most participants think they are addicted to their smartphones."
+    ),
+    FigureSpec(
+        "staticd1f1",
+        "### 📈 Avg Addiction Score vs Age ",
+        stored("hist_avg_addiction_by_age"),
+        "binned",
+        options=dict(x="Age", y="Self Reported Addiction Score", histfunc="avg"),
+        caption="💡 Most ages have high average addiction scores circling around 8.3 to 8.6."
+    ),
+    FigureSpec(
+        "staticd1f2",
+        "### 📈 Addiction Score vs Avg Sleep Quality ",
+        stored("avg_sleep_by_addiction"),
+        "scatter",
+        options=dict(x="Self Reported Addiction Score", y="Sleep Quality"),
+        caption="💡 Average Sleep quality decreased as addiction score increase, then stabilizes"
+    ),
+    FigureSpec(
+        "staticd1f3",
+        "### 📈 Addiction Score vs Avg Anxiety Score ",
+        stored("avg_anxiety_by_addiction"),
+        "line",
+        options=dict(x="Self Reported Addiction Score", y="Anxiety Score"),
+        caption="💡 As the addiction score rises, the anxiety score rises. Positive correlation"
+    ),
+    FigureSpec(
+        "staticd1f4",
+        "### 📈 Addiction Score vs Avg Self-Esteem Score ",
+        stored("avg_self_esteem_by_addiction"),
+        "line",
+        options=dict(x="Self Reported Addiction Score", y="Self Esteem Score"),
+        caption="💡 As the addiction score increases, the anxiety score decreases. Negative correlation"
+    ),
+    FigureSpec(
+        "staticd1f5",
+        "### 📈Avg Addiction Score vs  Mental Health Status ",
+        stored("avg_addiction_by_mental_health"),
+        "bar",
+        options=dict(x="Mental Health Status", y="Self Reported Addiction Score", category_orders=MENTAL_HEALTH_ORDER),
+        caption="💡 People will high addiction scores tend to have poor mental health status. "
+    ),
+    FigureSpec(
+        "staticd1f6",
+        "### 📈 Daily Usage vs Avg Addiction Score ",
+        stored("avg_addiction_by_usage"),
+        "line",
+        options=dict(x="Daily Social Media Usage(hours)", y="Self Reported Addiction Score"),
+        caption="💡 The higher the daily usage, the more prone a participant becomes to smartphone addiction. "
+    ),
+    FigureSpec(
+        "staticd1f7",
+        "### 📈 Platforms vs Daily Usage",
+        stored("hist_avg_usage_by_platforms"),
+        "binned",
+        options=dict(x="Number of Social Media Platforms", y="Daily Social Media Usage(hours)", histfunc="avg"),
+        traces=dict(marker_line_color="black", marker_line_width=1),  # adds a black border to the bars
+        caption="💡 Regardless of the number of social media platforms, the average daily usage remains around 5 hours."
+    ),
+    FigureSpec(
+        "staticd1f8",
+        "### 📈 Frequency of Posts vs Daily Usage",
+        stored("avg_usage_by_posts"),
+        "bar",
+        options=dict(
+            x="Frequency of Posts",
+            y="Daily Social Media Usage(hours)",
+            category_orders={"Frequency of Posts": POST_FREQUENCY_ORDER}
+        ),
+        caption="💡 Frequency of posts doesn't have a significant affect on daily usage. "
+    ),
+    FigureSpec(
+        "staticd1f9",
+        "### 📈 Notification Frequency vs Daily Usage",
+        stored("avg_usage_by_notifications"),
+        "bar",
+        options=dict(
+            x="Frequency of Checking Notifications",
+            y="Daily Social Media Usage(hours)",
+            category_orders={"Frequency of Checking Notifications": NOTIFICATION_FREQUENCY_ORDER}
+        ),
+        caption="💡 Frequency of checking notifications also doesn't have a huge affect on daily usage. "
+    ),
+]
+
+
+DATASET1_SECTIONS = {
+    "👥 Demographics & Posting": [
+        FigureSpec(
+            "gender_dist_pie",
+            "### 👥 Gender Distribution",
+            counts("Gender", name="Count"),
+            "pie",
+            options=dict(names="Gender", values="Count"),
+            caption="💡 The dataset includes a fairly balanced number of male and female participants, with a small number identifying as 'Others'."
+        ),
+        FigureSpec(
+            "post_freq_box",
+            "### 🗨️ Frequency of Posts by Gender",
+            ROWS,
+            "histogram",
+            options=dict(
+                x="Frequency of Posts",
+                color="Gender",
+                barmode="group",
+                category_orders={"Frequency of Posts": POST_FREQUENCY_ORDER}
+            ),
+            layout=dict(yaxis_title="Frequency of Posts", xaxis_title="Gender"),
+            caption="💡 Most people only post occasionally, with a few posting frequently. "
+        ),
+        FigureSpec(
+            "notif_freq_by_gender",
+            "### 🔔 Frequency of Checking Notifications by Gender",
+            sizes(["Gender", "Frequency of Checking Notifications"], name="Count"),
+            "bar",
+            options=dict(x="Frequency of Checking Notifications", y="Count", color="Gender", barmode="group"),
+            layout=dict(yaxis_title="Number of Participants", xaxis_title="Notification Checking Frequency")
+        ),
+        FigureSpec(
+            "avg_daily_usage_bar",
+            "### 📈 Average daily usage",
+            means("Gender", "Daily Social Media Usage(hours)"),
+            "bar",
+            options=dict(x="Gender", y="Daily Social Media Usage(hours)", color="Gender"),
+            traces=dict(width=0.4),
+            layout=dict(yaxis_title="Average Daily Usage (hours)", xaxis_title="Gender"),
+            caption="💡 Daily social media usage is fairly consistent across genders, with no significant differences observed."
+        ),
+    ],
+    "🧠 Mental Health": [
+        FigureSpec(
+            "self_esteem_hist",
+            "### 📈 Self Esteem Score Distribution",
+            ROWS,
+            "histogram",
+            options=dict(x="Self Esteem Score", color="Gender", nbins=10, barmode="group"),
+            layout=dict(xaxis_title="Self Esteem Score", yaxis_title="Number of Participants"),
+            caption="💡 Lots of men and woman suffer from low self-esteem."
+        ),
+        FigureSpec(
+            "anxiety_box_gender",
+            "### 📦 Anxiety Score by Gender",
+            ROWS,
+            "box",
+            options=dict(x="Gender", y="Anxiety Score", color="Gender"),
+            layout=dict(xaxis_title="Gender", yaxis_title="Anxiety Score"),
+            caption="💡 The median anxiety score across genders is around 5, with some variation in spread and outliers."
+        ),
+        FigureSpec(
+            "mental_health_bar",
+            "### Mental Health Status Count",
+            counts("Mental Health Status", name="Count"),
+            "bar",
+            options=dict(
+                x="Mental Health Status",
+                y="Count",
+                category_orders={"Mental Health Status": MENTAL_HEALTH_ORDER},
+                text_auto=True
+            ),
+            layout=dict(yaxis_title="Number of Participants", xaxis_title="Mental Health Status"),
+            caption="💡 Most participants report poor mental health status, with fewer reporting excellent mental health."
+        ),
+        FigureSpec(
+            "cyberbullying_impact_bar",
+            "### 🔁 Impact of Cyberbullying on Self Esteem and Anxiety",
+            means("Cyberbullying Experience", "Self Esteem Score", "Anxiety Score"),
+            "bar",
+            # One row per (experience, metric), so both averages are drawn side by side
+            transform=lambda grouped: grouped.melt(id_vars="Cyberbullying Experience", var_name="Metric", value_name="Average"),
+            options=dict(x="Cyberbullying Experience", y="Average", color="Metric", barmode="group", text_auto=".2f"),
+            layout=dict(xaxis_title="Cyberbullying Experience", yaxis_title="Average Self-Esteem and Anxiety Score"),
+            caption="💡 Cyberbullying appears to have little impact on self-esteem and anxiety scores. "
+                    "This may be due to a small number of 'Yes' responses, limiting the ability to detect clear differences."
+        ),
+        FigureSpec(
+            "age_selfesteem_anxiety_line",
+            "### 🔁 Age vs Average Self Esteem and Anxiety",
+            means("Age", "Self Esteem Score", "Anxiety Score"),
+            "line",
+            options=dict(x="Age", y=["Self Esteem Score", "Anxiety Score"]),
+            layout=dict(xaxis_title="Age", yaxis_title="Average Self-Esteem and Anxiety Score"),
+            caption="💡 Anxiety peaks around age 30, while self-esteem is at its lowest point. This suggests that early adulthood may be a more mentally stressful period."
+        ),
+        FigureSpec(
+            "sleep_by_Mental_Health Status",
+            "### 🧠 Average Sleep Quality by Mental Health Status",
+            means("Mental Health Status", "Sleep Quality"),
+            "bar",
+            options=dict(
+                x="Mental Health Status",
+                y="Sleep Quality",
+                text_auto=".2f",
+                category_orders={"Mental Health Status": MENTAL_HEALTH_ORDER},
+                color="Mental Health Status"
+            ),
+            layout=dict(xaxis_title="Mental Health Status", yaxis_title="Average Sleep Quality"),
+            caption="💡 Improved mental health is associated with better sleep quality. "
+        ),
+    ],
+    "📱 Usage & Addiction": [
+        FigureSpec(
+            "usage_vs_addiction",
+            "### 🔁 Daily Usage vs. Addiction Score",
+            ROWS,
+            "sampled_scatter",  # above the point budget: a stratified sample that keeps every gender and sparse region
+            transform=lambda rows: rows.dropna(subset=["Anxiety Score"]),
+            options=dict(
+                x="Daily Social Media Usage(hours)",
+                y="Self Reported Addiction Score",
+                color="Gender",
+                size="Anxiety Score",
+                hover_data=["Gender", "Self Esteem Score", "Sleep Quality"]
+            ),
+            layout=dict(xaxis_title="Daily Social Media Usage(hours)", yaxis_title="Self Reported Addiction Score"),
+            caption="💡 There’s a clear positive correlation between daily social media usage and self-reported addiction score."
+        ),
+        FigureSpec(
+            "usage_vs_anxiety_line",
+            "### 🔁 Daily Usage vs. Average Anxiety Score",
+            means("Daily Social Media Usage(hours)", "Anxiety Score"),
+            "line",
+            options=dict(x="Daily Social Media Usage(hours)", y="Anxiety Score", markers=True),
+            layout=dict(xaxis_title="Daily Social Media Usage (hours)", yaxis_title="Average Anxiety Score"),
+            caption="💡 Anxiety scores tend to increase with higher daily social media usage, suggesting a positive correlation."
+        ),
+        FigureSpec(
+            "fatigue_by_usage_line",
+            "### 📈 Average Social Media Fatigue by Usage Hours",
+            means("Daily Social Media Usage(hours)", "Social Media Fatigue Score"),
+            "line",
+            options=dict(x="Daily Social Media Usage(hours)", y="Social Media Fatigue Score", markers=True),
+            layout=dict(xaxis_title="Daily Social Media Usage(hours)", yaxis_title="Average Social Media Fatigue Score"),
+            caption="💡 There’s a rising trend in social media fatigue scores as daily usage increases."
+        ),
+        FigureSpec(
+            "sleep_by_addiction_line",
+            "### 😴 Average Sleep Quality by Addiction Score",
+            means("Self Reported Addiction Score", "Sleep Quality"),
+            "line",
+            options=dict(x="Self Reported Addiction Score", y="Sleep Quality", markers=True),
+            layout=dict(xaxis_title="Self Reported Addiction Score", yaxis_title="Average Sleep Quality"),
+            caption="💡 This suggests that higher self-reported addiction is associated with poorer sleep, especially after crossing a certain threshold"
+        ),
+        FigureSpec(
+            "addict_vs_fatigue",
+            "### 💥 Average Social Media Fatigue by Addiction Score",
+            means("Self Reported Addiction Score", "Social Media Fatigue Score"),
+            "line",
+            options=dict(x="Self Reported Addiction Score", y="Social Media Fatigue Score", markers=True),
+            layout=dict(xaxis_title="Addiction Score", yaxis_title="Average Social Media Fatigue Score"),
+            caption="💡 Positive correlation: Higher addiction scores are associated with increased social media fatigue."
+        ),
+    ],
+}
+
+
+def _addiction_box(key, title, table, column, label, caption):
+    # Dataset 2's box plots of one column per addiction status all look the same
+    return FigureSpec(
+        key,
+        title,
+        stored(table),
+        "box_stats",
+        options=dict(
+            x="addicted",
+            y=column,
+            color="addicted",
+            color_discrete_map=ADDICTED_COLORS,
+            labels={column: label, "addicted": "Addiction Status"}
+        ),
+        caption=caption
+    )
+
+
+DATASET2_STATIC = [
+    FigureSpec(
+        "staticd2f0",
+        "### 📈 Addiction Distribution",
+        stored("addicted_counts"),
+        "pie",
+        options=dict(names="addicted", values="count"),
+        caption="💡 Around 50.4% of people are addicted to social media"
+    ),
+    _addiction_box(
+        "staticd2f1",
+        "### 📈 Addiction Status by Daily Usage",
+        "box_screen_time_by_addicted",
+        "daily_screen_time",
+        "Daily Screen Time (hours)",
+        "💡 Addicted people tend to use the phone more often"
+    ),
+    FigureSpec(
+        "staticd2f2",
+        "### 📈 Avg Daily Usage by Age",
+        stored("hist_avg_screen_time_by_age"),
+        "binned",
+        options=dict(x="age", y="daily_screen_time", histfunc="avg"),
+        caption="💡 Teenagers have the most screen time averaging at around 4.5 hours per day"
+    ),
+    _addiction_box(
+        "staticd2f3",
+        "### 📈 Addiction Status by Night Usage",
+        "box_night_usage_by_addicted",
+        "night_usage",
+        "Night Usage (hours)",
+        "💡 Users classified as addicted tend to spend more time on their phones after bedtime."
+    ),
+    _addiction_box(
+        "staticd2f4",
+        "### 📈 Addiction Status by App Sessions",
+        "box_app_sessions_by_addicted",
+        "app_sessions",
+        "App Sessions",
+        "💡 Addicted users typically open apps more frequently throughout the day."
+    ),
+    _addiction_box(
+        "staticd2f5",
+        "### 📈 Work/Study Hours by Addiction Status",
+        "box_work_study_by_addicted",
+        "work_study_hours",
+        "Work/Study Hours",
+        "💡 Addicted individuals tend to spend slightly fewer hours on work or study tasks compared to non-addicted individuals."
+    ),
+]
+
+
+def _stress_scatter(key, title, column, label, caption):
+    # Average stress level per value of column
+    return FigureSpec(
+        key,
+        title,
+        means(column, "stress_level"),
+        "scatter",
+        options=dict(
+            x=column,
+            y="stress_level",
+            color="stress_level",
+            opacity=0.7,
+            color_discrete_map=ADDICTED_COLORS,
+            labels={column: label, "stress_level": "Stress Level"}
+        ),
+        caption=caption
+    )
+
+
+DATASET2_SECTIONS = {
+    "⚖️ Addiction Overview": [
+        FigureSpec(
+            "addicted_dist_pie",
+            "### 👥 Addiction Status Distribution",
+            counts("addicted"),
+            "pie",
+            options=dict(
+                names="addicted",
+                values="count",
+                color="addicted",
+                color_discrete_map={"Yes": "#AED6F1", "No": "#1f77b4"}
+            ),
+            caption="💡 Just over half of the participants (50.4%) are classified as addicted, highlighting how widespread smartphone dependency has become."
+        ),
+        FigureSpec(
+            "avg_screen_by_addiction",
+            "### 📊 Avg Screen Time by Addiction",
+            means("addicted", "daily_screen_time"),
+            "bar",
+            options=dict(
+                x="addicted",
+                y="daily_screen_time",
+                color="addicted",
+                color_discrete_map=ADDICTED_COLORS,
+                labels={"daily_screen_time": "Average Screen Time (hrs)", "addicted": "Addiction Status"},
+                text_auto=".2f"
+            ),
+            caption="💡 Average screen time is drastically more for addicted individuals (4.5 hours) compared to non-addicted individuals (3 hours)."
+        ),
+        FigureSpec(
+            "gaming_by_addiction",
+            "### 🎮 Gaming Time by Addiction Status",
+            means("addicted", "gaming_time"),
+            "bar",
+            options=dict(
+                x="addicted",
+                y="gaming_time",
+                color="addicted",
+                color_discrete_map=ADDICTED_COLORS,
+                labels={"gaming_time": "Avg Gaming Time (hrs)", "addicted": "Addiction Status"},
+                text_auto=".2f"
+            ),
+            caption="💡 Addicted individuals tend to game more than non-addicted individuals."
+        ),
+        FigureSpec(
+            "work_study_by_addiction",
+            "### 📚 Work/Study Hours by Addiction Status",
+            ROWS,
+            "box",
+            options=dict(
+                x="addicted",
+                y="work_study_hours",
+                color="addicted",
+                color_discrete_map=ADDICTED_COLORS,
+                labels={"work_study_hours": "Work/Study Hours", "addicted": "Addiction Status"}
+            ),
+            caption="💡 Non-addicted individuals tend to spend more time on work/study tasks compared to addicted individuals."
+        ),
+    ],
+    "😰 Stress & Usage Patterns": [
+        _stress_scatter(
+            "stress_vs_night_usage",
+            "### 🌙 Avg Stress Level vs Night Usage",
+            "night_usage",
+            "Night Usage (hrs)",
+            "💡 Clear positive correlation: when night usage increases, stress level increases."
+        ),
+        _stress_scatter(
+            "notifications_vs_stress",
+            "### 🔔 Notifications vs Avg Stress Level",
+            "notifications",
+            "Notifications (per day)",
+            "💡 Stress level elevates with the increase of notifications (per day)"
+        ),
+        FigureSpec(
+            "age_vs_screen_time",
+            "### 👤 Age vs Daily Screen Time",
+            means("age", "daily_screen_time"),
+            "line",
+            options=dict(x="age", y="daily_screen_time", labels={"daily_screen_time": "Avg Screen Time (hrs)", "age": "Age"}),
+            caption="💡 As people get older, they tend to use their phones less. "
+        ),
+        _stress_scatter(
+            "stress_vs_app_sessions",
+            "### 📱 Avg Stress Level vs App Sessions",
+            "app_sessions",
+            "App Sessions",
+            "💡 More app sessions lead to higher stress levels. "
+        ),
+    ],
+}
@@ -0,0 +1,405 @@
+# Index-backed filtering for the interactive dashboards
+#
+# The sidebar filters used to build one full-length boolean mask per
+# condition and AND them together, which costs the same no matter how few
+# rows survive. FilterIndex precomputes, once per loaded frame:
+#   - for each categorical column: integer codes plus the row ids of every
+#     category (its posting list), so "Gender in [...]" is a lookup
+#   - for each range column: the row order sorted by value, so "18 <= Age <= 30"
+#     is two binary searches giving a slice of row ids
+# A query starts from the most selective predicate (its size is known exactly
+# from the index before any row is touched) and only checks the surviving
+# candidates against the remaining predicates, so its cost follows the number
+# of matching rows rather than the size of the table.
+#
+# Matching rules are the same as the old masks: rows with a missing value in a
+# filtered column never match, and range bounds are inclusive.
+#
+# IncrementalFilter sits on top of a FilterIndex for one browser session. It
+# remembers the previous selection and its matching rows, so when a single
+# control changes (say the Age slider) only that predicate is re-evaluated:
+# narrowing drops the rows that fall out, widening only looks at the rows in
+# the newly covered slice of the index. GroupStats keeps per-group sums and
+# counts that are updated from the same row deltas, so group means and counts
+# follow a slider drag without rescanning the filtered rows. Deltas are only
+# applied to sums of integer values (every score and count column here), which
+# float64 adds exactly in any order; other columns, and deltas larger than the
+# result, are recounted from the rows, so a session's means never drift from
+# what a fresh computation over the same rows gives.
+#
+# Everything that only depends on the data (codes, sorted orders, group keys)
+# lives in the FilterIndex and is shared by all sessions; a session only keeps
+# its matching row ids (4 bytes per row) and its small per-group tables.
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """Category posting lists and sorted-value indices over one frame."""
+
+    def __init__(self, data, categorical=(), ranges=()):
+        self.data = data
+        self.n_rows = len(data)
+        # Row ids are stored as int32 whenever they fit, halving the index and every session's result
+        self.row_dtype = np.int32 if self.n_rows < 2 ** 31 else np.int64
+        self.categories = {}  # column -> pandas Index of category labels
+        self.codes = {}  # column -> int code per row (-1 = missing)
+        self.postings = {}  # column -> (row ids grouped by code, start offset of each code)
+        self.sorted_rows = {}  # column -> row ids ordered by value (missing values last)
+        self.sorted_values = {}  # column -> the values in that order
+        self.values = {}  # column -> values in row order
+        self._exact_sums = {}  # column -> whether its sums are exact whatever the order (see exact_sums)
+        self._group_keys = {}  # column or tuple of columns -> (codes, labels, shape) for grouping, built on demand
+        self._lock = threading.RLock()
+
+        for column in categorical:
+            codes, categories = _factorize(data[column])
+            self.codes[column] = codes
+            self.categories[column] = categories
+            # Stable sort keeps each category's row ids ascending
+            rows = np.argsort(codes, kind="stable").astype(self.row_dtype)
+            counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+            starts = np.concatenate([[0], np.cumsum(counts)]) + np.count_nonzero(codes < 0)
+            self.postings[column] = (rows, starts)
+
+        for column in ranges:
+            values = data[column].to_numpy(dtype="float64", na_value=np.nan)
+            rows = np.argsort(values, kind="stable").astype(self.row_dtype)
+            self.values[column] = values
+            self.sorted_rows[column] = rows
+            self.sorted_values[column] = values[rows]
+
+    def _category_codes(self, column, selection):
+        codes = self.categories[column].get_indexer(list(selection))
+        return np.unique(codes[codes >= 0])
+
+    def _range_bounds(self, column, low, high):
+        # Binary search both ends; NaNs sort last so they are never inside [low, high]
+        sorted_values = self.sorted_values[column]
+        start = np.searchsorted(sorted_values, low, side="left")
+        stop = np.searchsorted(sorted_values, high, side="right")
+        return start, max(start, stop)
+
+    def predicate_rows(self, kind, column, condition):
+        """Return the ascending row ids matching a single predicate."""
+        if kind == "category":
+            rows, starts = self.postings[column]
+            codes = self._category_codes(column, condition)
+            if len(codes) == 0:
+                return np.empty(0, dtype=self.row_dtype)
+            return np.sort(np.concatenate([rows[starts[code]:starts[code + 1]] for code in codes]))
+        start, stop = self._range_bounds(column, *condition)
+        return np.sort(self.sorted_rows[column][start:stop])
+
+    def predicate_size(self, kind, column, condition):
+        """Return how many rows match a single predicate, without touching any row."""
+        if kind == "category":
+            _, starts = self.postings[column]
+            codes = self._category_codes(column, condition)
+            return int(sum(starts[code + 1] - starts[code] for code in codes))
+        start, stop = self._range_bounds(column, *condition)
+        return int(stop - start)
+
+    def matches(self, kind, column, condition, rows):
+        """Return a boolean mask telling which of rows match a predicate."""
+        if kind == "category":
+            allowed = np.zeros(len(self.categories[column]) + 1, dtype=bool)  # last slot is code -1 (missing)
+            allowed[self._category_codes(column, condition)] = True
+            return allowed[self.codes[column][rows]]
+        low, high = condition
+        values = self.values[column][rows]
+        return (values >= low) & (values <= high)
+
+    def check(self, kind, column, condition, rows):
+        """Return the subset of rows (ascending row ids) that also match a predicate."""
+        return rows[self.matches(kind, column, condition, rows)]
+
+    def added_candidates(self, kind, column, old, new):
+        """Return the rows matching the new condition of a predicate but not the old one."""
+        if kind == "category":
+            rows, starts = self.postings[column]
+            codes = np.setdiff1d(self._category_codes(column, new), self._category_codes(column, old))
+            if len(codes) == 0:
+                return np.empty(0, dtype=self.row_dtype)
+            return np.concatenate([rows[starts[code]:starts[code + 1]] for code in codes])
+        # The newly covered part of a range is at most two slices of the sorted index
+        new_start, new_stop = self._range_bounds(column, *new)
+        old_start, old_stop = self._range_bounds(column, *old)
+        sorted_rows = self.sorted_rows[column]
+        below = sorted_rows[new_start:max(new_start, min(new_stop, old_start))]
+        above = sorted_rows[min(new_stop, max(new_start, old_stop)):new_stop]
+        return np.concatenate([below, above])
+
+    def group_codes(self, column):
+        """Return (codes, labels) for grouping by column, in groupby's sorted key order."""
+        with self._lock:
+            if column not in self._group_keys:
+                series = self.data[column]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    self._group_keys[column] = (series.cat.codes.to_numpy(dtype=np.int64), series.cat.categories)
+                else:
+                    codes, labels = pd.factorize(series, sort=True, use_na_sentinel=True)
+                    self._group_keys[column] = (codes.astype(np.int64), pd.Index(labels))
+            return self._group_keys[column]
+
+    def combined_group_codes(self, keys):
+        """Return (codes, labels per key, shape) grouping by several columns at once.
+
+        The combined code of a row is its position in the grid of all key
+        combinations (-1 if any key is missing). Built once and shared by every
+        session's GroupStats.
+        """
+        keys = tuple(keys)
+        with self._lock:
+            if keys not in self._group_keys:
+                key_codes = [self.group_codes(key) for key in keys]
+                labels = [key_labels for _, key_labels in key_codes]
+                shape = tuple(len(key_labels) for key_labels in labels)
+                codes = np.zeros(self.n_rows, dtype=np.int64)
+                missing = np.zeros(self.n_rows, dtype=bool)
+                for key_code, key_labels in key_codes:
+                    codes = codes * len(key_labels) + key_code
+                    missing |= key_code < 0
+                codes[missing] = -1
+                self._group_keys[keys] = (codes, labels, shape)
+            return self._group_keys[keys]
+
+    def column_values(self, column):
+        """Return column as a float array (missing values as NaN), shared by every session."""
+        with self._lock:
+            if column not in self.values:
+                self.values[column] = self.data[column].to_numpy(dtype="float64", na_value=np.nan)
+            return self.values[column]
+
+    def exact_sums(self, column):
+        """Whether every sum of the column's values is exact in float64: integers whose total stays below 2**53."""
+        with self._lock:
+            if column not in self._exact_sums:
+                values = self.column_values(column)
+                values = values[~np.isnan(values)]
+                self._exact_sums[column] = bool(np.all(values == np.round(values))) and float(np.abs(values).sum()) < 2 ** 53
+            return self._exact_sums[column]
+
+    def query(self, categories=None, ranges=None):
+        """Return the ascending row ids matching every category selection and (low, high) range."""
+        predicates = [("category", column, selection) for column, selection in (categories or {}).items()]
+        predicates += [("range", column, bounds) for column, bounds in (ranges or {}).items()]
+        if not predicates:
+            return np.arange(self.n_rows, dtype=self.row_dtype)
+
+        # Drive from the smallest candidate set, then narrow it with the rest
+        predicates.sort(key=lambda predicate: self.predicate_size(*predicate))
+        rows = self.predicate_rows(*predicates[0])
+        for predicate in predicates[1:]:
+            if len(rows) == 0:
+                break
+            rows = self.check(*predicate, rows)
+        return rows
+
+    def filter(self, categories=None, ranges=None):
+        """Return the rows of the indexed frame matching the filters (in their original order)."""
+        return self.data.iloc[self.query(categories, ranges)]
+
+
+def _factorize(series):
+    # Categoricals already carry codes; anything else is factorized once here
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(dtype=np.int64), series.cat.categories
+    codes, categories = pd.factorize(series, use_na_sentinel=True)
+    return codes.astype(np.int64), pd.Index(categories)
+
+
+class GroupStats:
+    """Per-group row counts and value sums/counts that can be updated with row deltas.
+
+    keys is one or more grouping columns; values are the columns to average.
+    Groups follow groupby's rules: rows with a missing key are left out, and
+    missing values are skipped when averaging.
+    """
+
+    def __init__(self, index, keys, values=()):
+        self.index = index
+        self.keys = list(keys)
+        self.value_columns = list(values)
+
+        # One code per row for the combination of keys (shared through the index)
+        self.codes, self.labels, self.shape = index.combined_group_codes(self.keys)
+        self.n_groups = int(np.prod(self.shape)) if self.shape else 0
+
+        self.values = [index.column_values(column) for column in self.value_columns]
+        # Row counts are always exact; value sums only when every column's are (FilterIndex.exact_sums)
+        self.incremental = all(index.exact_sums(column) for column in self.value_columns)
+        self.reset(np.empty(0, dtype=index.row_dtype))
+
+    def reset(self, rows):
+        """Recompute every group from scratch for the given rows."""
+        self.rows = np.zeros(self.n_groups)
+        self.sums = np.zeros((len(self.values), self.n_groups))
+        self.counts = np.zeros((len(self.values), self.n_groups))
+        self.update(rows, 1)
+
+    def apply(self, removed, added, rows):
+        """Move to rows from the previous rows, of which removed dropped out and added joined."""
+        if not self.incremental or len(removed) + len(added) > len(rows):
+            # Float deltas would drift from a fresh computation, and a large delta costs more than a recount
+            self.reset(rows)
+            return
+        self.update(removed, -1)
+        self.update(added, 1)
+
+    def update(self, rows, sign):
+        """Add (sign=1) or subtract (sign=-1) the contribution of rows."""
+        if len(rows) == 0:
+            return
+        codes = self.codes[rows]
+        present = codes >= 0
+        self.rows += sign * np.bincount(codes[present], minlength=self.n_groups)
+        for i, values in enumerate(self.values):
+            row_values = values[rows]
+            valid = present & ~np.isnan(row_values)
+            self.sums[i] += sign * np.bincount(codes[valid], weights=row_values[valid], minlength=self.n_groups)
+            self.counts[i] += sign * np.bincount(codes[valid], minlength=self.n_groups)
+
+    def _key_frame(self, groups):
+        # Turn combined group codes back into one label column per key
+        frame = {}
+        positions = np.unravel_index(groups, self.shape)
+        for key, labels, position in zip(self.keys, self.labels, positions):
+            frame[key] = labels.take(position)
+        return pd.DataFrame(frame)
+
+    def means(self):
+        """Same as data.groupby(keys)[values].mean().reset_index() over the current rows."""
+        groups = np.flatnonzero(self.rows > 0)
+        frame = self._key_frame(groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for i, column in enumerate(self.value_columns):
+                frame[column] = np.where(self.counts[i, groups] > 0, self.sums[i, groups] / self.counts[i, groups], np.nan)
+        return frame
+
+    def sizes(self, name="Count"):
+        """Same as data.groupby(keys).size().reset_index(name=name) over the current rows."""
+        groups = np.flatnonzero(self.rows > 0)
+        frame = self._key_frame(groups)
+        frame[name] = self.rows[groups].astype(np.int64)
+        return frame
+
+    def value_counts(self, name="count"):
+        """Same as data[key].value_counts().reset_index() over the current rows."""
+        frame = self.sizes(name)
+        return frame.sort_values(name, ascending=False, kind="stable").reset_index(drop=True)
+
+    def summary(self, name="Count"):
+        """sizes(name) and means() in one table: the keys, name, then every value column."""
+        frame = self.sizes(name)
+        groups = np.flatnonzero(self.rows > 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for i, column in enumerate(self.value_columns):
+                frame[column] = np.where(self.counts[i, groups] > 0, self.sums[i, groups] / self.counts[i, groups], np.nan)
+        return frame
+
+
+class IncrementalFilter:
+    """Filter state for one session that only re-evaluates the predicates that changed."""
+
+    def __init__(self, index):
+        self.index = index
+        self.conditions = None  # (kind, column) -> condition of the last update
+        self.rows = None  # ascending row ids matching self.conditions
+        self.stats = {}  # (keys, values) -> GroupStats kept in step with self.rows
+        self._lock = threading.Lock()  # figures are built on several threads
+
+    def update(self, categories=None, ranges=None):
+        """Apply the current sidebar selection and return the matching row ids."""
+        conditions = {("category", column): frozenset(selection) for column, selection in (categories or {}).items()}
+        conditions.update({("range", column): tuple(bounds) for column, bounds in (ranges or {}).items()})
+
+        if self.conditions is None or set(conditions) != set(self.conditions):
+            # First run (or a different set of controls): evaluate everything once
+            self.rows = self.index.query(
+                {column: condition for (kind, column), condition in conditions.items() if kind == "category"},
+                {column: condition for (kind, column), condition in conditions.items() if kind == "range"}
+            )
+            for stats in self.stats.values():
+                stats.reset(self.rows)
+        else:
+            # Apply each changed control as a delta against the previous result
+            for predicate, condition in conditions.items():
+                if condition != self.conditions[predicate]:
+                    self._apply_change(predicate, self.conditions[predicate], condition)
+                    self.conditions[predicate] = condition
+
+        self.conditions = conditions
+        return self.rows
+
+    def _apply_change(self, predicate, old, new):
+        kind, column = predicate
+
+        # Rows that no longer match the changed predicate drop out
+        keep = self.index.matches(kind, column, new, self.rows)
+        removed = self.rows[~keep]
+        kept = self.rows[keep]
+
+        # Rows that newly match it come from the index and must still pass every other predicate
+        added = self.index.added_candidates(kind, column, old, new)
+        for (other_kind, other_column), condition in self.conditions.items():
+            if len(added) == 0:
+                break
+            if (other_kind, other_column) != predicate:
+                added = self.index.check(other_kind, other_column, condition, added)
+        added = np.sort(added)
+
+        self.rows = np.sort(np.concatenate([kept, added])) if len(added) else kept
+        for stats in self.stats.values():
+            stats.apply(removed, added, self.rows)
+
+    @property
+    def n_rows(self):
+        """Number of rows matching the current selection."""
+        return len(self.rows)
+
+    def filtered(self, columns=None):
+        """Return the rows of the indexed frame matching the current selection (only columns, when given)."""
+        data = self.index.data if columns is None else self.index.data[list(columns)]
+        return data.iloc[self.rows]
+
+    def group_stats(self, keys, values=()):
+        """Return the GroupStats for (keys, values), kept up to date by every later update."""
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        name = (tuple(keys), tuple(values))
+        with self._lock:
+            if name not in self.stats:
+                stats = GroupStats(self.index, keys, values)
+                stats.reset(self.rows)
+                self.stats[name] = stats
+            return self.stats[name]
+
+
+_indexes = {}  # name -> FilterIndex
+_indexes_lock = threading.Lock()
+
+
+def get_incremental_filter(state, name, index):
+    """Return the session's IncrementalFilter for index, stored in state (e.g. st.session_state)."""
+    incremental = state.get(name)
+    if incremental is None or incremental.index is not index:
+        incremental = IncrementalFilter(index)
+        state[name] = incremental
+    return incremental
+
+
+def get_filter_index(name, data, categorical=(), ranges=()):
+    """Return the FilterIndex for data, building it only when the frame has been reloaded.
+
+    The loader hands out the same frame object until the file changes, so the
+    index is shared by every rerun and session until then.
+    """
+    with _indexes_lock:
+        index = _indexes.get(name)
+        if index is None or index.data is not data:
+            index = FilterIndex(data, categorical, ranges)
+            _indexes[name] = index
+        return index
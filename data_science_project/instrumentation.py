@@ -0,0 +1,150 @@
+# Opt-in timing and payload instrumentation for the dashboard
+#
+# When the dashboard is slow it is not obvious whether the time goes into
+# loading, filtering, one particular aggregation, Plotly figure construction
+# or serialization. With instrumentation on, every rerun records
+#   - stages (load, static aggregates, filter, figures, render) with their
+#     duration and rows in/out
+#   - every figure by key (staticd1f0, usage_vs_addiction, ...): figure cache
+#     hit or miss, time spent on its input table, on building the Plotly
+#     figure, on serializing it for the cache and on st.plotly_chart, rows in
+#     (rows of the view) and out (rows/groups drawn) and its JSON size
+# and writes them as one JSON line per rerun to the "dashboard.instrumentation"
+# logger (stderr, or DASHBOARD_INSTRUMENTATION_LOG=<file>). A "Debug" section
+# at the bottom of the sidebar shows the same numbers plus cache statistics and
+# the memory of every parsed dataset before and after compact_dtypes.
+#
+# Turn it on for the whole process with DASHBOARD_INSTRUMENTATION=1, or for one
+# browser session by opening the app with ?debug=1. Recording is a handful of
+# perf_counter() calls per figure, so it is cheap enough to leave on; when it
+# is off the app gets a NullRecorder whose methods do nothing.
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+INSTRUMENTATION_ENV = "DASHBOARD_INSTRUMENTATION"
+LOG_FILE_ENV = "DASHBOARD_INSTRUMENTATION_LOG"
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def instrumentation_enabled(query_params=None):
+    """True when DASHBOARD_INSTRUMENTATION is set, or the session asked for ?debug=1."""
+    if os.environ.get(INSTRUMENTATION_ENV, "").lower() in ("1", "true", "yes", "on"):
+        return True
+    return query_params is not None and query_params.get("debug") == "1"
+
+
+def get_logger():
+    """The structured log, writing one JSON object per line."""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            logger = logging.getLogger("dashboard.instrumentation")
+            if not logger.handlers:
+                path = os.environ.get(LOG_FILE_ENV)
+                handler = logging.FileHandler(path) if path else logging.StreamHandler()
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+            _logger = logger
+        return _logger
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class RerunRecorder:
+    """Stage and figure measurements of one rerun (safe to use from the figure threads)."""
+
+    enabled = True
+
+    def __init__(self, view):
+        self.view = view
+        self.stages = []
+        self.figures = {}  # figure key -> measurements, in the order figures were first seen
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time a block; the yielded dict takes extra fields such as rows_out."""
+        fields = {"rows_in": rows_in}
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            entry = {"stage": name, "ms": _ms(time.perf_counter() - start)}
+            entry.update({key: value for key, value in fields.items() if value is not None})
+            with self._lock:
+                self.stages.append(entry)
+
+    def figure(self, key, **fields):
+        """Add measurements for one figure."""
+        with self._lock:
+            self.figures.setdefault(key, {"figure": key}).update(fields)
+
+    def summary(self):
+        """Everything recorded so far, as a JSON-ready dict."""
+        with self._lock:
+            return {
+                "event": "rerun",
+                "view": self.view,
+                "total_ms": _ms(time.perf_counter() - self.started),
+                "stages": list(self.stages),
+                "figures": list(self.figures.values()),
+            }
+
+    def finish(self, **extra):
+        """Log the rerun as one JSON line and return the summary."""
+        summary = self.summary()
+        summary.update(extra)
+        get_logger().info(json.dumps(summary, default=str))
+        return summary
+
+
+class NullRecorder:
+    """Stand-in used when instrumentation is off: same methods, no work."""
+
+    enabled = False
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        yield {}
+
+    def figure(self, key, **fields):
+        pass
+
+    def finish(self, **extra):
+        return None
+
+
+def start_rerun(view, enabled):
+    """Return the recorder for this rerun (a NullRecorder when instrumentation is off)."""
+    return RerunRecorder(view) if enabled else NullRecorder()
+
+
+def render_debug_panel(container, summary, cache_stats, memory=None):
+    """Show a rerun summary, cache statistics and dataset memory in a Streamlit container (e.g. st.sidebar)."""
+    import pandas as pd
+
+    container.header("🛠️ Debug")
+    container.caption(f"{summary['view']}: {summary['total_ms']:.0f} ms this rerun")
+    container.markdown("**Stages**")
+    container.dataframe(pd.DataFrame(summary["stages"]), hide_index=True)
+    if summary["figures"]:
+        container.markdown("**Figures**")
+        container.dataframe(pd.DataFrame(summary["figures"]), hide_index=True)
+    container.markdown("**Caches**")
+    container.dataframe(pd.DataFrame(cache_stats).T)
+    if memory:
+        container.markdown("**Dataset memory (parsed → compact)**")
+        container.dataframe(pd.DataFrame(memory).T)
@@ -0,0 +1,258 @@
+# Nearest-neighbor indexes for scoring millions of rows with the tuned kNN
+#
+# KNeighborsClassifier answers one predict() call with one search over the
+# whole training matrix. For scoring exports this module puts the training
+# rows behind an index and answers queries in batches of BATCH_ROWS rows,
+# spread over a thread pool (the distance kernels run in numpy/BLAS and
+# release the GIL), so memory per batch is bounded and latency grows with the
+# batch, not with the export. Three modes:
+#   - "blocked": exact brute force in blocks. Euclidean distances come from one
+#     matrix product per block (|q|^2 - 2 q.x + |x|^2), Manhattan ones from
+#     scipy's cdist; the k best candidates are then re-measured directly so
+#     rounding never reorders them
+#   - "tree" (default): exact, sklearn's KDTree. With 6 features it is the
+#     fastest exact mode (about 22k rows/s per core against the 10,871
+#     training rows); "blocked" pays off for wider feature sets
+#   - "ivf": approximate. k-means splits the training rows into n_lists
+#     inverted lists; a query only searches the n_probe lists whose centroids
+#     are nearest. n_probe is the recall knob: n_probe = n_lists is exact,
+#     smaller values trade recall for speed (see recall_at_k). Queries whose
+#     probed lists hold fewer than k rows are searched exhaustively instead
+#
+# IndexedKNNClassifier votes like KNeighborsClassifier (same weights and tie
+# rule), so with an exact mode its predictions are the same, apart from rows
+# whose k-th and (k+1)-th neighbors tie.
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.spatial.distance import cdist
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.cluster import KMeans
+from sklearn.neighbors import KDTree
+from sklearn.pipeline import Pipeline
+from threadpoolctl import threadpool_limits
+
+from knn_tuning import class_votes, vote_weights
+
+
+MODES = ("blocked", "tree", "ivf")
+METRICS = ("euclidean", "manhattan")
+
+# Query rows per batch handed to a thread
+BATCH_ROWS = 1024
+# Training rows compared with a query batch at once (BATCH_ROWS x TRAIN_BLOCK_ROWS distances, 32 MB)
+TRAIN_BLOCK_ROWS = 4096
+# Rows k-means is trained on when building the "ivf" lists, and the fewest rows per list
+IVF_SAMPLE_ROWS = 100_000
+IVF_MIN_LIST_ROWS = 39
+# Default n_probe for "ivf" (about 0.995 recall at k=19 on the addiction data)
+IVF_PROBE = 16
+
+
+def _pairwise(queries, points, metric, point_norms=None):
+    """Distances between every query (rows) and every point (columns)."""
+    if metric == "euclidean":
+        if point_norms is None:
+            point_norms = np.einsum("ij,ij->i", points, points)
+        squared = np.einsum("ij,ij->i", queries, queries)[:, None] - 2.0 * queries @ points.T + point_norms[None, :]
+        return np.sqrt(np.maximum(squared, 0.0))
+    return cdist(queries, points, "cityblock")
+
+
+def _exact(queries, points, metric):
+    """Distances of matched rows, measured directly (no norm expansion)."""
+    difference = queries - points
+    if metric == "euclidean":
+        return np.sqrt(np.einsum("...j,...j->...", difference, difference))
+    return np.abs(difference).sum(axis=-1)
+
+
+def _merge(best_distances, best_indices, distances, indices, k):
+    """Keep the k smallest of the current best and new candidates, per row (unsorted)."""
+    distances = np.concatenate([best_distances, distances], axis=1)
+    indices = np.concatenate([best_indices, indices], axis=1)
+    if distances.shape[1] > k:
+        keep = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        distances = np.take_along_axis(distances, keep, axis=1)
+        indices = np.take_along_axis(indices, keep, axis=1)
+    return distances, indices
+
+
+def _sort(distances, indices):
+    # Nearest first; equal distances in training-row order
+    order = np.lexsort((indices, distances), axis=1)
+    return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+class NeighborIndex:
+    """k-nearest-neighbor search over the rows of X, in one of MODES."""
+
+    def __init__(self, X, metric="euclidean", mode="tree", n_lists=None, n_probe=IVF_PROBE,
+                 n_threads=None, batch_rows=BATCH_ROWS, random_state=0):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, not {mode!r}")
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}, not {metric!r}")
+        # A memory-mapped training matrix (model_store.load_version) is used as is
+        self.X = np.asarray(X, dtype=np.float64)
+        self.metric = metric
+        self.mode = mode
+        self.n_probe = n_probe
+        self.n_threads = n_threads
+        self.batch_rows = batch_rows
+        self.norms = None
+
+        if mode == "blocked" and metric == "euclidean":
+            self.norms = np.einsum("ij,ij->i", self.X, self.X)
+        elif mode == "tree":
+            self.tree = KDTree(self.X, metric=metric)
+        elif mode == "ivf":
+            self._build_lists(n_lists, random_state)
+
+    def _build_lists(self, n_lists, random_state):
+        rng = np.random.default_rng(random_state)
+        sample = self.X if len(self.X) <= IVF_SAMPLE_ROWS else self.X[rng.choice(len(self.X), IVF_SAMPLE_ROWS, replace=False)]
+        if n_lists is None:
+            n_lists = min(int(4 * math.sqrt(len(self.X))), len(sample) // IVF_MIN_LIST_ROWS)
+        # Duplicate rows are common (small integer scales), so there may be fewer distinct centroids than asked for
+        n_lists = max(1, min(n_lists, len(np.unique(sample, axis=0))))
+        kmeans = KMeans(n_clusters=n_lists, n_init=1, random_state=random_state).fit(sample)
+        self.centroids = kmeans.cluster_centers_
+        assignment = self._nearest_centroids(self.X, 1)[:, 0]
+        # Inverted lists: the training rows of list l are members[offsets[l]:offsets[l + 1]]
+        self.members = np.argsort(assignment, kind="stable")
+        self.offsets = np.searchsorted(assignment[self.members], np.arange(n_lists + 1))
+        self.n_lists = n_lists
+
+    def _nearest_centroids(self, queries, n):
+        distances = _pairwise(queries, self.centroids, self.metric)
+        if n >= len(self.centroids):
+            return np.tile(np.arange(len(self.centroids)), (len(queries), 1))
+        return np.argpartition(distances, n - 1, axis=1)[:, :n]
+
+    def _search_blocked(self, queries, k):
+        best_distances = np.empty((len(queries), 0))
+        best_indices = np.empty((len(queries), 0), dtype=np.intp)
+        for start in range(0, len(self.X), TRAIN_BLOCK_ROWS):
+            block = self.X[start:start + TRAIN_BLOCK_ROWS]
+            norms = self.norms[start:start + TRAIN_BLOCK_ROWS] if self.norms is not None else None
+            distances = _pairwise(queries, block, self.metric, norms)
+            indices = np.broadcast_to(np.arange(start, start + len(block)), distances.shape)
+            best_distances, best_indices = _merge(best_distances, best_indices, distances, indices, k)
+        return best_distances, best_indices
+
+    def _search_ivf(self, queries, k):
+        n_probe = min(self.n_probe, self.n_lists)
+        probes = self._nearest_centroids(queries, n_probe).ravel()
+        probe_rows = np.repeat(np.arange(len(queries)), n_probe)
+        order = np.argsort(probes, kind="stable")
+        lists, starts = np.unique(probes[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+
+        best_distances = np.full((len(queries), k), np.inf)
+        best_indices = np.zeros((len(queries), k), dtype=np.intp)
+        # One distance block per probed list, for every query probing it
+        for list_id, start, end in zip(lists, starts, ends):
+            rows = probe_rows[order[start:end]]
+            members = self.members[self.offsets[list_id]:self.offsets[list_id + 1]]
+            if len(members) == 0:
+                continue
+            for block in range(0, len(members), TRAIN_BLOCK_ROWS):
+                block_members = members[block:block + TRAIN_BLOCK_ROWS]
+                distances = _pairwise(queries[rows], self.X[block_members], self.metric)
+                indices = np.broadcast_to(block_members, distances.shape)
+                best_distances[rows], best_indices[rows] = _merge(best_distances[rows], best_indices[rows], distances, indices, k)
+        return best_distances, best_indices
+
+    def _search(self, queries, k):
+        if self.mode == "tree":
+            return self.tree.query(queries, k=k)
+        search = self._search_blocked if self.mode == "blocked" else self._search_ivf
+        distances, indices = search(queries, k)
+        # Probed lists holding fewer than k rows leave inf placeholders: search those queries exhaustively
+        short = np.flatnonzero(np.isinf(distances).any(axis=1))
+        if len(short):
+            distances[short], indices[short] = self._search_blocked(queries[short], k)
+        # Re-measure the candidates directly
+        return _sort(_exact(queries[:, None, :], self.X[indices], self.metric), indices)
+
+    def kneighbors(self, X, k):
+        """(distances, indices) of the k nearest training rows of every row of X, nearest first."""
+        queries = np.asarray(X, dtype=np.float64)
+        k = min(k, len(self.X))
+        batches = [queries[start:start + self.batch_rows] for start in range(0, len(queries), self.batch_rows)]
+        if not batches:
+            return np.empty((0, k)), np.empty((0, k), dtype=np.intp)
+        if len(batches) == 1 or self.n_threads == 1:
+            results = [self._search(batch, k) for batch in batches]
+        else:
+            # One BLAS thread per batch, so the pool does not oversubscribe the cores
+            with threadpool_limits(limits=1, user_api="blas"), ThreadPoolExecutor(max_workers=self.n_threads) as pool:
+                results = list(pool.map(lambda batch: self._search(batch, k), batches))
+        return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results])
+
+
+def recall_at_k(approximate, exact):
+    """Share of the true k nearest distances an approximate search found.
+
+    Both arguments are kneighbors() distances. Distance-based, so rows whose
+    neighbors tie count as found whichever of the tied rows was returned.
+    """
+    kth = exact[:, -1:]
+    return float(np.mean(approximate <= kth + 1e-12 * np.maximum(kth, 1.0)))
+
+
+class IndexedKNNClassifier(ClassifierMixin, BaseEstimator):
+    """KNeighborsClassifier voting (uniform or distance weights) over a NeighborIndex."""
+
+    def __init__(self, n_neighbors=5, weights="uniform", metric="euclidean", mode="tree", n_lists=None,
+                 n_probe=IVF_PROBE, n_threads=None, batch_rows=BATCH_ROWS, random_state=0):
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.metric = metric
+        self.mode = mode
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_threads = n_threads
+        self.batch_rows = batch_rows
+        self.random_state = random_state
+
+    @classmethod
+    def from_model(cls, model, **options):
+        """Index the training rows of a fitted KNeighborsClassifier with its n_neighbors, weights and metric."""
+        # effective_metric_: "minkowski" with p=2 / p=1 is searched as "euclidean" / "manhattan"
+        classifier = cls(n_neighbors=model.n_neighbors, weights=model.weights, metric=model.effective_metric_, **options)
+        return classifier._index(model._fit_X, model._y, model.classes_)
+
+    def fit(self, X, y):
+        classes, labels = np.unique(np.asarray(y), return_inverse=True)
+        return self._index(X, labels, classes)
+
+    def _index(self, X, labels, classes):
+        self.classes_ = classes
+        self._labels = np.asarray(labels)
+        self.index_ = NeighborIndex(X, self.metric, self.mode, self.n_lists, self.n_probe, self.n_threads,
+                                    self.batch_rows, self.random_state)
+        return self
+
+    def _votes(self, X):
+        distances, indices = self.index_.kneighbors(X, self.n_neighbors)
+        return class_votes(self._labels[indices], vote_weights(distances, self.weights), len(self.classes_))
+
+    def predict_proba(self, X):
+        votes = self._votes(X)
+        return votes / votes.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        # argmax: the lowest class index wins ties, as in KNeighborsClassifier
+        return self.classes_[np.argmax(self._votes(X), axis=1)]
+
+
+def indexed_pipeline(pipeline, **options):
+    """Copy of a saved scaler + KNeighborsClassifier pipeline (Class_model.py) whose model searches an index."""
+    steps = list(pipeline.steps)
+    name, model = steps[-1]
+    steps[-1] = (name, IndexedKNNClassifier.from_model(model, **options))
+    return Pipeline(steps)
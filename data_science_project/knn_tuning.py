@@ -0,0 +1,136 @@
+# Grid search for KNeighborsClassifier that shares one neighbor search per fold
+#
+# GridSearchCV fits and scores every candidate of the kNN grid separately: 20
+# n_neighbors x 2 weights x 2 metrics x 5 folds is 400 neighbor searches over
+# the same rows. The k nearest neighbors of a query are a prefix of its sorted
+# neighbor list for the largest k, so this search fits one model per fold and
+# metric, queries it once at the largest k and scores every smaller k and both
+# weighting schemes from the same sorted lists. The (fold, metric) tasks run
+# in parallel.
+#
+# The prefix is only unambiguous when the k-th and (k+1)-th distances differ.
+# The features are small integer scales, so ties are common (10-17% of the
+# rows per k here), and which of the tied rows a k-query keeps depends on the
+# tree traversal. Those rows are queried again at k on the same fitted model,
+# which gives exactly the neighbors GridSearchCV's model finds (every query
+# row is searched independently). Folds, votes and tie-breaking otherwise
+# follow GridSearchCV + KNeighborsClassifier (stratified folds, ties go to the
+# first class, zero distances take all the weight under "distance"), so
+# best_params_, best_score_ and the per-split scores are the same.
+
+import itertools
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.stats import rankdata
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, check_cv
+from sklearn.neighbors import KNeighborsClassifier
+
+
+WEIGHTS = ("uniform", "distance")
+
+
+def vote_weights(distances, weights):
+    """Weight of every neighbor's vote (sklearn.neighbors._base._get_weights for "uniform" / "distance")."""
+    if weights == "uniform":
+        return np.ones_like(distances)
+    with np.errstate(divide="ignore"):
+        inverse = 1.0 / distances
+    inf_mask = np.isinf(inverse)
+    inf_row = np.any(inf_mask, axis=1)
+    inverse[inf_row] = inf_mask[inf_row]
+    return inverse
+
+
+def class_votes(labels, weights, n_classes):
+    """Summed vote weight of every class (columns) for every query (rows); labels are class indices."""
+    return np.stack([np.sum(np.where(labels == c, weights, 0.0), axis=1) for c in range(n_classes)], axis=1)
+
+
+def _score_fold(X, y, train, test, metric, neighbor_counts, weight_options, estimator):
+    """Accuracy of every (n_neighbors, weights) for one fold and metric, from one fitted model."""
+    model = clone(estimator).set_params(n_neighbors=max(neighbor_counts), metric=metric).fit(X[train], y[train])
+    largest = max(neighbor_counts)
+    distances, indices = model.kneighbors(X[test])
+    train_labels = np.searchsorted(model.classes_, y[train])
+    expected = np.searchsorted(model.classes_, y[test])
+
+    scores = {}
+    for k in neighbor_counts:
+        k_distances, k_indices = distances[:, :k], indices[:, :k]
+        if k < largest:
+            tied = np.flatnonzero(distances[:, k - 1] == distances[:, k])
+            if len(tied):
+                k_distances, k_indices = k_distances.copy(), k_indices.copy()
+                k_distances[tied], k_indices[tied] = model.kneighbors(X[test][tied], n_neighbors=k)
+        labels = train_labels[k_indices]
+        for weights in weight_options:
+            # argmax: the lowest class index wins ties, as in KNeighborsClassifier
+            predicted = np.argmax(class_votes(labels, vote_weights(k_distances, weights), len(model.classes_)), axis=1)
+            scores[(k, weights)] = float(np.mean(predicted == expected))
+    return metric, scores
+
+
+class KNNGridSearch:
+    """Exhaustive search over n_neighbors, weights and metric with the interface of GridSearchCV.
+
+    param_grid may only vary n_neighbors, weights ("uniform"/"distance") and metric; other
+    KNeighborsClassifier settings go into estimator. After fit: best_params_, best_score_,
+    best_index_, best_estimator_ (refit on all rows) and cv_results_ (params,
+    split<i>_test_score, mean_test_score, std_test_score, rank_test_score).
+    """
+
+    def __init__(self, param_grid, cv=5, n_jobs=None, refit=True, estimator=None):
+        self.param_grid = param_grid
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.refit = refit
+        self.estimator = estimator if estimator is not None else KNeighborsClassifier()
+
+    def fit(self, X, y):
+        X = np.asarray(X)
+        y = np.asarray(y)
+        grid = list(ParameterGrid(self.param_grid))
+        unknown = {key for params in grid for key in params} - {"n_neighbors", "weights", "metric"}
+        if unknown:
+            raise ValueError(f"KNNGridSearch cannot search {sorted(unknown)}")
+        # Every candidate with the settings it leaves to the estimator filled in
+        defaults = {key: self.estimator.get_params()[key] for key in ("n_neighbors", "weights", "metric")}
+        candidates = [dict(defaults, **params) for params in grid]
+        if any(params["weights"] not in WEIGHTS for params in candidates):
+            raise ValueError(f"KNNGridSearch only supports weights in {WEIGHTS}")
+
+        splits = list(check_cv(self.cv, y, classifier=True).split(X, y))
+        neighbor_counts = sorted({params["n_neighbors"] for params in candidates})
+        weight_options = sorted({params["weights"] for params in candidates})
+        metrics = sorted({params["metric"] for params in candidates})
+
+        # The queries spend their time in compiled code, so threads share the work without copying X
+        results = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+            delayed(_score_fold)(X, y, train, test, metric, neighbor_counts, weight_options, self.estimator)
+            for (train, test), metric in itertools.product(splits, metrics)
+        )
+
+        split_scores = np.empty((len(splits), len(candidates)))
+        for position, (metric, scores) in enumerate(results):
+            fold = position // len(metrics)
+            for index, params in enumerate(candidates):
+                if params["metric"] == metric:
+                    split_scores[fold, index] = scores[(params["n_neighbors"], params["weights"])]
+
+        mean = split_scores.mean(axis=0)
+        self.cv_results_ = {"params": grid}
+        for fold in range(len(splits)):
+            self.cv_results_[f"split{fold}_test_score"] = split_scores[fold]
+        self.cv_results_["mean_test_score"] = mean
+        self.cv_results_["std_test_score"] = split_scores.std(axis=0)
+        self.cv_results_["rank_test_score"] = rankdata(-mean, method="min").astype(np.int32)
+
+        self.best_index_ = int(np.argmax(mean))
+        self.best_params_ = grid[self.best_index_]
+        self.best_score_ = float(mean[self.best_index_])
+        self.n_splits_ = len(splits)
+        if self.refit:
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
@@ -0,0 +1,119 @@
+# Versioned artifacts of the addiction classifiers (Class_model.py)
+#
+# Every training run is saved as one numbered version of a named model set
+# ("model_artifacts/addiction/v3/"):
+#   - one joblib file per fitted pipeline (StandardScaler + model, and the
+#     imputation + scaling of raw exports), written uncompressed so
+#     load_version() can memory-map the numpy arrays inside it; for kNN that
+#     is the training matrix, by far the largest part
+#   - manifest.json: feature list, target, fingerprint of the training data,
+#     training settings, hyperparameters, metrics and library versions
+# A run whose data fingerprint and settings match an existing version reuses
+# it instead of retraining, so scoring jobs only pay for opening the files.
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import joblib
+import sklearn
+
+
+DEFAULT_STORE = "model_artifacts"
+MANIFEST_NAME = "manifest.json"
+
+# Bytes read at a time while hashing a data file
+FINGERPRINT_BLOCK = 1 << 20
+
+
+def data_fingerprint(path, features, target, extra_paths=()):
+    """Hash of the contents of path (and extra_paths) and the columns a model is trained on."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"features": list(features), "target": target}).encode())
+    for data_path in [path, *extra_paths]:
+        with open(data_path, "rb") as f:
+            for block in iter(lambda: f.read(FINGERPRINT_BLOCK), b""):
+                digest.update(block)
+    return "sha256:" + digest.hexdigest()
+
+
+def model_dir(store, name):
+    """Directory holding every version of the model set name."""
+    return os.path.join(store, name)
+
+
+def version_dir(store, name, version):
+    return os.path.join(model_dir(store, name), f"v{version}")
+
+
+def list_versions(store, name):
+    """Version numbers saved for name, oldest first."""
+    directory = model_dir(store, name)
+    if not os.path.isdir(directory):
+        return []
+    versions = []
+    for entry in os.listdir(directory):
+        if entry.startswith("v") and entry[1:].isdigit() and os.path.exists(os.path.join(directory, entry, MANIFEST_NAME)):
+            versions.append(int(entry[1:]))
+    return sorted(versions)
+
+
+def read_manifest(store, name, version):
+    with open(os.path.join(version_dir(store, name, version), MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def find_version(store, name, fingerprint, settings):
+    """Newest version trained on data with this fingerprint and these settings, or None."""
+    for version in reversed(list_versions(store, name)):
+        manifest = read_manifest(store, name, version)
+        if manifest["fingerprint"] == fingerprint and manifest["settings"] == settings:
+            return version
+    return None
+
+
+def save_version(store, name, pipelines, manifest):
+    """Save fitted pipelines ({"naive_bayes": ..., "knn": ...}) as the next version of name; return its number."""
+    versions = list_versions(store, name)
+    version = versions[-1] + 1 if versions else 1
+    target = version_dir(store, name, version)
+
+    tmp_dir = target + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    files = {}
+    for key, pipeline in pipelines.items():
+        files[key] = f"{key}.joblib"
+        # No compression: compressed joblib files cannot be memory-mapped
+        joblib.dump(pipeline, os.path.join(tmp_dir, files[key]))
+
+    manifest = dict(manifest, version=version, files=files, created=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    sklearn=sklearn.__version__)
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Rename at the end so a scoring job never opens a half-written version
+    os.replace(tmp_dir, target)
+    return version
+
+
+def load_version(store, name, version=None, mmap=True):
+    """Return (pipelines, manifest) of a version of name (the newest when version is None).
+
+    With mmap, large arrays are memory-mapped read-only instead of copied into memory,
+    so several scoring processes share one copy in the OS page cache.
+    """
+    if version is None:
+        versions = list_versions(store, name)
+        if not versions:
+            raise FileNotFoundError(f"no saved versions of {name!r} in {store}")
+        version = versions[-1]
+    manifest = read_manifest(store, name, version)
+    directory = version_dir(store, name, version)
+    pipelines = {
+        key: joblib.load(os.path.join(directory, filename), mmap_mode="r" if mmap else None)
+        for key, filename in manifest["files"].items()
+    }
+    return pipelines, manifest
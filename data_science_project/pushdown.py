@@ -0,0 +1,307 @@
+# Predicate-pushdown filtering with pyarrow datasets
+#
+# An alternative backend for the interactive dashboards. Instead of loading the
+# view's columns into pandas and filtering them with a FilterIndex, the sidebar
+# selection becomes a pyarrow.compute expression that is evaluated by a scan of
+# a partitioned Parquet dataset written next to the CSV
+# ("mobile_addiction.dataset/addicted=addicted/part-0.parquet", ...):
+#   - the dataset is hive-partitioned on one categorical column (Gender,
+#     addicted), so an "in" filter on it skips whole directories
+#   - rows are sorted by one range column (Age, age) inside each partition and
+#     written in row groups of ROW_GROUP_ROWS rows, so the min/max statistics of
+#     every row group are tight and range filters skip most of them
+#   - only the columns the view draws are read (column pruning)
+# Group means and counts are aggregated by Arrow on the filtered table, and a
+# pandas frame is only materialized when a figure needs the rows themselves.
+#
+# Select the backend with DASHBOARD_FILTER_BACKEND=pushdown (the default,
+# "index", is filter_engine.py). Build the datasets ahead of time with
+#     python data_science_project/pushdown.py
+# otherwise they are written on first use, and rewritten whenever the CSV changes.
+
+import json
+import os
+import shutil
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from data_loader import DATASET1_PATH, DATASET2_PATH, find_snapshot, read_dataset, source_signature
+import snapshots
+
+
+BACKEND_ENV = "DASHBOARD_FILTER_BACKEND"
+BACKENDS = ("index", "pushdown")
+
+# Rows per Parquet row group: small enough for range filters to skip most groups,
+# large enough to keep the per-group overhead low
+ROW_GROUP_ROWS = 64 * 1024
+
+# Per dataset: the partition column and the column rows are sorted by inside each partition
+DATASET_LAYOUTS = {
+    DATASET1_PATH: {"partition": "Gender", "sort": "Age"},
+    DATASET2_PATH: {"partition": "addicted", "sort": "age"},
+}
+
+# Sidecar file holding the signature of the CSV the dataset was built from
+MANIFEST_NAME = "_manifest.json"
+
+
+def filter_backend():
+    """The filtering backend picked by DASHBOARD_FILTER_BACKEND ("index" unless set to "pushdown")."""
+    backend = os.environ.get(BACKEND_ENV, "index").lower()
+    return backend if backend in BACKENDS else "index"
+
+
+def dataset_dir(path):
+    """Return where the partitioned dataset of the CSV at path lives, e.g. "master-6.csv" -> "master-6.dataset"."""
+    return os.path.splitext(path)[0] + ".dataset"
+
+
+def _partitioning(column):
+    return ds.partitioning(pa.schema([(column, pa.string())]), flavor="hive")
+
+
+def write_partitioned_dataset(data, target, partition, sort, source_signature, row_group_rows=ROW_GROUP_ROWS):
+    """Write data as a hive-partitioned Parquet dataset at target, sorted by sort inside each partition."""
+    data = data.sort_values([partition, sort], kind="stable", na_position="last")
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    # Partition values are strings (written into directory names); the manifest remembers an ordered
+    # Categorical's order so scans can restore it (see PushdownSource.scan)
+    table = table.set_column(table.schema.get_field_index(partition), partition, table.column(partition).cast(pa.string()))
+    dtype = data[partition].dtype
+    order = list(dtype.categories) if isinstance(dtype, pd.CategoricalDtype) and dtype.ordered else None
+
+    tmp_dir = target + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    ds.write_dataset(
+        table,
+        tmp_dir,
+        format="parquet",
+        partitioning=_partitioning(partition),
+        max_rows_per_group=row_group_rows,
+        min_rows_per_group=min(row_group_rows, 1024),
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+        json.dump({
+            "source_signature": snapshots.format_signature(source_signature),
+            "partition": partition,
+            "sort": sort,
+            "order": order,
+        }, f)
+
+    # Swap directories at the end so a running dashboard never scans a half-written dataset
+    old_dir = target + ".old"
+    if os.path.exists(target):
+        os.replace(target, old_dir)
+    os.replace(tmp_dir, target)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_manifest(target):
+    """Return the manifest of the dataset at target, or None if there is none."""
+    manifest = os.path.join(target, MANIFEST_NAME)
+    if not os.path.exists(manifest):
+        return None
+    with open(manifest) as f:
+        return json.load(f)
+
+
+def build_dataset(path):
+    """Write the partitioned dataset for the CSV at path (from its snapshot when there is one)."""
+    layout = DATASET_LAYOUTS[os.path.basename(path)]
+    signature = source_signature(path)
+    snapshot = find_snapshot(path)
+    data = snapshots.read_snapshot(snapshot) if snapshot is not None else read_dataset(path)
+    target = dataset_dir(path)
+    write_partitioned_dataset(data, target, layout["partition"], layout["sort"], signature)
+    return target
+
+
+def filter_expression(categories=None, ranges=None):
+    """Turn a sidebar selection into a pyarrow.compute expression (None when nothing is filtered).
+
+    Same matching rules as filter_engine: missing values never match and range bounds are inclusive.
+    """
+    conditions = []
+    for column, selection in (categories or {}).items():
+        conditions.append(pc.field(column).isin(list(selection)))
+    for column, (low, high) in (ranges or {}).items():
+        conditions.append((pc.field(column) >= low) & (pc.field(column) <= high))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+class PushdownSource:
+    """One partitioned dataset, scanned with pushed-down filters and column projections."""
+
+    def __init__(self, target, partition, order=None):
+        self.target = target
+        self.partition = partition
+        self.order = pa.array(order, pa.string()) if order is not None else None
+        # Files starting with "_" (the manifest) are not part of the dataset
+        self.dataset = ds.dataset(target, format="parquet", partitioning=_partitioning(partition))
+        self.n_rows = self.dataset.count_rows()
+        self._columns = {}  # column -> its unfiltered Arrow column (for widget bounds and options)
+        self._lock = threading.Lock()
+
+    def scan(self, expression=None, columns=None):
+        """Return the rows matching expression as an Arrow table, reading only columns."""
+        table = self.dataset.to_table(columns=list(columns) if columns is not None else None, filter=expression)
+        if self.order is not None and self.partition in table.column_names:
+            # Back to the ordered Categorical the loader uses, so groups come out in the same order
+            position = table.schema.get_field_index(self.partition)
+            column = table.column(position)
+            chunks = [
+                pa.DictionaryArray.from_arrays(pc.index_in(chunk, value_set=self.order), self.order, ordered=True)
+                for chunk in column.chunks
+            ]
+            table = table.set_column(position, self.partition, pa.chunked_array(chunks, pa.dictionary(pa.int32(), pa.string(), True)))
+        return table
+
+    def _column(self, column):
+        with self._lock:
+            if column not in self._columns:
+                self._columns[column] = self.scan(columns=[column]).column(column)
+            return self._columns[column]
+
+    def bounds(self, column):
+        """(min, max) of a column over the whole dataset."""
+        result = pc.min_max(self._column(column))
+        return result["min"].as_py(), result["max"].as_py()
+
+    def options(self, column):
+        """Distinct non-missing values of a column, in the order the scan returns them."""
+        return pc.unique(self._column(column).drop_null()).to_pylist()
+
+
+class TableGroups:
+    """Group means and counts of an Arrow table, in the same layout as filter_engine.GroupStats."""
+
+    def __init__(self, table, keys, values=()):
+        self.table = table
+        self.keys = list(keys)
+        self.value_columns = list(values)
+
+    def _grouped(self, aggregations):
+        # Arrow keeps a group for missing keys and does not sort; groupby does neither
+        grouped = self.table.select(self.keys + self.value_columns).group_by(self.keys).aggregate(aggregations)
+        frame = grouped.to_pandas().dropna(subset=self.keys)
+        return frame.sort_values(self.keys, kind="stable").reset_index(drop=True)
+
+    def means(self):
+        """Same as data.groupby(keys)[values].mean().reset_index() over the filtered rows."""
+        frame = self._grouped([(column, "mean") for column in self.value_columns])
+        frame = frame.rename(columns={f"{column}_mean": column for column in self.value_columns})
+        return frame[self.keys + self.value_columns]
+
+    def sizes(self, name="Count"):
+        """Same as data.groupby(keys).size().reset_index(name=name) over the filtered rows."""
+        frame = self._grouped([([], "count_all")]).rename(columns={"count_all": name})
+        return frame[self.keys + [name]]
+
+    def value_counts(self, name="count"):
+        """Same as data[key].value_counts().reset_index() over the filtered rows."""
+        frame = self.sizes(name)
+        return frame.sort_values(name, ascending=False, kind="stable").reset_index(drop=True)
+
+    def summary(self, name="Count"):
+        """sizes(name) and means() in one table, from a single Arrow group_by."""
+        frame = self._grouped([([], "count_all")] + [(column, "mean") for column in self.value_columns])
+        frame = frame.rename(columns={"count_all": name, **{f"{column}_mean": column for column in self.value_columns}})
+        return frame[self.keys + [name] + self.value_columns]
+
+
+class PushdownFilter:
+    """Filter state for one session, with the interface of filter_engine.IncrementalFilter.
+
+    Every change of the selection is one scan of the dataset with the filter
+    pushed down; an unchanged selection (e.g. a section switch) reuses the last result.
+    """
+
+    def __init__(self, source, columns):
+        self.source = source
+        self.columns = list(columns)
+        self.conditions = None
+        self.table = None
+        self._frames = {}  # columns -> pandas frame of the matching rows
+        self._lock = threading.Lock()  # figures are built on several threads
+
+    def update(self, categories=None, ranges=None):
+        """Apply the current sidebar selection and return the number of matching rows."""
+        conditions = (
+            {column: frozenset(selection) for column, selection in (categories or {}).items()},
+            {column: tuple(bounds) for column, bounds in (ranges or {}).items()},
+        )
+        if conditions != self.conditions:
+            self.table = self.source.scan(filter_expression(categories, ranges), self.columns)
+            self._frames = {}
+            self.conditions = conditions
+        return self.table.num_rows
+
+    @property
+    def n_rows(self):
+        """Number of rows matching the current selection (no pandas conversion)."""
+        return self.table.num_rows
+
+    def filtered(self, columns=None):
+        """Return the matching rows as a pandas frame, only the given columns (converted on first use)."""
+        columns = list(self.columns if columns is None else columns)
+        with self._lock:
+            if tuple(columns) not in self._frames:
+                self._frames[tuple(columns)] = self.table.select(columns).to_pandas()
+            return self._frames[tuple(columns)]
+
+    def group_stats(self, keys, values=()):
+        """Return the group means/counts of the matching rows, computed by Arrow."""
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        return TableGroups(self.table, keys, values)
+
+
+_sources = {}  # dataset directory -> (source signature, PushdownSource)
+_sources_lock = threading.Lock()
+
+
+def get_pushdown_source(path):
+    """Return the PushdownSource for the CSV at path, (re)building its dataset when the CSV has changed."""
+    target = dataset_dir(path)
+    signature = snapshots.format_signature(source_signature(path))
+
+    with _sources_lock:
+        cached = _sources.get(target)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        manifest = read_manifest(target)
+        if manifest is None or manifest["source_signature"] != signature:
+            build_dataset(path)
+            manifest = read_manifest(target)
+        source = PushdownSource(target, manifest["partition"], manifest.get("order"))
+        _sources[target] = (signature, source)
+        return source
+
+
+def get_pushdown_filter(state, name, source, columns):
+    """Return the session's PushdownFilter for source, stored in state (e.g. st.session_state)."""
+    pushdown = state.get(name)
+    if pushdown is None or pushdown.source is not source or pushdown.columns != list(columns):
+        pushdown = PushdownFilter(source, columns)
+        state[name] = pushdown
+    return pushdown
+
+
+def main():
+    for path in DATASET_LAYOUTS:
+        target = build_dataset(path)
+        files = len(ds.dataset(target, format="parquet").files)
+        print(f"{path} -> {target} ({files} files)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# Batch scoring of raw exports with the addiction classifiers
+#
+# Scores files in the mobile_addiction.csv format (CSV, or Parquet as written
+# by synthetic_data.py) with a saved version of the Class_model.py models: the
+# wrangling notebook's median imputation and standard scaling, then the
+# model's own scaler and Naive Bayes / kNN. Train (or reuse) a version first,
+# then run from the project root, e.g.
+#     python data_science_project/Class_model.py --no-plots
+#     python data_science_project/score.py mobile_addiction.csv --output predictions.csv
+#     python data_science_project/score.py big/mobile.parquet --output big/scores.parquet --workers 8 --knn-mode ivf
+#
+# The input is never read whole. CSV files are cut into byte ranges of about
+# --chunk-mb at line boundaries, Parquet files into row groups, and each
+# worker process parses and scores its own chunks, so parsing scales with the
+# cores as well. Every worker loads the models once, memory-mapped, so they
+# share one copy of kNN's training matrix; kNN searches a knn_index index.
+# Only a few chunks are in flight at a time and results are written in input
+# order, so memory stays flat whatever the size of the export.
+#
+# Output: one row per input row with its id (the CSV's index column, or the
+# row number) and, for every model, <model>_prediction ("not addicted" /
+# "addicted") and <model>_probability (probability of "addicted").
+
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sklearn.pipeline import Pipeline
+from threadpoolctl import threadpool_limits
+
+from Class_model import features, load_models
+from data_loader import CATEGORY_ORDERS, DATASET2_PATH
+from knn_index import IVF_PROBE, MODES as KNN_MODES, indexed_pipeline
+import model_store
+
+
+MODELS = ("naive_bayes", "knn")
+
+# The notebook's OrdinalEncoder order: class 0.0 is "not addicted", 1.0 is "addicted"
+LABELS = CATEGORY_ORDERS[DATASET2_PATH]["addicted"]
+
+CHUNK_MB = 16
+
+# Name pandas gives the unnamed index column of an export
+INDEX_COLUMN = "Unnamed: 0"
+
+_pipelines = None  # name -> scoring pipeline, loaded once per worker process
+
+
+def load_scoring_pipelines(store=model_store.DEFAULT_STORE, version=None, models=MODELS, knn_mode="tree",
+                           n_probe=IVF_PROBE):
+    """Return ({model: raw export -> model pipeline}, manifest) for a saved version."""
+    pipelines, manifest = load_models(store, version)
+    if "wrangling" not in pipelines:
+        raise ValueError(f"version v{manifest['version']} was trained without the raw export; "
+                         f"retrain it with Class_model.py next to {DATASET2_PATH}")
+    scoring = {}
+    for name in models:
+        pipeline = pipelines[name]
+        if name == "knn":
+            # One thread per index: the worker processes already use every core
+            pipeline = indexed_pipeline(pipeline, mode=knn_mode, n_probe=n_probe, n_threads=1)
+        scoring[name] = Pipeline([("wrangling", pipelines["wrangling"])] + list(pipeline.steps))
+    return scoring, manifest
+
+
+def score_frame(pipelines, frame):
+    """Predictions and probabilities of every pipeline for the rows of frame (raw features)."""
+    scores = pd.DataFrame(index=frame.index)
+    for name, pipeline in pipelines.items():
+        classes = pipeline.classes_
+        # sklearn rejects empty inputs (e.g. an empty Parquet row group)
+        probabilities = pipeline.predict_proba(frame[features]) if len(frame) else np.empty((0, len(classes)))
+        # argmax of the probabilities is what predict() returns, without scoring twice
+        predicted = classes[np.argmax(probabilities, axis=1)]
+        scores[f"{name}_prediction"] = pd.Categorical.from_codes(predicted.astype(int), categories=LABELS)
+        scores[f"{name}_probability"] = probabilities[:, list(classes).index(1.0)]
+    return scores
+
+
+def csv_ranges(path, chunk_bytes):
+    """Yield (start, end) byte ranges of the CSV body of about chunk_bytes each, cut at line ends."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()  # header
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+
+def _read_header(path):
+    with open(path, "rb") as f:
+        return f.readline()
+
+
+def _read_csv_chunk(path, header, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start)
+    # Exports written with their row index (like mobile_addiction.csv) start with an unnamed column
+    indexed = header.startswith(b",")
+    # float64: missing values are imputed, so integer columns may hold NaN
+    frame = pd.read_csv(io.BytesIO(header + body), usecols=lambda column: column in features or column == INDEX_COLUMN,
+                        dtype={column: "float64" for column in features}, index_col=0 if indexed else None)
+    return frame.rename_axis("id") if indexed else frame
+
+
+def _init_worker(store, version, models, knn_mode, n_probe):
+    global _pipelines
+    # One BLAS/OpenMP thread per process, so the pool does not oversubscribe the cores
+    threadpool_limits(limits=1)
+    _pipelines = load_scoring_pipelines(store, version, models, knn_mode, n_probe)[0]
+
+
+def _score_task(task):
+    kind, path, arguments = task
+    if kind == "csv":
+        frame = _read_csv_chunk(path, *arguments)
+    else:
+        frame = pq.ParquetFile(path).read_row_group(arguments, columns=features).to_pandas()
+    return score_frame(_pipelines, frame)
+
+
+def _tasks(path, chunk_bytes):
+    if path.endswith(".parquet"):
+        for group in range(pq.ParquetFile(path).num_row_groups):
+            yield "parquet", path, group
+        return
+    header = _read_header(path)
+    for start, end in csv_ranges(path, chunk_bytes):
+        yield "csv", path, (header, start, end)
+
+
+def _empty_frame(path):
+    """A frame with the features and no rows, indexed like the chunks of path."""
+    indexed = not path.endswith(".parquet") and _read_header(path).startswith(b",")
+    return pd.DataFrame(columns=features, dtype="float64",
+                        index=pd.Index([], dtype="int64", name="id" if indexed else None))
+
+
+def _write_chunk(f, fmt, scores, rows, writer):
+    if scores.index.name != "id":
+        # No id column in the input: number the rows across chunks
+        scores.index = pd.RangeIndex(rows, rows + len(scores), name="row")
+    scores = scores.reset_index()
+    if fmt == "csv":
+        scores.to_csv(f, header=f.tell() == 0, index=False)
+        return None
+    table = pa.Table.from_pandas(scores, preserve_index=False)
+    if writer is None:
+        writer = pq.ParquetWriter(f, table.schema)
+    writer.write_table(table)  # one row group per chunk
+    return writer
+
+
+def score_file(path, output, store=model_store.DEFAULT_STORE, version=None, models=MODELS, knn_mode="tree",
+               n_probe=IVF_PROBE, workers=None, chunk_mb=CHUNK_MB, fmt=None):
+    """Score the export at path into output (CSV or Parquet, from fmt or the suffix); return the row count."""
+    fmt = fmt or ("parquet" if output.endswith(".parquet") else "csv")
+    workers = workers or os.cpu_count() or 1
+    # Fail before starting the pool when the store has no usable version
+    pipelines = load_scoring_pipelines(store, version, models, knn_mode, n_probe)[0]
+
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = output + ".tmp"
+
+    rows = 0
+    writer = None
+    try:
+        with open(tmp_path, "wb") as f:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(store, version, models, knn_mode, n_probe)) as pool:
+                # Keep only a few chunks in flight so memory stays bounded by the workers, not the input size
+                pending = []
+                for task in _tasks(path, int(chunk_mb * 1024 * 1024)):
+                    pending.append(pool.submit(_score_task, task))
+                    if len(pending) >= 2 * workers:
+                        scores = pending.pop(0).result()
+                        writer = _write_chunk(f, fmt, scores, rows, writer)
+                        rows += len(scores)
+                for future in pending:
+                    scores = future.result()
+                    writer = _write_chunk(f, fmt, scores, rows, writer)
+                    rows += len(scores)
+
+            if writer is None and f.tell() == 0:
+                # Nothing was written (header-only input): still write the CSV header / Parquet schema
+                writer = _write_chunk(f, fmt, score_frame(pipelines, _empty_frame(path)), rows, writer)
+            if writer is not None:
+                writer.close()
+    except BaseException:
+        # Never leave a partial output behind (a worker failed, or the run was interrupted)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, output)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a raw addiction export with the saved classifiers.")
+    parser.add_argument("input", help="export in the mobile_addiction.csv format (.csv or .parquet)")
+    parser.add_argument("--output", required=True, help="predictions file (.csv or .parquet)")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="output format (default: from the output suffix)")
+    parser.add_argument("--models", default=",".join(MODELS), help="comma-separated models to score with")
+    parser.add_argument("--store", default=model_store.DEFAULT_STORE, help="directory of the versioned model store")
+    parser.add_argument("--version", type=int, help="model version to use (default: the newest)")
+    parser.add_argument("--knn-mode", choices=KNN_MODES, default="tree", help="kNN index (ivf is approximate)")
+    parser.add_argument("--n-probe", type=int, default=IVF_PROBE, help="lists searched per query in ivf mode")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_MB, help="CSV bytes per chunk")
+    args = parser.parse_args()
+
+    models = args.models.split(",")
+    unknown = set(models) - set(MODELS)
+    if unknown:
+        parser.error(f"unknown models: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, args.store, args.version, models, args.knn_mode, args.n_probe,
+                      args.workers, args.chunk_mb, args.format)
+    seconds = time.perf_counter() - start
+    print(f"{args.input} -> {args.output}: {rows:,} rows in {seconds:.1f}s ({rows / seconds:,.0f} rows/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
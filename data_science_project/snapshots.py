@@ -0,0 +1,111 @@
+# Columnar snapshots of the dashboard datasets
+#
+# A snapshot is an Arrow IPC file (or a Parquet file) written next to the CSV
+# it was built from. String columns are dictionary-encoded, and the CSV's
+# mtime/size are stored in the file metadata so a stale snapshot is ignored.
+#
+# Arrow IPC snapshots are uncompressed on purpose: that lets read_snapshot()
+# memory-map the file, so opening it is zero-copy, only the pages of the
+# columns a view asks for are ever touched, and several Streamlit worker
+# processes serving the same file share one copy in the OS page cache.
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+SNAPSHOT_SUFFIXES = {"arrow": ".arrow", "parquet": ".parquet"}
+
+# Metadata key holding the signature of the CSV the snapshot was built from
+SOURCE_SIGNATURE_KEY = b"source_signature"
+
+
+def snapshot_path(csv_path, fmt="arrow"):
+    """Return where the snapshot of csv_path lives, e.g. "master-6.csv" -> "master-6.arrow"."""
+    return os.path.splitext(csv_path)[0] + SNAPSHOT_SUFFIXES[fmt]
+
+
+def format_signature(signature):
+    """Turn a (mtime_ns, size) file signature into the string stored in the metadata."""
+    return f"{signature[0]}:{signature[1]}"
+
+
+def parse_signature(text):
+    """Inverse of format_signature: "mtime:size" back to (mtime_ns, size)."""
+    mtime_ns, size = text.split(":")
+    return int(mtime_ns), int(size)
+
+
+def frame_to_table(data):
+    """Convert a frame to an Arrow table with every string column dictionary-encoded."""
+    data = data.copy()
+    for column in data.columns:
+        if data[column].dtype == object:
+            # Sorted categories keep groupby output in the same (alphabetical) order as plain strings
+            data[column] = pd.Categorical(data[column], categories=sorted(data[column].dropna().unique()))
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def write_snapshot(data, path, source_signature):
+    """Write data to path as an Arrow IPC or Parquet snapshot (picked from the file suffix)."""
+    table = frame_to_table(data)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SOURCE_SIGNATURE_KEY] = format_signature(source_signature).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    tmp_path = path + ".tmp"
+    if path.endswith(SNAPSHOT_SUFFIXES["parquet"]):
+        pq.write_table(table, tmp_path)
+    else:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    # Rename at the end so a running dashboard never opens a half-written file
+    os.replace(tmp_path, path)
+
+
+def read_snapshot_schema(path):
+    """Return the Arrow schema of a snapshot without reading any column data."""
+    if path.endswith(SNAPSHOT_SUFFIXES["parquet"]):
+        return pq.read_schema(path)
+    return pa.ipc.open_file(pa.memory_map(path)).schema
+
+
+def snapshot_source_signature(path):
+    """Return the source signature string stored in a snapshot, or None if there is none."""
+    metadata = read_snapshot_schema(path).metadata or {}
+    value = metadata.get(SOURCE_SIGNATURE_KEY)
+    return value.decode() if value is not None else None
+
+
+def read_snapshot_table(path, columns=None):
+    """Open a snapshot as an Arrow table, keeping only the requested columns."""
+    if path.endswith(SNAPSHOT_SUFFIXES["parquet"]):
+        # Parquet is decoded, not mapped, but still only reads the requested column chunks
+        return pq.read_table(path, columns=columns, memory_map=True)
+
+    # The table's buffers point straight into the mapped file (nothing is copied here)
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table
+
+
+def read_snapshot(path, columns=None):
+    """Load a snapshot into pandas, reading only the requested columns."""
+    table = read_snapshot_table(path, columns)
+    # split_blocks lets numeric columns without nulls stay views over the mapped file
+    return table.to_pandas(split_blocks=True)
+
+
+def iter_snapshot_batches(path, columns=None, batch_rows=1_000_000):
+    """Yield a snapshot as pandas frames of at most batch_rows rows (only one batch is decoded at a time)."""
+    if path.endswith(SNAPSHOT_SUFFIXES["parquet"]):
+        batches = pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_rows, columns=columns)
+    else:
+        batches = read_snapshot_table(path, columns).to_batches(max_chunksize=batch_rows)
+    for batch in batches:
+        yield batch.to_pandas()
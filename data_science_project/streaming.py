@@ -0,0 +1,386 @@
+# Out-of-core aggregation for datasets larger than memory
+#
+# The dashboard's tables are group means, value counts, histogram bins and
+# box-plot quartiles, and all of them can be built from small per-chunk
+# summaries that merge exactly (or, for quantiles, approximately):
+#   GroupMean      per group: row count, and sum/count of each value column
+#   ValueCounts    per value: row count
+#   Binned         per distinct x: row count, and count/sum/min/max of y;
+#                  plotly's automatic bins are picked from these weighted
+#                  values, so the bins match charts.histogram_bins exactly
+#   BoxStats       per group: a QuantileSketch of the value column, and its
+#                  smallest/largest values as outlier candidates
+# Each aggregation has partial(chunk) -> state, merge(a, b) -> state and
+# finalize(state) -> frame, and aggregate_stream() feeds every chunk of a
+# dataset (data_loader.iter_dataset_chunks: snapshot record batches, or CSV
+# chunks) through all requested aggregations in one pass. Only one chunk and
+# the partial states are in memory at a time, so the aggregate store (and with
+# it the static pages) works on exports much larger than a worker's memory.
+#
+# Sums and counts are exact. QuantileSketch keeps exact value counts while a
+# column has few distinct values (every score in the survey data) and falls
+# back to log-spaced buckets with a fixed relative error beyond that.
+
+import math
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from charts import BOX_OUTLIER_BUDGET, _histfunc_label, autobin, cap_outliers
+from data_loader import iter_dataset_chunks
+
+
+# Rows per chunk read from the source
+CHUNK_ROWS = 1_000_000
+
+
+def _key_list(keys):
+    return [keys] if isinstance(keys, str) else list(keys)
+
+
+def _plain(frame, columns):
+    # Unordered categoricals can carry different categories per chunk; merge on the plain values.
+    # Ordered ones (data_loader.CATEGORY_ORDERS) keep their order, see _union_dtype.
+    for column in columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype) and not frame[column].dtype.ordered:
+            frame[column] = frame[column].astype(frame[column].cat.categories.dtype)
+    return frame
+
+
+def _union_dtype(a, b):
+    """Ordered categories of two chunks: the shared known order, then every unknown label sorted.
+
+    data_loader.compact_dtypes lists a chunk's unknown labels sorted after the
+    known ones, so whatever the two lists share up front is in order and the rest
+    sorts like the unknown labels of the whole file would.
+    """
+    if a == b:
+        return a
+    a, b = list(a.categories), list(b.categories)
+    shared = 0
+    while shared < min(len(a), len(b)) and a[shared] == b[shared]:
+        shared += 1
+    return pd.CategoricalDtype(a[:shared] + sorted(set(a[shared:]) | set(b[shared:])), ordered=True)
+
+
+def _concat(a, b, columns):
+    # pd.concat turns ordered categoricals with different categories into plain values
+    a, b = a.copy(), b.copy()
+    for column in columns:
+        if isinstance(a[column].dtype, pd.CategoricalDtype) and a[column].dtype.ordered:
+            dtype = _union_dtype(a[column].dtype, b[column].dtype)
+            a[column], b[column] = a[column].astype(dtype), b[column].astype(dtype)
+    return pd.concat([a, b])
+
+
+class GroupMean:
+    """Mean of values per keys, like data.groupby(keys)[values].mean().reset_index()."""
+
+    def __init__(self, keys, values):
+        self.keys = _key_list(keys)
+        self.values = _key_list(values)
+        self.columns = self.keys + self.values
+
+    def partial(self, chunk):
+        # Sums are accumulated in float64 whatever the compact dtype of the values
+        values = chunk[self.values].astype("float64")
+        grouped = values.groupby([chunk[key] for key in self.keys], observed=True)
+        state = pd.concat([grouped.sum(min_count=1).fillna(0).add_suffix(" sum"), grouped.count().add_suffix(" count")], axis=1)
+        return _plain(state.reset_index(), self.keys)
+
+    def merge(self, a, b):
+        return _concat(a, b, self.keys).groupby(self.keys, observed=True).sum().reset_index()
+
+    def finalize(self, state):
+        state = state.groupby(self.keys, observed=True).sum()  # also sorts the groups like groupby
+        result = pd.DataFrame(index=state.index)
+        for value in self.values:
+            counts = state[f"{value} count"]
+            result[value] = (state[f"{value} sum"] / counts).where(counts > 0)
+        return result.reset_index()
+
+
+class ValueCounts:
+    """Rows per value of column, like data[column].value_counts().reset_index()."""
+
+    def __init__(self, column, name="count"):
+        self.column = column
+        self.name = name
+        self.columns = [column]
+
+    def partial(self, chunk):
+        counts = chunk[self.column].value_counts().rename(self.name)
+        counts = counts[counts > 0]  # categoricals also list their unused categories
+        return _plain(counts.rename_axis(self.column).reset_index(), [self.column])
+
+    def merge(self, a, b):
+        return _concat(a, b, [self.column]).groupby(self.column, observed=True).sum().reset_index()
+
+    def finalize(self, state):
+        state = state.groupby(self.column, observed=True).sum().reset_index()
+        return state.sort_values(self.name, ascending=False, kind="stable").reset_index(drop=True)
+
+
+class Binned:
+    """Histogram bins of x (and histfunc of y), the same table as charts.histogram_bins (without color)."""
+
+    def __init__(self, x, y=None, histfunc="count", nbins=None):
+        self.x = x
+        self.y = y
+        self.histfunc = histfunc if y is not None else "count"
+        self.nbins = nbins
+        self.columns = [x] + ([y] if y is not None else [])
+
+    def partial(self, chunk):
+        rows = chunk[self.columns].dropna()  # histogram_bins drops rows missing x (or y)
+        if self.y is not None:
+            rows[self.y] = rows[self.y].astype("float64")  # summed whatever its compact dtype
+        grouped = rows.groupby(self.x, observed=True)
+        if self.y is None:
+            state = grouped.size().rename("rows").to_frame()
+        else:
+            state = grouped[self.y].agg(["size", "sum", "min", "max"]).rename(columns={"size": "rows"})
+        return _plain(state.reset_index(), [self.x])
+
+    def merge(self, a, b):
+        return self._combine(_concat(a, b, [self.x]))
+
+    def _combine(self, state):
+        aggregations = {"rows": "sum"}
+        if self.y is not None:
+            aggregations.update({"sum": "sum", "min": "min", "max": "max"})
+        return state.groupby(self.x, observed=True).agg(aggregations).reset_index()
+
+    def finalize(self, state):
+        state = self._combine(state)
+        value_name = _histfunc_label(self.histfunc, self.y)
+        numeric = pd.api.types.is_numeric_dtype(state[self.x])
+
+        if numeric:
+            start, size, count = autobin(state[self.x], self.nbins, weights=state["rows"])
+            positions = np.floor((state[self.x].to_numpy(dtype="float64") - start) / size)
+            key = pd.Series(np.clip(positions, 0, max(count - 1, 0)).astype(np.int64), name="bin")
+        else:
+            key = state[self.x].rename("bin")
+
+        grouped = state.groupby(key)
+        if self.y is None or self.histfunc == "count":
+            binned = grouped["rows"].sum()
+        elif self.histfunc == "avg":
+            binned = grouped["sum"].sum() / grouped["rows"].sum()
+        else:
+            binned = grouped[self.histfunc].agg(self.histfunc)
+        binned = binned.rename(value_name).reset_index()
+
+        if numeric:
+            binned["bin_start"] = start + binned["bin"] * size
+            binned["bin_end"] = binned["bin_start"] + size
+            binned[self.x] = binned["bin_start"] + size / 2
+        else:
+            binned[self.x] = binned["bin"]
+        return binned.drop(columns="bin")
+
+
+class QuantileSketch:
+    """Mergeable quantile summary of a stream of numbers.
+
+    Exact value counts while there are at most max_exact distinct values;
+    above that, values are kept in log-spaced buckets so every estimate is
+    within relative_accuracy of a true value (a DDSketch). min and max stay exact.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_exact=4096):
+        self.relative_accuracy = relative_accuracy
+        self.max_exact = max_exact
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.counts = {}  # value (exact) or bucket key (bucketed) -> count
+        self.exact = True
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _bucket(self, value):
+        # (sign, index) of the bucket holding value; zero has its own bucket
+        if value == 0:
+            return (0, 0)
+        return (1 if value > 0 else -1, math.ceil(math.log(abs(value), self.gamma)))
+
+    def _bucket_value(self, key):
+        sign, index = key
+        return 0.0 if sign == 0 else sign * 2 * self.gamma ** index / (self.gamma + 1)
+
+    def _compress(self):
+        buckets = {}
+        for value, count in self.counts.items():
+            key = self._bucket(value)
+            buckets[key] = buckets.get(key, 0) + count
+        self.counts = buckets
+        self.exact = False
+
+    def add(self, values):
+        """Add an array of values (NaN is ignored)."""
+        values = np.asarray(values, dtype="float64")
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        unique, counts = np.unique(values, return_counts=True)
+        for value, count in zip(unique.tolist(), counts.tolist()):
+            key = value if self.exact else self._bucket(value)
+            self.counts[key] = self.counts.get(key, 0) + count
+        if self.exact and len(self.counts) > self.max_exact:
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """Add every value summarized by other."""
+        if self.exact and (not other.exact or len(self.counts) + len(other.counts) > self.max_exact):
+            self._compress()
+        for key, count in other.counts.items():
+            if not self.exact and other.exact:
+                key = self._bucket(key)
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _sorted(self):
+        if self.exact:
+            values = np.array(list(self.counts), dtype="float64")
+        else:
+            values = np.array([self._bucket_value(key) for key in self.counts], dtype="float64")
+        counts = np.array(list(self.counts.values()), dtype="float64")
+        order = np.argsort(values, kind="stable")
+        return values[order], np.cumsum(counts[order])
+
+    def quantile(self, q):
+        """Estimate the q quantile with linear interpolation (numpy/pandas' default method)."""
+        if self.n == 0:
+            return math.nan
+        values, cumulative = self._sorted()
+        position = (self.n - 1) * q
+        below = math.floor(position)
+
+        def at_rank(rank):
+            return values[np.searchsorted(cumulative, rank + 1)]
+        low = at_rank(below)
+        high = at_rank(min(below + 1, self.n - 1))
+        estimate = low + (position - below) * (high - low)
+        return float(min(max(estimate, self.min), self.max))
+
+    def lowest_at_least(self, bound):
+        """Smallest summarized value >= bound (e.g. the lower whisker of a box plot)."""
+        values, _ = self._sorted()
+        candidates = values[values >= bound]
+        return float(max(candidates[0], self.min)) if len(candidates) else math.nan
+
+    def highest_at_most(self, bound):
+        """Largest summarized value <= bound (e.g. the upper whisker of a box plot)."""
+        values, _ = self._sorted()
+        candidates = values[values <= bound]
+        return float(min(candidates[-1], self.max)) if len(candidates) else math.nan
+
+
+class BoxStats:
+    """Box-plot statistics of value per key, the same table as charts.box_stats.
+
+    Next to the sketch, every group keeps its max_outliers smallest and
+    largest distinct values, which are the candidates for the outlier points.
+    """
+
+    def __init__(self, key, value, relative_accuracy=0.01, max_outliers=BOX_OUTLIER_BUDGET):
+        self.key = key
+        self.value = value
+        self.relative_accuracy = relative_accuracy
+        self.max_outliers = max_outliers
+        self.columns = [key, value]
+
+    def partial(self, chunk):
+        sketches = {}
+        extremes = {}
+        for group, values in chunk.groupby(self.key, observed=True)[self.value]:
+            values = values.to_numpy(dtype="float64")
+            sketches[group] = QuantileSketch(self.relative_accuracy).add(values)
+            distinct = np.unique(values[np.isfinite(values)])
+            extremes[group] = (distinct[:self.max_outliers], distinct[-self.max_outliers:])
+        return {"dtype": chunk[self.key].dtype, "sketches": sketches, "extremes": extremes}
+
+    def merge(self, a, b):
+        for group, sketch in b["sketches"].items():
+            if group in a["sketches"]:
+                a["sketches"][group].merge(sketch)
+                (low_a, high_a), (low_b, high_b) = a["extremes"][group], b["extremes"][group]
+                a["extremes"][group] = (
+                    np.unique(np.concatenate([low_a, low_b]))[:self.max_outliers],
+                    np.unique(np.concatenate([high_a, high_b]))[-self.max_outliers:],
+                )
+            else:
+                a["sketches"][group] = sketch
+                a["extremes"][group] = b["extremes"][group]
+        if isinstance(a["dtype"], pd.CategoricalDtype) and a["dtype"].ordered:
+            a["dtype"] = _union_dtype(a["dtype"], b["dtype"])
+        return a
+
+    def finalize(self, state):
+        # Groups in groupby's order: category order for ordered keys, sorted otherwise
+        dtype = state["dtype"]
+        groups = list(state["sketches"])
+        if isinstance(dtype, pd.CategoricalDtype) and dtype.ordered:
+            groups.sort(key=list(dtype.categories).index)
+        else:
+            groups.sort()
+        rows = []
+        for group in groups:
+            sketch = state["sketches"][group]
+            q1, median, q3 = (sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+            iqr = q3 - q1
+            lower_whisker = sketch.lowest_at_least(q1 - 1.5 * iqr)
+            upper_whisker = sketch.highest_at_most(q3 + 1.5 * iqr)
+            lows, highs = state["extremes"][group]
+            rows.append({
+                self.key: group,
+                "count": sketch.n,
+                "min": sketch.min,
+                "q1": q1,
+                "median": median,
+                "q3": q3,
+                "max": sketch.max,
+                "lower_whisker": lower_whisker,
+                "upper_whisker": upper_whisker,
+                "outliers": cap_outliers(lows[lows < lower_whisker], highs[highs > upper_whisker],
+                                         self.max_outliers).tolist(),
+            })
+        return pd.DataFrame(rows)
+
+
+def aggregate_frame(aggregation, data):
+    """Run one aggregation over an in-memory frame (the same code path as the streaming one)."""
+    return aggregation.finalize(aggregation.partial(data))
+
+
+def aggregate_chunks(aggregations, chunks):
+    """Feed every chunk through all aggregations ({name: aggregation}) and return {name: frame}."""
+    states = {}
+    for chunk in chunks:
+        for name, aggregation in aggregations.items():
+            partial = aggregation.partial(chunk)
+            states[name] = aggregation.merge(states[name], partial) if name in states else partial
+    return {name: aggregation.finalize(states[name]) for name, aggregation in aggregations.items() if name in states}
+
+
+def aggregate_stream(path, aggregations, chunk_rows=CHUNK_ROWS):
+    """Compute {name: frame} for the dataset at path, reading it chunk by chunk.
+
+    Only the columns the aggregations use are read.
+    """
+    columns = sorted({column for aggregation in aggregations.values() for column in aggregation.columns})
+    return aggregate_chunks(aggregations, iter_dataset_chunks(path, columns, chunk_rows))
+
+
+def merge_states(aggregation, states):
+    """Merge partial states computed elsewhere (e.g. one per worker or per file)."""
+    return reduce(aggregation.merge, states)
@@ -0,0 +1,337 @@
+# Synthetic data for both dashboard schemas
+#
+# Load-testing the dashboard needs datasets far larger than the real survey
+# files, and must not need the real participant data. This module generates
+# rows for the "master-5 2.csv" and "mobile_addiction.csv" schemas from a
+# small statistical model of each file:
+#   - every column has a discrete marginal distribution (its levels, or its
+#     integer values, with their frequencies), so categorical levels and value
+#     ranges match the real data
+#   - correlations come from a Gaussian factor copula: each column's latent
+#     normal score loads on a few shared factors (e.g. a general "addiction"
+#     factor driving usage, anxiety, self-esteem, ...), and the score is mapped
+#     to the marginal through its quantiles
+#   - columns that have missing values in the real data lose the same share of
+#     values at random
+# The frequencies and loadings below were fitted once on the real files; only
+# these summary statistics are kept here.
+#
+# Generation is chunked and spread over worker processes. Each chunk has its
+# own seed derived from (seed, chunk number), so the output does not depend on
+# the number of workers. CSV output uses the same layout as the real file (so
+# data_loader parses it unchanged); Parquet output holds the frame as the
+# loader returns it (labels applied, no CSV row index). Run from the project
+# root, e.g.
+#     python data_science_project/synthetic_data.py "master-5 2.csv" --rows 10M --output big/"master-5 2.csv"
+#     python data_science_project/synthetic_data.py mobile_addiction.csv --rows 100M --output big/mobile.parquet
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from scipy.stats import norm, poisson
+
+from data_loader import CATEGORY_ORDERS, DATASET1_PATH, DATASET2_PATH, DATASET_SCHEMAS, compact_dtypes
+
+
+# Rows generated per task
+CHUNK_ROWS = 1_000_000
+
+
+def parse_size(text):
+    """Parse a row count such as "10k", "1M" or "2500"."""
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000, "g": 1_000_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("kmg")) * scale)
+
+
+def normal_levels(mean, std, low, high):
+    """Integer values low..high with the probabilities of a rounded normal(mean, std)."""
+    values = np.arange(low, high + 1)
+    edges = norm.cdf(np.r_[values - 0.5, high + 0.5], mean, std)
+    edges[0], edges[-1] = 0.0, 1.0  # the tails fold into the end values
+    return values.tolist(), np.diff(edges).tolist()
+
+
+def poisson_levels(mean, low, high):
+    """Integer values low..high with the probabilities of a Poisson(mean), tails folded into the ends."""
+    values = np.arange(low, high + 1)
+    probs = poisson.pmf(values, mean)
+    probs[0] += poisson.cdf(low - 1, mean)
+    probs[-1] += poisson.sf(high, mean)
+    return values.tolist(), probs.tolist()
+
+
+# Column models per dataset, in file order. "values"/"probs" is the marginal
+# (ordered, so a higher latent score means a later value), "loadings" the
+# weight of each latent factor in the column's score and "missing" the share
+# of values left empty.
+DATASET1_MODEL = {
+    "Age": {
+        "values": [16, 18, 22, 25, 30, 35, 40, 45, 50],
+        "probs": [0.049, 0.102, 0.153, 0.152, 0.204, 0.098, 0.097, 0.098, 0.047],
+    },
+    "Gender": {
+        "values": ["Female", "Male", "Other"],
+        "probs": [0.486, 0.473, 0.041],
+    },
+    "Daily Social Media Usage(hours)": {
+        "values": list(range(13)),
+        "probs": [0.048, 0.053, 0.097, 0.153, 0.150, 0.096, 0.107, 0.099, 0.052, 0.046, 0.048, 0.031, 0.020],
+        "loadings": {"addiction": 0.98},
+        "missing": 0.0105,
+    },
+    "Number of Social Media Platforms": {
+        "values": [1, 2, 3, 4, 5, 6],
+        "probs": [0.151, 0.300, 0.254, 0.144, 0.102, 0.049],
+    },
+    "Frequency of Posts": {
+        "values": ["Never", "Rarely", "Sometimes", "Often", "Always"],
+        "probs": [0.099, 0.305, 0.349, 0.200, 0.047],
+    },
+    "Frequency of Checking Notifications": {
+        "values": ["Rarely", "Occasionally", "Frequently"],
+        "probs": [0.245, 0.403, 0.352],
+        "missing": 0.0107,
+    },
+    "Self Reported Addiction Score": {
+        "values": list(range(1, 11)),
+        "probs": [0.0005, 0.0005, 0.004, 0.020, 0.049, 0.092, 0.143, 0.160, 0.139, 0.392],
+        "loadings": {"addiction": 0.855},
+        "missing": 0.0099,
+    },
+    "Cyberbullying Experience": {
+        "values": [0, 1],
+        "probs": [0.801, 0.199],
+    },
+    "Self Esteem Score": {
+        "values": list(range(1, 11)),
+        "probs": [0.152, 0.063, 0.088, 0.096, 0.121, 0.131, 0.123, 0.103, 0.066, 0.057],
+        "loadings": {"addiction": -0.94},
+        "missing": 0.011,
+    },
+    "Sleep Quality": {
+        "values": list(range(1, 11)),
+        "probs": [0.049, 0.055, 0.102, 0.100, 0.196, 0.208, 0.095, 0.100, 0.047, 0.048],
+        "loadings": {"sleep": 0.65},
+        "missing": 0.0102,
+    },
+    "Anxiety Score": {
+        "values": list(range(1, 11)),
+        "probs": [0.025, 0.057, 0.116, 0.164, 0.175, 0.145, 0.115, 0.088, 0.059, 0.056],
+        "loadings": {"addiction": 0.893},
+        "missing": 0.0088,
+    },
+    "Social Media Fatigue Score": {
+        "values": list(range(1, 11)),
+        "probs": [0.006, 0.027, 0.094, 0.172, 0.218, 0.199, 0.136, 0.086, 0.045, 0.017],
+        "loadings": {"addiction": 0.80},
+    },
+    "Mental Health Status": {
+        "values": ["Poor", "Fair", "Good", "Excellent"],
+        "probs": [0.375, 0.270, 0.303, 0.052],
+        "loadings": {"addiction": -0.87, "sleep": 0.45},
+    },
+}
+
+
+def _integer_column(levels, loading):
+    values, probs = levels
+    return {"values": values, "probs": probs, "loadings": {"addiction": loading}}
+
+
+DATASET2_MODEL = {
+    "daily_screen_time": _integer_column(poisson_levels(3.77, 0, 12), 0.38),
+    "app_sessions": _integer_column(normal_levels(30.04, 7.41, 8, 60), 0.66),
+    "social_media_usage": _integer_column(poisson_levels(1.55, 0, 7), 0.39),
+    "gaming_time": _integer_column(poisson_levels(1.03, 0, 6), 0.35),
+    "notifications": _integer_column(normal_levels(60.02, 12.73, 25, 103), 0.76),
+    "night_usage": _integer_column(poisson_levels(0.99, 0, 6), 0.38),
+    "age": _integer_column(normal_levels(33.06, 10.12, 15, 55), -0.39),
+    "work_study_hours": _integer_column(normal_levels(5.98, 2.07, 0, 14), -0.25),
+    "stress_level": _integer_column(normal_levels(4.27, 2.29, 0, 10), 0.53),
+    "apps_installed": _integer_column(normal_levels(27.53, 5.89, 10, 55), 0.43),
+    # The label is essentially the addiction factor split in half
+    "addicted": {"values": ["not addicted", "addicted"], "probs": [0.496, 0.504], "loadings": {"addiction": 0.98}},
+}
+
+MODELS = {
+    DATASET1_PATH: DATASET1_MODEL,
+    DATASET2_PATH: DATASET2_MODEL,
+}
+
+
+def get_model(dataset):
+    """Return the column model for a dataset file name (e.g. "master-5 2.csv")."""
+    try:
+        return MODELS[os.path.basename(dataset)]
+    except KeyError:
+        raise ValueError(f"No synthetic data model for {dataset!r}; choose one of {sorted(MODELS)}") from None
+
+
+def generate_frame(dataset, rows, seed=0, start=0):
+    """Generate rows rows for dataset in the raw CSV representation (codes and labels as in the file).
+
+    start numbers the rows (used for the CSV row index) and is part of the
+    random stream, so generate_frame(d, n, seed, start) is the same rows
+    wherever it runs.
+    """
+    model = get_model(dataset)
+    rng = np.random.default_rng([seed, start])
+
+    factor_names = sorted({name for column in model.values() for name in column.get("loadings", {})})
+    factors = {name: rng.standard_normal(rows) for name in factor_names}
+
+    columns = {}
+    for name, column in model.items():
+        loadings = column.get("loadings", {})
+        residual = np.sqrt(max(1.0 - sum(weight ** 2 for weight in loadings.values()), 0.0))
+        score = residual * rng.standard_normal(rows)
+        for factor, weight in loadings.items():
+            score += weight * factors[factor]
+
+        # Latent score -> uniform -> position in the cumulative marginal
+        cumulative = np.cumsum(column["probs"])
+        cumulative /= cumulative[-1]
+        positions = np.minimum(np.searchsorted(cumulative, ndtr(score), side="right"), len(cumulative) - 1)
+        values = np.asarray(column["values"], dtype=object if isinstance(column["values"][0], str) else None)
+        series = pd.Series(values[positions])
+
+        if column.get("missing"):
+            series = series.astype("float64") if series.dtype.kind in "iu" else series
+            series[rng.random(rows) < column["missing"]] = np.nan
+        columns[name] = series
+
+    frame = pd.DataFrame(columns)
+    frame.index = pd.RangeIndex(start, start + rows)
+    return frame
+
+
+def _loader_frame(dataset, frame):
+    # The frame as data_loader.read_dataset would return it: labels applied, compact dtypes. The
+    # models' value ranges decide those dtypes, so every chunk gets the same Parquet schema
+    schema = DATASET_SCHEMAS[os.path.basename(dataset)]
+    frame = frame.astype(schema["dtype"])
+    for column, labels in schema["labels"].items():
+        frame[column] = frame[column].map(labels)
+    return compact_dtypes(frame.reset_index(drop=True), CATEGORY_ORDERS.get(os.path.basename(dataset)))
+
+
+def _empty_table(dataset):
+    # Parquet table without rows. Arrow types a string column without values as null, so unordered
+    # categoricals get the model's levels, the categories read_dataset gives them on generated data
+    import pyarrow as pa
+    frame = _loader_frame(dataset, generate_frame(dataset, 0))
+    model = get_model(dataset)
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype) and len(frame[column].cat.categories) == 0:
+            frame[column] = frame[column].cat.set_categories(sorted(model[column]["values"]))
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def _csv_header(dataset):
+    schema = DATASET_SCHEMAS[os.path.basename(dataset)]
+    names = list(get_model(dataset))
+    if "index_col" in schema["read_csv"]:
+        names = [""] + names  # unnamed row index column
+    return ",".join(f'"{name}"' if "," in name else name for name in names) + "\n"
+
+
+def _generate_chunk(args):
+    # Worker task: one chunk, returned ready to append to the output
+    dataset, start, rows, seed, fmt = args
+    frame = generate_frame(dataset, rows, seed=seed, start=start)
+    if fmt == "parquet":
+        import pyarrow as pa
+        return pa.Table.from_pandas(_loader_frame(dataset, frame), preserve_index=False)
+
+    schema = DATASET_SCHEMAS[os.path.basename(dataset)]
+    return frame.to_csv(header=False, index="index_col" in schema["read_csv"]).encode("utf-8")
+
+
+def _chunks(rows, chunk_rows):
+    start = 0
+    while start < rows:
+        yield start, min(chunk_rows, rows - start)
+        start += chunk_rows
+
+
+def generate(dataset, rows, output, fmt=None, seed=0, workers=None, chunk_rows=CHUNK_ROWS):
+    """Write rows synthetic rows for dataset to output (CSV or Parquet, from fmt or the file suffix)."""
+    fmt = fmt or ("parquet" if output.endswith(".parquet") else "csv")
+    workers = workers or os.cpu_count() or 1
+    tasks = ((dataset, start, count, seed, fmt) for start, count in _chunks(rows, chunk_rows))
+
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = output + ".tmp"
+
+    writer = None
+    try:
+        with open(tmp_path, "wb") as f:
+            if fmt == "csv":
+                encoding = DATASET_SCHEMAS[os.path.basename(dataset)]["read_csv"].get("encoding", "utf-8")
+                f.write(_csv_header(dataset).encode(encoding))  # utf-8-sig adds the byte order mark
+
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Keep only a few chunks in flight so memory stays bounded by the workers, not the output size
+                pending = []
+                for task in tasks:
+                    pending.append(pool.submit(_generate_chunk, task))
+                    if len(pending) >= 2 * workers:
+                        writer = _write_chunk(f, fmt, pending.pop(0).result(), writer)
+                for future in pending:
+                    writer = _write_chunk(f, fmt, future.result(), writer)
+
+            if fmt == "parquet" and writer is None:
+                # No rows: still write a valid Parquet file with the loader's schema
+                writer = _write_chunk(f, fmt, _empty_table(dataset), writer)
+            if writer is not None:
+                writer.close()
+    except BaseException:
+        # Never leave a partial output behind (a worker failed, or the run was interrupted)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, output)
+    return output
+
+
+def _write_chunk(f, fmt, chunk, writer):
+    if fmt == "csv":
+        f.write(chunk)
+        return None
+    import pyarrow.parquet as pq
+    if writer is None:
+        writer = pq.ParquetWriter(f, chunk.schema)
+    writer.write_table(chunk)  # one row group per chunk
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic data for the dashboard schemas.")
+    parser.add_argument("dataset", choices=sorted(MODELS), help="schema to generate (the real file's name)")
+    parser.add_argument("--rows", default="1M", help="number of rows, e.g. 10k, 1M, 100M")
+    parser.add_argument("--output", help="output file (.csv or .parquet); default: <rows>/<dataset> under the current directory")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="output format (default: from the output suffix)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--chunk-rows", default=str(CHUNK_ROWS), help="rows per chunk")
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    output = args.output or os.path.join(str(rows), args.dataset)
+    start = time.perf_counter()
+    generate(args.dataset, rows, output, fmt=args.format, seed=args.seed, workers=args.workers,
+             chunk_rows=parse_size(args.chunk_rows))
+    print(f"{rows:,} rows -> {output} ({os.path.getsize(output) / 1e6:.1f} MB, {time.perf_counter() - start:.1f}s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()